@@ -1,17 +1,134 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for
+from flask import Flask, g, render_template, request, jsonify, redirect, url_for
 import pandas as pd
 import os
-from src.detector import MoneyLaunderingDetector
-from src.analytics import AdvancedAnalytics
-from src.compliance import RegulatoryCompliance
+import hashlib
+import json
+import tempfile
+import time
+import uuid
+import zlib
+from datetime import date, datetime
+from urllib.parse import urlencode
+import numpy as np
+from src.detector import RULE_THRESHOLDS, MoneyLaunderingDetector
+from src.analytics import ANALYTICS_CHECKS, AdvancedAnalytics
+from src.compliance import COMPRESSIONS, RegulatoryCompliance
 from src.utils import load_data, generate_sample_data
+from src.schema import SchemaError, compact, concat_compact, memory_report
+from src.ingest import ingest_upload
+from src.datastore import DEFAULT_SPILL_DIR, Dataset, DatasetNotFound, DatasetRegistry
+from src.jobs import JobManager, JobQueueFull
+from src.alert_index import DEFAULT_PAGE_SIZE, AlertIndex, InvalidCursor
+from src.store import TransactionStore
+from src.cache import DEFAULT_MAX_ENTRIES, ResultCache, fingerprint
+from src.sweep import ThresholdSweep, threshold_range
+from src.metrics import REGISTRY as metrics
+from src.profiling import DEFAULT_DIRECTORY as DEFAULT_PROFILE_DIR, ProfileSession
+from src import log
 
 app = Flask(__name__)
+# Uploads are spooled to disk and parsed in chunks, so the limit is disk, not worker memory
+app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get('MAX_UPLOAD_MB', 4096)) * 2 ** 20
 
-# Global variables to store data and results
-transactions_data = None
-accounts_data = None
-detection_results = None
+# Persistent SQLite store for datasets and alerts when DATABASE_URL (sqlite:///path.db) is set
+store = TransactionStore.from_url(os.environ['DATABASE_URL']) if os.environ.get('DATABASE_URL') else None
+
+def restore_dataset(dataset_id):
+    """Rebuild a dataset (and its latest results) from the store, e.g. after a restart"""
+    stored = store.load_dataset(dataset_id)
+    if stored is None:
+        return None
+    name, transactions, accounts = stored
+    dataset = Dataset(dataset_id, transactions, accounts, name)
+    runs = store.runs(dataset_id)
+    if runs:
+        alerts = store.alerts(run_id=runs[0]['run_id'])
+        alerts.reverse()  # alerts() returns newest rows first
+        dataset.results = {
+            'version': runs[0]['run_id'],
+            'alerts': alerts,
+            'transactions_count': len(transactions),
+            'accounts_count': len(accounts),
+            'alerts_count': len(alerts),
+            'thresholds_used': runs[0]['metadata'].get('thresholds_used')
+        }
+    return dataset
+
+# Uploaded data, results and incremental state, one entry per dataset id (see src/datastore.py)
+datasets = DatasetRegistry(
+    memory_budget=int(os.environ.get('DATASET_MEMORY_MB', 1024)) * 2 ** 20,
+    spill_dir=os.environ.get('DATASET_DIR', DEFAULT_SPILL_DIR),
+    # Share datasets between worker processes (gunicorn) through DATASET_DIR
+    write_through=os.environ.get('DATASET_WRITE_THROUGH', '0') == '1',
+    loader=restore_dataset if store else None
+)
+# Accounts rendered on the dashboard; the rest are paged through /api/accounts
+DASHBOARD_ACCOUNTS = 100
+# Responses smaller than this are sent uncompressed
+GZIP_MIN_BYTES = 1024
+# Per-rule detection results, reused while data and the rule's thresholds are unchanged
+results_cache = ResultCache(
+    max_entries=int(os.environ.get('RESULT_CACHE_ENTRIES', DEFAULT_MAX_ENTRIES)),
+    directory=os.environ.get('RESULT_CACHE_DIR') or None
+)
+# Per-rule cProfile/tracemalloc reports of runs requested with X-Profile: 1 or ?profile=1
+PROFILE_DIR = os.environ.get('PROFILE_DIR', DEFAULT_PROFILE_DIR)
+# Steps of a detection job: the detector's rules, then the analytics checks
+DETECTION_RULES = list(RULE_THRESHOLDS) + ANALYTICS_CHECKS
+# Detection runs as background jobs so requests return at once (see src/jobs.py)
+jobs = JobManager(
+    max_workers=int(os.environ.get('JOB_WORKERS', 2)),
+    max_queued=int(os.environ.get('JOB_QUEUE_SIZE', 8))
+)
+
+# Process gauges sampled on every /metrics scrape
+metrics.sampled('aml_jobs_pending', 'Detection jobs queued or running', jobs.pending)
+metrics.sampled('aml_datasets_memory_bytes', 'Bytes of dataset frames held in memory', datasets.memory_used)
+metrics.sampled('aml_result_cache_hits_total', 'Result cache hits', lambda: results_cache.hits, kind='counter')
+metrics.sampled('aml_result_cache_misses_total', 'Result cache misses', lambda: results_cache.misses, kind='counter')
+
+@app.before_request
+def start_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request(response):
+    """Request latency and count per endpoint (streamed bodies: time to the first byte)"""
+    started = g.pop('request_started', None)
+    if started is not None:
+        labels = {
+            'method': request.method,
+            'endpoint': request.url_rule.rule if request.url_rule else 'unmatched',
+            'status': str(response.status_code)
+        }
+        metrics.observe('aml_http_request_duration_seconds', 'Flask request duration',
+                        time.perf_counter() - started, **labels)
+        metrics.inc('aml_http_requests_total', 'Flask requests', **labels)
+    return response
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Prometheus scrape endpoint: detector, request and process metrics"""
+    return app.response_class(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.errorhandler(413)
+def upload_too_large(e):
+    limit = app.config['MAX_CONTENT_LENGTH'] // 2 ** 20
+    return jsonify({'success': False, 'message': f'Upload exceeds the {limit} MB limit (MAX_UPLOAD_MB)'}), 413
+
+@app.errorhandler(DatasetNotFound)
+def dataset_not_found(e):
+    return jsonify({'success': False, 'message': 'Unknown dataset'}), 404
+
+def requested_dataset_id():
+    """dataset_id from the URL, JSON body, query string or form"""
+    dataset_id = (request.view_args or {}).get('dataset_id') \
+        or (request.get_json(silent=True) or {}).get('dataset_id') \
+        or request.args.get('dataset_id') \
+        or request.form.get('dataset_id')
+    if not dataset_id:
+        raise DatasetNotFound(dataset_id)
+    return dataset_id
 
 @app.route('/')
 def index():
@@ -20,9 +137,7 @@ def index():
 
 @app.route('/upload', methods=['POST'])
 def upload_files():
-    """Handle file uploads"""
-    global transactions_data, accounts_data
-    
+    """Handle file uploads; each upload becomes a new dataset"""
     try:
         # Check if files were uploaded
         if 'transactions' in request.files and 'accounts' in request.files:
@@ -30,132 +145,590 @@ def upload_files():
             accounts_file = request.files['accounts']
             
             if transactions_file.filename and accounts_file.filename:
-                # Read uploaded files
-                transactions_data = pd.read_csv(transactions_file)
-                accounts_data = pd.read_csv(accounts_file)
+                # Spool to disk, then parse in validated chunks (CSV, Parquet or Arrow; see src/ingest.py)
+                transactions_data, transactions_stats = ingest_upload(transactions_file, 'transactions')
+                accounts_data, accounts_stats = ingest_upload(accounts_file, 'accounts')
+                memory = memory_report(transactions_data)
+                dataset_id = datasets.create(transactions_data, accounts_data, name=transactions_file.filename)
+                if store:
+                    store.save_dataset(dataset_id, transactions_data, accounts_data, transactions_file.filename)
                 
                 return jsonify({
                     'success': True,
+                    'dataset_id': dataset_id,
                     'message': f'Uploaded {len(transactions_data)} transactions and {len(accounts_data)} accounts',
                     'transactions_count': len(transactions_data),
-                    'accounts_count': len(accounts_data)
+                    'accounts_count': len(accounts_data),
+                    'memory_bytes': {column: int(size) for column, size in memory['bytes'].items()},
+                    'ingest': {'transactions': transactions_stats, 'accounts': accounts_stats}
                 })
         
         return jsonify({'success': False, 'message': 'Please upload both files'})
     
+    except SchemaError as e:
+        return jsonify({'success': False, 'message': f'Invalid file: {str(e)}'}), 400
     except Exception as e:
         return jsonify({'success': False, 'message': f'Error: {str(e)}'})
 
 @app.route('/demo')
 def demo():
-    """Generate demo data and run detection"""
-    global transactions_data, accounts_data, detection_results
-    
+    """Generate demo data and start detection in the background"""
     try:
         # Generate sample data
         transactions_data, accounts_data = generate_sample_data(1000)
+        dataset_id = datasets.create(transactions_data, accounts_data, name='demo')
+        if store:
+            store.save_dataset(dataset_id, transactions_data, accounts_data, 'demo')
         
-        # Run detection
-        detector = MoneyLaunderingDetector(transactions_data, accounts_data)
-        alerts = detector.detect()
-        
-        # Run analytics
-        analytics = AdvancedAnalytics(transactions_data, accounts_data)
-        analytics.run()
-        
-        # Generate compliance report
-        compliance = RegulatoryCompliance(alerts)
-        compliance.generate_report()
-        
-        detection_results = {
-            'alerts': alerts,
-            'transactions_count': len(transactions_data),
-            'accounts_count': len(accounts_data),
-            'alerts_count': len(alerts)
-        }
+        # Run detection, analytics and the compliance report as a job
+        job = submit_detection(dataset_id, compliance_report=True)
         
-        return redirect(url_for('dashboard'))
+        return redirect(url_for('dashboard', dataset_id=dataset_id, job=job.id))
     
+    except JobQueueFull as e:
+        return jsonify({'success': False, 'message': str(e)}), 429
     except Exception as e:
         return jsonify({'success': False, 'message': f'Error: {str(e)}'})
 
 @app.route('/dashboard')
 def dashboard():
     """Main dashboard showing detection results"""
-    global transactions_data, accounts_data, detection_results
-    
-    if transactions_data is None or accounts_data is None:
+    try:
+        dataset_id = requested_dataset_id()
+        with datasets.read(dataset_id) as dataset:
+            transactions = dataset.transactions.head(10).to_dict('records')
+            accounts = dataset.accounts.head(DASHBOARD_ACCOUNTS).to_dict('records')
+            accounts_count = len(dataset.accounts)
+            results = dataset.results
+    except DatasetNotFound:
         return redirect(url_for('index'))
     
-    return render_template('dashboard.html', 
-                         transactions=transactions_data.head(10).to_dict('records'),
-                         accounts=accounts_data.to_dict('records'),
-                         results=detection_results)
+    job = jobs.get(request.args.get('job', ''))
+    return render_template('dashboard.html',
+                         dataset_id=dataset_id,
+                         transactions=transactions,
+                         accounts=accounts,
+                         accounts_count=accounts_count,
+                         results=results,
+                         job=job.to_dict(include_result=False) if job else None)
+
+@app.route('/api/datasets')
+def list_datasets():
+    """API endpoint to list datasets (in memory or spilled to disk)"""
+    return jsonify({
+        'success': True,
+        'memory_used_bytes': datasets.memory_used(),
+        'memory_budget_bytes': datasets.memory_budget,
+        'datasets': datasets.datasets()
+    })
+
+@app.route('/api/datasets/<dataset_id>', methods=['GET'])
+def dataset_info(dataset_id):
+    """API endpoint for one dataset's size and state"""
+    with datasets.read(dataset_id) as dataset:
+        return jsonify({'success': True, **dataset.info()})
+
+@app.route('/api/datasets/<dataset_id>', methods=['DELETE'])
+def delete_dataset(dataset_id):
+    """API endpoint to drop a dataset from memory, disk and the persistent store"""
+    stored = store.delete_dataset(dataset_id) if store else False
+    if not datasets.delete(dataset_id) and not stored:
+        raise DatasetNotFound(dataset_id)
+    return jsonify({'success': True, 'dataset_id': dataset_id})
 
 @app.route('/api/run-detection', methods=['POST'])
 def run_detection():
-    """API endpoint to run detection on uploaded data"""
-    global transactions_data, accounts_data, detection_results
-    
-    if transactions_data is None or accounts_data is None:
-        return jsonify({'success': False, 'message': 'No data uploaded'})
-    
+    """
+    API endpoint to start detection on a dataset; poll /api/jobs/<job_id>.
+    With the X-Profile: 1 header or ?profile=1, every rule is profiled and
+    the job result lists the reports written under PROFILE_DIR.
+    """
     try:
+        dataset_id = requested_dataset_id()
         # Customize thresholds if provided
-        custom_thresholds = request.json.get('thresholds', {})
-        
-        # Initialize detector
-        detector = MoneyLaunderingDetector(transactions_data, accounts_data)
-        
-        # Apply custom thresholds
-        if 'large_txn_threshold' in custom_thresholds:
-            detector.thresholds["large_txn_threshold"] = custom_thresholds['large_txn_threshold']
-        if 'structuring_threshold' in custom_thresholds:
-            detector.thresholds["structuring_threshold"] = custom_thresholds['structuring_threshold']
+        body = request.get_json(silent=True) or {}
+        custom_thresholds = body.get('thresholds', {})
+        thresholds = {
+            name: custom_thresholds[name]
+            for name in ('large_txn_threshold', 'structuring_threshold')
+            if name in custom_thresholds
+        }
         
-        # Run detection
-        alerts = detector.detect()
+        profile = request.headers.get('X-Profile', request.args.get('profile', '')).lower() in ('1', 'true', 'yes')
+        job = submit_detection(dataset_id, thresholds, rules=body.get('rules'), profile=profile)
         
-        # Run analytics
-        analytics = AdvancedAnalytics(transactions_data, accounts_data)
-        analytics.run()
+        return jsonify({
+            'success': True,
+            'dataset_id': dataset_id,
+            'job_id': job.id,
+            'status': job.status,
+            'status_url': url_for('job_status', job_id=job.id),
+            'message': 'Detection started.'
+        }), 202
+    
+    except DatasetNotFound:
+        raise
+    except JobQueueFull as e:
+        response = jsonify({'success': False, 'message': f'{e}, retry later'})
+        response.headers['Retry-After'] = '5'
+        return response, 429
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Error: {str(e)}'})
+
+def submit_detection(dataset_id, thresholds=None, compliance_report=False, rules=None, profile=False):
+    """
+    Queue the detection pipeline for a dataset as a background job, one step
+    per rule so progress can be polled. The steps hold the dataset's read
+    lock; the summary is stored as the dataset's results.
+    
+    Each rule's result is cached on the dataset's content and the thresholds
+    that rule reads (see src/cache.py), so a rerun only recomputes the rules
+    whose thresholds changed. `rules` limits the run to some of
+    DETECTION_RULES. With `profile`, every rule is recomputed (no cache
+    reads) under a src/profiling.ProfileSession.
+    """
+    detector = MoneyLaunderingDetector()
+    detector.thresholds.update(thresholds or {})
+    datasets.get(dataset_id)  # unknown ids fail here, not in the job
+    rules = [rule for rule in DETECTION_RULES if rules is None or rule in rules]
+    cached = []
+    session = ProfileSession(name=f"{dataset_id}-{uuid.uuid4().hex[:8]}", directory=PROFILE_DIR) if profile else None
+    
+    def cached_step(rule, fn):
+        params = {name: detector.thresholds[name] for name in RULE_THRESHOLDS.get(rule, ())}
+        def run(results):
+            with datasets.read(dataset_id) as dataset:
+                key = dataset_fingerprint(dataset)
+                if session is None:
+                    value, hit = results_cache.get_or_compute(key, rule, params, lambda: fn(dataset))
+                else:
+                    with session.activate():
+                        value, hit = fn(dataset), False
+                    results_cache.put(key, rule, params, value)
+            if hit:
+                cached.append(rule)
+            return value
+        return run
+    
+    def daily(dataset):
+        # Shared by the daily-sum and daily-count rules; depends on the data only
+        detector.transactions, detector.accounts = dataset.transactions, dataset.accounts
+        if session is not None:
+            return detector.daily_aggregates()
+        value, _ = results_cache.get_or_compute(dataset_fingerprint(dataset), 'daily_aggregates', None,
+                                                detector.daily_aggregates)
+        return value
+    
+    def detect(rule):
+        def fn(dataset):
+            detector.transactions, detector.accounts = dataset.transactions, dataset.accounts
+            return detector.detect_rule(rule, None if rule == 'large_transactions' else daily(dataset))
+        return fn
+    
+    def analytics(check):
+        return lambda dataset: getattr(AdvancedAnalytics(dataset.transactions, dataset.accounts), check)()
+    
+    steps = [(rule, cached_step(rule, detect(rule) if rule in RULE_THRESHOLDS else analytics(rule)))
+             for rule in rules]
+    detector_alerts = lambda results: [alert for rule in RULE_THRESHOLDS if rule in results
+                                       for alert in results[rule]]
+    if compliance_report:
+        steps.append(('compliance_report',
+                      lambda results: RegulatoryCompliance(detector_alerts(results)).generate_report()))
+    
+    def finalize(results):
+        alerts = detector_alerts(results)
+        profile_report = {'directory': session.path, 'rules': session.rules(), 'files': session.save()} \
+            if session else None
+        version = uuid.uuid4().hex  # identifies this alert list in cursors and ETags
+        if store:
+            store.insert_alerts(alerts, run_id=version, dataset_id=dataset_id,
+                                metadata={'thresholds_used': detector.thresholds})
+        with datasets.write(dataset_id) as dataset:
+            dataset.results = {
+                'version': version,
+                'alerts': alerts,
+                'transactions_count': len(dataset.transactions),
+                'accounts_count': len(dataset.accounts),
+                'alerts_count': len(alerts),
+                'thresholds_used': detector.thresholds
+            }
+            return {
+                'alerts_count': len(alerts),
+                'alerts': alerts[:10],  # First 10 alerts for preview; all via /api/get-alerts
+                'transactions_count': len(dataset.transactions),
+                'accounts_count': len(dataset.accounts),
+                'thresholds_used': detector.thresholds,
+                'cached_rules': cached,
+                'profile': profile_report
+            }
+    
+    return jobs.submit(steps, finalize, dataset_id=dataset_id)
+
+@app.route('/api/jobs')
+def list_jobs():
+    """API endpoint to list known detection jobs (without results)"""
+    return jsonify({
+        'success': True,
+        'pending': jobs.pending(),
+        'jobs': [job.to_dict(include_result=False) for job in jobs.jobs()]
+    })
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """API endpoint for a job's status, per-rule progress and (once finished) results"""
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'message': 'Unknown job'}), 404
+    return jsonify({'success': True, **job.to_dict()})
+
+@app.route('/api/jobs/<job_id>', methods=['DELETE'])
+@app.route('/api/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """API endpoint to cancel a queued or running job"""
+    cancelled = jobs.cancel(job_id)
+    if cancelled is None:
+        return jsonify({'success': False, 'message': 'Unknown job'}), 404
+    if not cancelled:
+        return jsonify({'success': False, 'message': 'Job already finished',
+                        'status': jobs.get(job_id).status}), 409
+    return jsonify({'success': True, 'job_id': job_id, 'status': jobs.get(job_id).status})
+
+@app.route('/api/append-transactions', methods=['POST'])
+def append_transactions():
+    """
+    API endpoint to add a micro-batch to a dataset and return only its new or
+    changed alerts. Without a dataset_id a new, empty dataset is started.
+    """
+    try:
+        body = request.get_json(silent=True) or {}
+        batch = compact(pd.DataFrame(body.get('transactions', [])))
+        dataset_id = body.get('dataset_id') or request.args.get('dataset_id') \
+            or datasets.create(pd.DataFrame(), pd.DataFrame(), name='stream')
         
-        # Store results
-        detection_results = {
-            'alerts': alerts,
-            'transactions_count': len(transactions_data),
-            'accounts_count': len(accounts_data),
-            'alerts_count': len(alerts),
-            'thresholds_used': detector.thresholds
-        }
+        with datasets.write(dataset_id) as dataset:
+            # Start from the dataset's transactions (if any) on the first batch
+            if dataset.incremental is None:
+                dataset.incremental = MoneyLaunderingDetector(dataset.transactions, dataset.accounts)
+            
+            alerts = dataset.incremental.append(batch)
+            transactions_seen = dataset.incremental.aggregates.rows
+            # Keep the raw rows too, so the dataset can still be listed and fully re-run
+            dataset.transactions = concat_compact(
+                [frame for frame in (dataset.transactions, batch) if not frame.empty]
+            )
         
         return jsonify({
             'success': True,
+            'dataset_id': dataset_id,
             'alerts_count': len(alerts),
-            'alerts': alerts[:10],  # First 10 alerts for preview
-            'message': f'Detection completed. Found {len(alerts)} alerts.'
+            'alerts': alerts,
+            'transactions_seen': transactions_seen
         })
     
+    except DatasetNotFound:
+        raise
     except Exception as e:
         return jsonify({'success': False, 'message': f'Error: {str(e)}'})
 
 @app.route('/api/get-alerts')
 def get_alerts():
-    """API endpoint to get all alerts"""
-    global detection_results
+    """
+    API endpoint for one page of a dataset's alerts.
     
-    if detection_results is None:
-        return jsonify({'success': False, 'message': 'No detection results available'})
+    Query parameters: dataset_id, account_id, alert_type (or reason),
+    min_risk/max_risk, start/end (alert date, end exclusive),
+    sort (position, risk_score, date, account_id, alert_type), order (asc/desc),
+    limit, and cursor (next_cursor of the previous page).
+    """
+    with datasets.read(requested_dataset_id()) as dataset:
+        detection_results = dataset.results
+        if detection_results is None:
+            return jsonify({'success': False, 'message': 'No detection results available'})
+        index = alert_index(dataset)
     
-    return jsonify({
+    # Same alert list + same query = same page: unchanged pages answer 304
+    query = sorted((key, value) for key, values in request.args.lists() for value in values)
+    etag = hashlib.sha1(f"{index.version}?{urlencode(query)}".encode()).hexdigest()
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+        response.set_etag(etag)
+        return response
+    
+    try:
+        args = request.args
+        alerts, next_cursor, total = index.page(
+            sort=args.get('sort', 'position'),
+            descending=args.get('order', 'asc').lower() == 'desc',
+            cursor=args.get('cursor') or None,
+            limit=args.get('limit', DEFAULT_PAGE_SIZE, type=int),
+            account_id=args.get('account_id'),
+            alert_type=args.get('alert_type') or args.get('reason'),
+            min_risk=args.get('min_risk', type=float),
+            max_risk=args.get('max_risk', type=float),
+            start=args.get('start'),
+            end=args.get('end')
+        )
+    except (InvalidCursor, ValueError) as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    
+    response = streamed_json({
         'success': True,
-        'alerts': detection_results['alerts'],
+        'next_cursor': next_cursor,
+        'total_matches': total,
         'summary': {
             'total_alerts': len(detection_results['alerts']),
             'transactions_analyzed': detection_results['transactions_count'],
             'accounts_monitored': detection_results['accounts_count']
         }
+    }, 'alerts', alerts)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+@app.route('/api/accounts')
+def get_accounts():
+    """API endpoint for a page of a dataset's accounts (offset, limit)"""
+    offset = max(0, request.args.get('offset', 0, type=int))
+    limit = max(1, min(request.args.get('limit', DASHBOARD_ACCOUNTS, type=int), 1000))
+    with datasets.read(requested_dataset_id()) as dataset:
+        accounts = dataset.accounts.iloc[offset:offset + limit].to_dict('records')
+        total = len(dataset.accounts)
+    return streamed_json({
+        'success': True,
+        'total_accounts': total,
+        'next_offset': offset + limit if offset + limit < total else None
+    }, 'accounts', accounts)
+
+@app.route('/api/history/transactions')
+def history_transactions():
+    """
+    API endpoint for stored transactions by account and time range, read
+    through the store's (account_id, timestamp) index.
+    
+    Query parameters: account_id (repeatable), start/end (end exclusive),
+    dataset_id, limit.
+    """
+    if store is None:
+        return jsonify({'success': False, 'message': 'No persistent store configured (DATABASE_URL)'}), 404
+    args = request.args
+    limit = max(1, min(args.get('limit', 1000, type=int), 100000))
+    try:
+        transactions = store.transactions(
+            account_ids=args.getlist('account_id') or None,
+            start=args.get('start'),
+            end=args.get('end'),
+            dataset_id=args.get('dataset_id'),
+            limit=limit
+        )
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    return streamed_json({'success': True, 'count': len(transactions)},
+                         'transactions', transactions.to_dict('records'))
+
+@app.route('/api/history/alerts')
+def history_alerts():
+    """
+    API endpoint for stored alerts of every run, newest first.
+    
+    Query parameters: account_id, alert_type, min_risk/max_risk, start/end
+    (alert date, end exclusive), run_id, dataset_id, limit, offset.
+    """
+    if store is None:
+        return jsonify({'success': False, 'message': 'No persistent store configured (DATABASE_URL)'}), 404
+    args = request.args
+    limit = max(1, min(args.get('limit', DEFAULT_PAGE_SIZE, type=int), 1000))
+    offset = max(0, args.get('offset', 0, type=int))
+    try:
+        alerts = store.alerts(
+            account_id=args.get('account_id'),
+            alert_type=args.get('alert_type'),
+            min_risk=args.get('min_risk', type=float),
+            max_risk=args.get('max_risk', type=float),
+            start=args.get('start'),
+            end=args.get('end'),
+            run_id=args.get('run_id'),
+            dataset_id=args.get('dataset_id'),
+            limit=limit,
+            offset=offset
+        )
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    return streamed_json({
+        'success': True,
+        'next_offset': offset + limit if len(alerts) == limit else None
+    }, 'alerts', alerts)
+
+@app.route('/api/compliance-report')
+def compliance_report():
+    """
+    API endpoint to download a regulatory report of a dataset's latest alerts
+    (or, for a CTR, of its cash transactions).
+    
+    Query parameters: dataset_id, type (str: alerts at the STR risk score,
+    ctr: cash transactions at the CTR amount; default: every alert),
+    format (csv, jsonl, xlsx; default csv), compression (gzip, bz2, xz).
+    The report is written to a temporary file in chunks (see src/compliance.py)
+    and deleted once sent.
+    """
+    args = request.args
+    report_type, fmt, compression = args.get('type') or None, args.get('format', 'csv'), args.get('compression') or None
+    dataset_id = requested_dataset_id()
+    with datasets.read(dataset_id) as dataset:
+        if dataset.results is None and report_type != 'ctr':
+            return jsonify({'success': False, 'message': 'No detection results available'})
+        # Frames and alert lists are replaced, never modified, so these stay consistent after the lock
+        compliance = RegulatoryCompliance(dataset.results['alerts'] if dataset.results else [],
+                                          dataset.transactions)
+    
+    suffix = f".{fmt}" + (COMPRESSIONS[compression][0] if compression in COMPRESSIONS else '')
+    handle, path = tempfile.mkstemp(suffix=suffix)
+    os.close(handle)
+    try:
+        written = compliance.write_report(path, report_type=report_type, fmt=fmt, compression=compression)
+    except ValueError as e:
+        os.remove(path)
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception:
+        os.remove(path)
+        raise
+    
+    def stream():
+        # Runs to the end (or is closed on disconnect), so the file is always removed
+        try:
+            with open(path, 'rb') as f:
+                while True:
+                    chunk = f.read(2 ** 20)
+                    if not chunk:
+                        break
+                    yield chunk
+        finally:
+            os.remove(path)
+    
+    return app.response_class(stream(), mimetype='application/octet-stream', headers={
+        'Content-Disposition': f"attachment; filename={report_type or 'alerts'}-{dataset_id}{suffix}",
+        'Content-Length': str(os.path.getsize(path)),
+        'X-Report-Rows': str(written['written'])
     })
 
+@app.route('/api/threshold-sweep', methods=['POST'])
+def threshold_sweep():
+    """
+    API endpoint for alert counts (and optionally flagged accounts) at many
+    candidate thresholds, answered from one precomputation per dataset.
+    
+    JSON body: dataset_id; thresholds, mapping large_txn_threshold,
+    structuring_threshold or daily_txn_count to a list of values or to
+    {"min", "max", "steps"} (default: 50 steps from 0 to twice the
+    detector's defaults); include_accounts.
+    """
+    body = request.get_json(silent=True) or {}
+    defaults = MoneyLaunderingDetector().thresholds
+    requested = body.get('thresholds') or {
+        name: {'min': 0, 'max': 2 * value, 'steps': 50} for name, value in defaults.items()
+    }
+    try:
+        thresholds = {
+            name: threshold_range(values['min'], values['max'], values.get('steps', 50))
+            if isinstance(values, dict) else values
+            for name, values in requested.items()
+        }
+        with datasets.read(requested_dataset_id()) as dataset:
+            key = dataset_fingerprint(dataset)
+            def build():
+                daily, _ = results_cache.get_or_compute(
+                    key, 'daily_aggregates', None,
+                    MoneyLaunderingDetector(dataset.transactions).daily_aggregates)
+                return ThresholdSweep(dataset.transactions, daily)
+            sweep, cached = results_cache.get_or_compute(key, 'threshold_sweep', None, build)
+        points = sweep.sweep(thresholds, include_accounts=bool(body.get('include_accounts')))
+    except DatasetNotFound:
+        raise
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({'success': False, 'message': f'Invalid thresholds: {e}'}), 400
+    
+    return jsonify({
+        'success': True,
+        'transactions_count': sweep.transactions_count,
+        'account_days': sweep.account_days,
+        'precomputed': cached,
+        'sweep': points
+    })
+
+@app.route('/api/cache', methods=['GET'])
+def cache_stats():
+    """API endpoint for result cache hit/miss counts and entries per rule"""
+    return jsonify({'success': True, **results_cache.stats()})
+
+@app.route('/api/cache', methods=['DELETE'])
+def invalidate_cache():
+    """API endpoint to drop cached results of one rule and/or dataset (all without parameters)"""
+    rule = request.args.get('rule')
+    dataset_id = request.args.get('dataset_id')
+    if rule is not None and rule not in DETECTION_RULES + ['daily_aggregates', 'threshold_sweep']:
+        return jsonify({'success': False, 'message': f'Unknown rule: {rule}'}), 400
+    key = None
+    if dataset_id:
+        with datasets.read(dataset_id) as dataset:
+            key = dataset_fingerprint(dataset)
+    return jsonify({'success': True, 'invalidated': results_cache.invalidate(rule, key)})
+
+def dataset_fingerprint(dataset):
+    """Content hash of a dataset's frames, computed once per version of them"""
+    if dataset.fingerprint is None:
+        dataset.fingerprint = fingerprint(dataset.transactions, dataset.accounts)
+    return dataset.fingerprint
+
+def alert_index(dataset):
+    """The dataset's AlertIndex, rebuilt when its results changed"""
+    results = dataset.results
+    version = results.get('version') or str(id(results['alerts']))
+    index = dataset.alert_index
+    if index is None or index.version != version:
+        index = dataset.alert_index = AlertIndex(results['alerts'], version)
+    return index
+
+def streamed_json(head, name, items):
+    """
+    JSON object `head` plus a `name` list, encoded item by item as it is sent
+    (never one big string) and gzip-compressed when the client accepts it.
+    """
+    def body():
+        yield json.dumps(head, default=json_default)[:-1] + f', "{name}": ['
+        for i, item in enumerate(items):
+            yield (',' if i else '') + json.dumps(item, default=json_default)
+        yield ']}'
+    
+    chunks = (chunk.encode() for chunk in body())
+    response = app.response_class(mimetype='application/json')
+    response.vary.add('Accept-Encoding')
+    if 'gzip' in request.accept_encodings and len(items) * 100 >= GZIP_MIN_BYTES:
+        response.headers['Content-Encoding'] = 'gzip'
+        chunks = gzip_stream(chunks)
+    response.response = chunks
+    return response
+
+def gzip_stream(chunks, batch_bytes=64 * 1024):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    pending, size = [], 0
+    for chunk in chunks:
+        pending.append(chunk)
+        size += len(chunk)
+        if size >= batch_bytes:
+            yield compressor.compress(b''.join(pending))
+            pending, size = [], 0
+    yield compressor.compress(b''.join(pending)) + compressor.flush()
+
+def json_default(value):
+    """Alert fields JSON cannot encode directly (numpy scalars, timestamps, ...)"""
+    if value is pd.NaT:
+        return None
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
 if __name__ == '__main__':
+    log.configure()
     app.run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,323 @@
+"""
+Benchmark suite: every MoneyLaunderingDetector rule, PatternDetector method
+and AdvancedAnalytics check, at several data sizes.
+
+Each case records wall time (median of --repeat runs), peak RSS while it ran
+and rows/sec. Runs are appended to a JSON history file; with a baseline the
+suite exits non-zero when a case got slower by more than --max-regression %.
+
+Usage:
+    python benchmarks/suite.py --sizes 10k,100k
+    python benchmarks/suite.py --sizes 10k,100k --save-baseline
+    python benchmarks/suite.py --sizes 10k,100k,1m --max-regression 20
+    python benchmarks/suite.py --sizes 10m --repeat 1 --only patterns
+
+Data comes from src/generator.py (same seed → same rows). The legacy
+iterrows() detector rules are skipped above --legacy-max-rows, and checks
+that print per account run with stdout discarded.
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add the project root to Python path
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from src.analytics import ANALYTICS_CHECKS, AdvancedAnalytics
+from src.detector import MoneyLaunderingDetector
+from src.generator import generate_accounts, generate_transactions
+from src.patterns import ALL_RULES, PatternDetector
+
+SIZES = {"10k": 10000, "100k": 100000, "1m": 1000000, "10m": 10000000}
+COMPONENTS = ("detector", "patterns", "analytics")
+DAYS = 180
+START = "2025-01-01"
+RESULTS_DIR = ROOT / "benchmarks" / "results"
+HISTORY_FILE = RESULTS_DIR / "history.json"
+BASELINE_FILE = RESULTS_DIR / "baseline.json"
+DEFAULT_MAX_REGRESSION = 25.0
+# Cases faster than this in both runs are timer noise, never regressions
+MIN_COMPARABLE_SECONDS = 0.05
+LEGACY_MAX_ROWS = 100000
+LEGACY_RULES = ["detect_large_transactions", "detect_structuring", "detect_custom_pattern"]
+
+
+# ---------------------- Measurement ---------------------- #
+
+class PeakRSS:
+    """
+    Peak resident set size while the block runs, sampled from
+    /proc/self/statm every `interval` seconds. Where /proc is unavailable
+    this falls back to the process-lifetime peak from getrusage().
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.peak = current_rss()
+        if self.peak is not None:
+            self._thread = threading.Thread(target=self._sample, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self._thread is None:
+            self.peak = lifetime_peak_rss()
+            return False
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, current_rss())
+        return False
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, current_rss())
+
+
+def current_rss():
+    """Resident set size in bytes, or None where /proc is unavailable"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def lifetime_peak_rss():
+    try:
+        import resource
+    except ImportError:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def measure(setup, run, rows, repeat):
+    """
+    Time run(setup()) `repeat` times; setup() is excluded from the timing.
+
+    :return: dict with seconds (median), best, peak_rss_mb, rows_per_sec, alerts
+    """
+    times, peak, alerts = [], 0, None
+    for _ in range(repeat):
+        subject = setup()
+        with PeakRSS() as rss, open(os.devnull, "w") as sink, contextlib.redirect_stdout(sink):
+            started = time.perf_counter()
+            result = run(subject)
+            times.append(time.perf_counter() - started)
+        peak = max(peak, rss.peak)
+        alerts = len(result) if isinstance(result, (list, pd.DataFrame)) else alerts
+
+    seconds = statistics.median(times)
+    return {
+        "seconds": round(seconds, 6),
+        "best": round(min(times), 6),
+        "peak_rss_mb": round(peak / 2 ** 20, 1),
+        "rows_per_sec": round(rows / seconds) if seconds > 0 else None,
+        "alerts": alerts,
+    }
+
+
+# ---------------------- Cases ---------------------- #
+
+def make_dataset(rows, seed=42):
+    """Generated transactions + accounts for `rows` background rows"""
+    accounts = max(1000, rows // 100)
+    chunks, _ = generate_transactions(rows, accounts=accounts, days=DAYS, start=START, seed=seed)
+    transactions = pd.concat(list(chunks), ignore_index=True)
+    # AdvancedAnalytics reads a "type" column with cross_border values
+    transactions["type"] = pd.Categorical.from_codes(
+        transactions["is_international"].to_numpy().astype(np.int8), ["domestic", "cross_border"]
+    )
+    return transactions, generate_accounts(accounts, seed=seed)
+
+
+def cases(transactions, accounts, legacy=True):
+    """(component, name, setup, run) for every benchmarked rule"""
+    reference_time = pd.Timestamp(START) + pd.Timedelta(days=DAYS)
+
+    def detector():
+        # Legacy rules add a date column, so each run gets its own copy
+        return MoneyLaunderingDetector(transactions[["account_id", "amount", "timestamp"]].copy(), accounts)
+
+    if legacy:
+        for rule in LEGACY_RULES:
+            yield "detector", rule, detector, lambda subject, rule=rule: getattr(subject, rule)()
+    yield "detector", "daily_aggregates", detector, lambda subject: subject.daily_aggregates()
+    yield "detector", "detect_vectorized", detector, lambda subject: subject.detect_vectorized()
+
+    def patterns(prepared=True):
+        subject = PatternDetector(transactions, accounts, reference_time=reference_time)
+        if prepared:
+            subject.features()
+            subject.transaction_graph()
+        return subject
+
+    yield "patterns", "features", lambda: patterns(False), lambda subject: subject.features()
+    yield "patterns", "graph", lambda: patterns(False), lambda subject: subject.transaction_graph()
+    for rule in ALL_RULES:
+        yield "patterns", rule, patterns, lambda subject, rule=rule: getattr(subject, rule)()
+    yield "patterns", "run_all", lambda: patterns(False), lambda subject: subject.run_all()[0]
+
+    analytics = lambda: AdvancedAnalytics(transactions, accounts)
+    for check in ANALYTICS_CHECKS:
+        yield "analytics", check, analytics, lambda subject, check=check: getattr(subject, check)()
+
+
+def run_suite(sizes, repeat=3, components=COMPONENTS, legacy_max_rows=LEGACY_MAX_ROWS, seed=42, log=print):
+    """
+    Benchmark every case at every size.
+
+    :param sizes: Row counts (background rows; planted scenarios come on top)
+    :return: list of result dicts: size, rows, component, case + measure() fields
+    """
+    results = []
+    for size in sizes:
+        transactions, accounts = make_dataset(size, seed)
+        log(f"📊 {len(transactions):,} transactions, {len(accounts):,} accounts")
+        for component, name, setup, run in cases(transactions, accounts, legacy=size <= legacy_max_rows):
+            if component not in components:
+                continue
+            result = measure(setup, run, len(transactions), repeat)
+            results.append({"size": size, "rows": len(transactions), "component": component,
+                            "case": name, **result})
+            log(f"   {component:<10} {name:<32} {result['seconds']:9.3f}s "
+                f"{result['peak_rss_mb']:9.1f} MB {result['rows_per_sec'] or 0:>14,} rows/s")
+    return results
+
+
+# ---------------------- History & regressions ---------------------- #
+
+def run_record(results, repeat):
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def append_history(record, path=HISTORY_FILE):
+    """Append one run to the JSON history (a list of runs)"""
+    path = Path(path)
+    history = json.loads(path.read_text()) if path.exists() else []
+    history.append(record)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(history, indent=2))
+    return history
+
+
+def save_baseline(record, path=BASELINE_FILE):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(record, indent=2))
+
+
+def load_baseline(path=BASELINE_FILE):
+    path = Path(path)
+    return json.loads(path.read_text()) if path.exists() else None
+
+
+def compare(results, baseline, max_regression=DEFAULT_MAX_REGRESSION, min_seconds=MIN_COMPARABLE_SECONDS):
+    """
+    Cases slower than the baseline by more than `max_regression` percent.
+    Cases missing from either side, or under `min_seconds` in both, are
+    not compared.
+
+    :return: list of dicts: size, component, case, baseline, seconds, change_pct
+    """
+    previous = {(r["size"], r["component"], r["case"]): r["seconds"] for r in baseline["results"]}
+    regressions = []
+    for result in results:
+        before = previous.get((result["size"], result["component"], result["case"]))
+        if before is None or max(before, result["seconds"]) < min_seconds:
+            continue
+        change = (result["seconds"] - before) / before * 100 if before > 0 else float("inf")
+        if change > max_regression:
+            regressions.append({"size": result["size"], "component": result["component"],
+                                "case": result["case"], "baseline": before,
+                                "seconds": result["seconds"], "change_pct": round(change, 1)})
+    return regressions
+
+
+def parse_sizes(text):
+    """'10k,100k,1m' or raw row counts → list of ints"""
+    sizes = []
+    for label in text.split(","):
+        label = label.strip().lower()
+        sizes.append(SIZES[label] if label in SIZES else int(label.replace("_", "")))
+    return sizes
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10k,100k", help=f"comma-separated: {', '.join(SIZES)} or row counts")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per case (the median is recorded)")
+    parser.add_argument("--only", choices=COMPONENTS, action="append", help="restrict to a component")
+    parser.add_argument("--legacy-max-rows", type=int, default=LEGACY_MAX_ROWS,
+                        help="skip the iterrows() detector rules above this many rows")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--history", default=str(HISTORY_FILE))
+    parser.add_argument("--baseline", default=str(BASELINE_FILE))
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the new baseline")
+    parser.add_argument("--max-regression", type=float, default=DEFAULT_MAX_REGRESSION,
+                        help="fail when a case is this many percent slower than the baseline")
+    args = parser.parse_args()
+
+    results = run_suite(parse_sizes(args.sizes), args.repeat, tuple(args.only or COMPONENTS),
+                        args.legacy_max_rows, args.seed)
+    record = run_record(results, args.repeat)
+    append_history(record, args.history)
+    print(f"📝 Appended run to {args.history}")
+
+    if args.save_baseline:
+        save_baseline(record, args.baseline)
+        print(f"📌 Saved baseline to {args.baseline}")
+        return 0
+
+    baseline = load_baseline(args.baseline)
+    if baseline is None:
+        print("ℹ️ No baseline to compare against (use --save-baseline).")
+        return 0
+
+    regressions = compare(results, baseline, args.max_regression)
+    if not regressions:
+        print(f"✅ No case regressed more than {args.max_regression:g}% against the baseline.")
+        return 0
+    print(f"❌ {len(regressions)} case(s) regressed more than {args.max_regression:g}%:")
+    for r in regressions:
+        print(f"   {r['size']:>10,} {r['component']:<10} {r['case']:<32} "
+              f"{r['baseline']:.3f}s → {r['seconds']:.3f}s (+{r['change_pct']}%)")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
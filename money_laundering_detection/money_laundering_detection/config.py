@@ -13,7 +13,7 @@ class Config:
     SESSION_COOKIE_SAMESITE = 'Lax'
     
     # File upload settings
-    MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
+    MAX_CONTENT_LENGTH = int(os.environ.get('MAX_UPLOAD_MB', 4096)) * 1024 * 1024  # uploads are spooled to disk
     UPLOAD_FOLDER = 'uploads'
     
     # Database settings (if you add one later)
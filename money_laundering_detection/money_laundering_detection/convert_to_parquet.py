@@ -0,0 +1,46 @@
+"""
+One-shot conversion of a transactions CSV archive to Parquet.
+
+Usage:
+    python convert_to_parquet.py data/transactions.csv data/transactions.parquet
+    python convert_to_parquet.py archive.csv data/transactions --partition-by-date
+
+The output can be passed anywhere a transactions CSV is accepted
+(run.py --transactions, utils.load_data, MoneyLaunderingDetector.load_data).
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add the project root to Python path
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from src.columnar import DEFAULT_ROW_GROUP_SIZE, convert_csv
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("csv", help="transactions CSV to convert")
+    parser.add_argument("output", help="Parquet file, or directory with --partition-by-date")
+    parser.add_argument("--partition-by-date", action="store_true",
+                        help="write one date=YYYY-MM-DD directory per transaction day")
+    parser.add_argument("--chunksize", type=int, default=500000, help="CSV rows parsed at a time")
+    parser.add_argument("--row-group-size", type=int, default=DEFAULT_ROW_GROUP_SIZE)
+    parser.add_argument("--compression", default="snappy", help="snappy, zstd, gzip or none")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    rows = convert_csv(
+        args.csv, args.output,
+        chunksize=args.chunksize,
+        partition_by_date=args.partition_by_date,
+        row_group_size=args.row_group_size,
+        compression=None if args.compression == "none" else args.compression,
+    )
+    elapsed = time.perf_counter() - start
+    print(f"✅ Converted {rows:,} transactions to {args.output} in {elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,32 +1,72 @@
 # run.py
+import argparse
 from src.detector import MoneyLaunderingDetector
 from src.analytics import AdvancedAnalytics
-from src.compliance import RegulatoryCompliance
+from src.compliance import REPORT_TYPES, RegulatoryCompliance
 from src.utils import load_data, generate_sample_data
+from src.schema import columns_for, memory_report
+from src.parallel import detect_parallel
+from src.metrics import REGISTRY as metrics
+from src.profiling import DEFAULT_DIRECTORY as PROFILE_DIRECTORY, ProfileSession
+from src import log
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Money Laundering Detection System")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="run detection on account-hash shards in N processes")
+    parser.add_argument("--transactions", default="data/transactions.csv",
+                        help="CSV, Parquet or Arrow/Feather file, or a date-partitioned directory")
+    parser.add_argument("--accounts", default="data/accounts.csv")
+    parser.add_argument("--start", help="only load transactions at or after this timestamp")
+    parser.add_argument("--end", help="only load transactions before this timestamp")
+    parser.add_argument("--profile", action="store_true",
+                        help="write per-rule cProfile and tracemalloc reports under --profile-dir")
+    parser.add_argument("--profile-dir", default=PROFILE_DIRECTORY)
+    parser.add_argument("--summary-only", action="store_true",
+                        help="print aggregate counts only (no per-alert lines, no metrics JSON)")
+    parser.add_argument("--log-level", default=None,
+                        help=f"level written to {log.DEFAULT_LOG_FILE} (default: LOG_LEVEL env var, else INFO)")
+    parser.add_argument("--log-file", default=log.DEFAULT_LOG_FILE)
+    parser.add_argument("--compliance-report",
+                        help="also stream the alerts to a .csv/.jsonl/.xlsx file (.gz/.bz2/.xz compress CSV/JSONL)")
+    parser.add_argument("--report-type", choices=REPORT_TYPES,
+                        help="STR: alerts at the risk score, CTR: cash transactions at the amount in config/settings.py")
+    return parser.parse_args()
 
 def main():
-    print("="*80)
-    print("🏛️  MONEY LAUNDERING DETECTION SYSTEM v2.0")
-    print("🇮🇳 PMLA (Prevention of Money Laundering Act) Compliant")
-    print("🔒 Advanced Pattern Detection & Regulatory Reporting")
-    print("="*80)
+    args = parse_args()
+    # Detector progress goes to the rotated log file through a background writer thread
+    log.configure(level=args.log_level, log_file=args.log_file)
+    say = (lambda *_: None) if args.summary_only else print
+
+    say("="*80)
+    say("🏛️  MONEY LAUNDERING DETECTION SYSTEM v2.0")
+    say("🇮🇳 PMLA (Prevention of Money Laundering Act) Compliant")
+    say("🔒 Advanced Pattern Detection & Regulatory Reporting")
+    say("="*80)
 
-    print("\n📊 Initializing data...")
+    say("\n📊 Initializing data...")
 
-    # ✅ Use your own CSVs OR fallback to sample data
+    # ✅ Use your own CSVs OR fallback to sample data (CTRs also read the cash columns)
+    components = ["detector", "analytics"] + (["compliance"] if args.report_type == "ctr" else [])
     try:
         # Replace with your files
         transactions, accounts = load_data(
-            "data/transactions.csv",
-            "data/accounts.csv"
+            args.transactions,
+            args.accounts,
+            columns=columns_for(*components),
+            start=args.start,
+            end=args.end
         )
-        print(f"✅ Loaded {len(transactions)} transactions from file")
-        print(f"✅ Loaded {len(accounts)} accounts from file")
+        say(f"✅ Loaded {len(transactions)} transactions from file")
+        say(f"✅ Loaded {len(accounts)} accounts from file")
     except FileNotFoundError:
-        print("⚠️ No CSVs found, generating sample data...")
+        say("⚠️ No CSVs found, generating sample data...")
         transactions, accounts = generate_sample_data()
-        print(f"✅ Generated {len(transactions)} sample transactions")
-        print(f"✅ Generated {len(accounts)} sample accounts")
+        say(f"✅ Generated {len(transactions)} sample transactions")
+        say(f"✅ Generated {len(accounts)} sample accounts")
+
+    say(f"💾 Transactions in memory: {memory_report(transactions).loc['total', 'megabytes']} MB")
 
     # ✅ Initialize detector
     detector = MoneyLaunderingDetector(transactions, accounts)
@@ -35,26 +75,58 @@ def main():
     detector.thresholds["large_txn_threshold"] = 50000     # ₹50k
     detector.thresholds["structuring_threshold"] = 200000  # ₹2L
 
-    # ✅ Run detection
-    print("\n🔍 Running detection algorithms...")
-    alerts = detector.detect()
+    # 🔬 Optional per-rule profiling (in-process rules only; --workers shards are not profiled)
+    profile = ProfileSession(directory=args.profile_dir) if args.profile else None
+    if profile:
+        profile.start()
 
-    if alerts:
-        print("\n🚨 Alerts Generated:")
-        for alert in alerts:
-            print(f" - Account {alert['account_id']} | {alert['alert_id']} | {alert['reason']}")
+    # ✅ Run detection
+    say("\n🔍 Running detection algorithms...")
+    if args.workers > 1:
+        alerts, _ = detect_parallel(transactions, accounts, workers=args.workers,
+                                    thresholds=detector.thresholds, pattern_rules=(), layering=False)
     else:
-        print("✅ No suspicious activity detected.")
+        alerts = detector.detect(vectorized=True)
+
+    if not args.summary_only:
+        if alerts:
+            print("\n🚨 Alerts Generated:")
+            for alert in alerts:
+                print(f" - Account {alert['account_id']} | {alert['alert_id']} | {alert['reason']}")
+        else:
+            print("✅ No suspicious activity detected.")
 
     # ✅ Advanced analytics
-    print("\n📈 Running Advanced Analytics...")
+    say("\n📈 Running Advanced Analytics...")
     analytics = AdvancedAnalytics(transactions, accounts)
-    analytics.run()
+    findings = analytics.run()
 
     # ✅ Compliance reporting
-    print("\n📝 Generating Compliance Report...")
-    compliance = RegulatoryCompliance(alerts)
-    compliance.generate_report()
+    say("\n📝 Generating Compliance Report...")
+    compliance = RegulatoryCompliance(alerts, transactions)
+    report = compliance.generate_report()
+    if args.compliance_report:
+        written = compliance.write_report(args.compliance_report, report_type=args.report_type)
+        say(f"🧾 {written['written']} alerts written to {written['path']} ({written['skipped']} filtered out)")
+
+    if profile:
+        profile.stop()
+        profile.save()
+        say(f"\n🔬 Profiles written to {profile.path} (summary.txt, <rule>.prof, <rule>.txt)")
+
+    # ✅ Aggregate counts (all --summary-only prints)
+    print(f"\n📋 Summary: {len(transactions)} transactions, {len(accounts)} accounts")
+    print(f"🚨 {report['alerts_count']} alerts on {report['accounts_count']} accounts")
+    for reason, count in report["by_reason"].items():
+        print(f"   {reason:<40} {count:>8}")
+    print("📈 Analytics findings:")
+    for check, results in findings.items():
+        print(f"   {check:<40} {len(results):>8}")
+
+    # ✅ Where the time went: per-rule calls, seconds, rows, alerts, peak memory growth
+    say("\n📊 Metrics summary (JSON):")
+    say(metrics.summary_json(indent=2))
+    log.shutdown()
 
 if __name__ == "__main__":
     main()
@@ -15,8 +15,12 @@ os.environ['FLASK_ENV'] = 'production'
 
 try:
     from waitress import serve
+    from src import log
     from app import app
     
+    # Waitress threads only enqueue log records; one thread writes reports/system.log
+    log.configure()
+    
     print("🚀 Starting Production Server...")
     print("🏛️  Money Laundering Detection System")
     print("🔒 Production Mode - Secure & Scalable")
@@ -36,7 +40,9 @@ try:
     # Start production server
     serve(app, host=host, port=port, threads=threads)
     
-except ImportError:
+except ImportError as e:
+    if e.name != "waitress":
+        raise
     print("❌ Waitress not installed. Installing...")
     os.system("pip install waitress")
     print("✅ Please run this script again.")
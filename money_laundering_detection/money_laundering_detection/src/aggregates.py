@@ -0,0 +1,154 @@
+# src/aggregates.py
+import pandas as pd
+
+from src.schema import read_transactions
+
+DAILY_COLUMNS = ["total_amount", "txn_count", "cash_count", "first_txn", "last_txn"]
+FOLD = {
+    "total_amount": "sum",
+    "txn_count": "sum",
+    "cash_count": "sum",
+    "first_txn": "min",
+    "last_txn": "max",
+}
+# Approximate bytes per running-state entry (key tuple, 5-item list and its numbers)
+STATE_ENTRY_BYTES = 350
+
+
+class TransactionAggregator:
+    """
+    Running per-(account, day) and per-account aggregates, folded one chunk
+    at a time. Memory is bounded by the number of account-days, not by the
+    number of transactions read.
+
+    State lives in dicts keyed by (account_id, day) and account_id, so
+    folding a chunk costs O(chunk) no matter how much history is held.
+    """
+
+    def __init__(self, large_txn_threshold=None):
+        """
+        :param large_txn_threshold: Transactions above this amount are kept
+            (account_id + amount only) so the large-transaction rule can
+            still run after the raw rows are gone. None keeps nothing.
+        """
+        self.large_txn_threshold = large_txn_threshold
+        self._daily = {}
+        self._accounts = {}
+        self._large = []
+        self.rows = 0
+        self.chunks = 0
+
+    @classmethod
+    def from_csv(cls, filepath, chunksize=100000, large_txn_threshold=None, **read_csv_kwargs):
+        """
+        Stream a transactions file through a new aggregator, in compact chunks
+        (CSV or Parquet/Arrow, see schema.read_transactions for the options).
+        """
+        aggregator = cls(large_txn_threshold=large_txn_threshold)
+        for chunk in read_transactions(filepath, chunksize=chunksize, **read_csv_kwargs):
+            aggregator.update(chunk)
+        return aggregator
+
+    # ---------------------- Folding ---------------------- #
+
+    def update(self, chunk):
+        """
+        Fold one chunk of transactions into the running aggregates.
+        Returns the (account_id, day) keys it touched, days as datetime64[ns] ints.
+        """
+        if "timestamp" not in chunk.columns:
+            raise KeyError("No timestamp column found in transactions DataFrame.")
+
+        timestamps = pd.to_datetime(chunk["timestamp"]).astype("datetime64[ns]")
+        if "cash_transaction" in chunk.columns:
+            cash = chunk["cash_transaction"].fillna(False).astype(bool).astype("int64")
+        else:
+            cash = pd.Series(0, index=chunk.index, dtype="int64")
+
+        frame = pd.DataFrame({
+            "account_id": chunk["account_id"],
+            "date": timestamps.dt.normalize().astype("int64"),
+            "total_amount": chunk["amount"].astype("float64"),
+            "txn_count": 1,
+            "cash_count": cash,
+            "first_txn": timestamps.astype("int64"),
+            "last_txn": timestamps.astype("int64"),
+        })[timestamps.notna()]
+
+        daily = frame.groupby(["account_id", "date"], observed=True).agg(FOLD)
+        per_account = daily.groupby(level="account_id", observed=True).agg(FOLD)
+        touched = daily.index.tolist()
+
+        self._fold(self._daily, touched, daily)
+        self._fold(self._accounts, per_account.index.tolist(), per_account)
+
+        if self.large_txn_threshold is not None:
+            large = chunk["amount"] > self.large_txn_threshold
+            self._large.append(chunk.loc[large, ["account_id", "amount"]])
+
+        self.rows += len(chunk)
+        self.chunks += 1
+        return touched
+
+    # ---------------------- Views ---------------------- #
+
+    def daily_frame(self, keys=None):
+        """
+        Per-(account, day) aggregates as a flat DataFrame sorted by account
+        and day; `keys` restricts it to the given (account_id, day) keys.
+        """
+        keys = list(self._daily) if keys is None else keys
+        frame = self._frame(keys, [self._daily[key] for key in keys], ["account_id", "date"])
+        frame["date"] = pd.to_datetime(frame["date"].astype("int64"))
+        return frame
+
+    def account_frame(self):
+        """Per-account aggregates as a flat DataFrame sorted by account."""
+        keys = list(self._accounts)
+        return self._frame([(key,) for key in keys], list(self._accounts.values()), ["account_id"])
+
+    def large_transactions(self, threshold):
+        """Retained transactions above `threshold`, in the order they were read."""
+        if self.large_txn_threshold is None or threshold < self.large_txn_threshold:
+            raise ValueError(
+                f"Large transactions were only retained above {self.large_txn_threshold}; "
+                f"re-stream the data to apply threshold {threshold}."
+            )
+        if not self._large:
+            return pd.DataFrame(columns=["account_id", "amount"])
+        if len(self._large) > 1:
+            self._large = [pd.concat(self._large, ignore_index=True)]
+        large = self._large[0]
+        return large[large["amount"] > threshold]
+
+    def nbytes(self):
+        """Approximate memory held: running state plus retained large transactions"""
+        return (len(self._daily) + len(self._accounts)) * STATE_ENTRY_BYTES + sum(
+            int(frame.memory_usage(index=True, deep=True).sum()) for frame in self._large
+        )
+
+    # ---------------------- Helpers ---------------------- #
+
+    @staticmethod
+    def _fold(state, keys, partial):
+        columns = [partial[column].tolist() for column in DAILY_COLUMNS]
+        for key, total, count, cash, first, last in zip(keys, *columns):
+            row = state.get(key)
+            if row is None:
+                state[key] = [total, count, cash, first, last]
+            else:
+                row[0] += total
+                row[1] += count
+                row[2] += cash
+                row[3] = min(row[3], first)
+                row[4] = max(row[4], last)
+
+    @staticmethod
+    def _frame(keys, rows, key_columns):
+        frame = pd.DataFrame(
+            [tuple(key) + tuple(row) for key, row in zip(keys, rows)],
+            columns=key_columns + DAILY_COLUMNS
+        )
+        for column in ("first_txn", "last_txn"):
+            frame[column] = pd.to_datetime(frame[column].astype("int64"))
+        return frame.sort_values(key_columns, ignore_index=True)
@@ -0,0 +1,171 @@
+# src/alert_index.py
+"""
+Columnar index over an alert list for filtered, sorted, cursor-paginated
+reads (the web app's /api/get-alerts).
+
+Alerts are the dicts raised by MoneyLaunderingDetector and PatternDetector;
+fields are optional:
+    account_id   equality filter (posting lists)
+    alert_type   equality filter, falling back to `reason`
+    risk_score   range filter (sorted array + binary search)
+    date         range filter on the first of DATE_FIELDS present
+Alerts without a risk score or date never match a range on that field.
+
+Pages use keyset cursors: a cursor holds the last returned alert's rank in
+the sort order, so every page costs the same however deep it is, and a
+cursor taken from another version of the alert list is rejected.
+"""
+import base64
+import json
+
+import numpy as np
+import pandas as pd
+
+DATE_FIELDS = ("date", "window_start", "first_txn", "detected_at")
+SORT_FIELDS = ("position", "risk_score", "date", "account_id", "alert_type")
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+class InvalidCursor(ValueError):
+    """Malformed cursor, or one issued for another sort or alert list version"""
+
+
+class AlertIndex:
+    def __init__(self, alerts, version=None):
+        """
+        :param alerts: List of alert dicts (kept by reference, not copied)
+        :param version: Token identifying this alert list; cursors and ETags embed it
+        """
+        self.alerts = alerts
+        self.version = str(version) if version is not None else str(id(alerts))
+        count = len(alerts)
+
+        account = pd.Categorical([str(alert.get("account_id")) for alert in alerts])
+        alert_type = pd.Categorical([str(alert.get("alert_type", alert.get("reason"))) for alert in alerts])
+        self._account_postings = _postings(account)
+        self._type_postings = _postings(alert_type)
+
+        self._columns = {
+            "risk_score": pd.to_numeric(
+                pd.Series([alert.get("risk_score") for alert in alerts], dtype=object), errors="coerce"
+            ).to_numpy(dtype=np.float64),
+            "date": _dates(alerts),
+        }
+        # Positions sorted by value (missing values excluded) for range lookups
+        self._sorted = {}
+        for name, values in self._columns.items():
+            present = np.flatnonzero(~np.isnan(values)) if name == "risk_score" else np.flatnonzero(values != _NAT)
+            order = present[np.argsort(values[present], kind="stable")]
+            self._sorted[name] = (order, values[order])
+
+        # rank[position] = place of the alert in each sort order (ties by position)
+        self._ranks = {"position": np.arange(count)}
+        keys = {
+            "risk_score": np.nan_to_num(self._columns["risk_score"], nan=-np.inf),
+            "date": self._columns["date"],
+            "account_id": account.codes,
+            "alert_type": alert_type.codes,
+        }
+        for name, key in keys.items():
+            order = np.lexsort((np.arange(count), key))
+            rank = np.empty(count, dtype=np.int64)
+            rank[order] = np.arange(count)
+            self._ranks[name] = rank
+
+    def __len__(self):
+        return len(self.alerts)
+
+    def matches(self, account_id=None, alert_type=None, min_risk=None, max_risk=None, start=None, end=None):
+        """Sorted positions of alerts passing every given filter"""
+        candidates = None
+        for postings, value in ((self._account_postings, account_id), (self._type_postings, alert_type)):
+            if value is not None:
+                candidates = _intersect(candidates, postings.get(str(value), np.empty(0, dtype=np.int64)))
+        if min_risk is not None or max_risk is not None:
+            candidates = _intersect(candidates, self._range("risk_score", min_risk, max_risk, closed=True))
+        if start is not None or end is not None:
+            bounds = [None if b is None else pd.Timestamp(b).as_unit("ns").value for b in (start, end)]
+            candidates = _intersect(candidates, self._range("date", *bounds, closed=False))
+        return np.arange(len(self.alerts)) if candidates is None else candidates
+
+    def page(self, sort="position", descending=False, cursor=None, limit=DEFAULT_PAGE_SIZE, **filters):
+        """
+        One page of matching alerts.
+
+        :param sort: One of SORT_FIELDS
+        :param cursor: next_cursor of the previous page
+        :param filters: See matches()
+        :return: (alerts, next_cursor or None, total matches)
+        :raises InvalidCursor:
+        """
+        if sort not in SORT_FIELDS:
+            raise ValueError(f"sort must be one of {', '.join(SORT_FIELDS)}")
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        candidates = self.matches(**filters)
+        total = len(candidates)
+        rank = self._ranks[sort][candidates]
+
+        if cursor is not None:
+            after = self._decode(cursor, sort, descending)
+            keep = rank < after if descending else rank > after
+            candidates, rank = candidates[keep], rank[keep]
+        remaining = len(candidates)
+
+        # Only the page itself is ordered: partition, then sort `limit` ranks
+        if remaining > limit:
+            cut = np.argpartition(-rank if descending else rank, limit - 1)[:limit]
+            candidates, rank = candidates[cut], rank[cut]
+        order = np.argsort(-rank if descending else rank, kind="stable")
+        positions, rank = candidates[order], rank[order]
+
+        next_cursor = self._encode(int(rank[-1]), sort, descending) if remaining > limit else None
+        return [self.alerts[i] for i in positions], next_cursor, total
+
+    def _range(self, name, low, high, closed):
+        order, values = self._sorted[name]
+        left = 0 if low is None else np.searchsorted(values, low, side="left")
+        right = len(values) if high is None else np.searchsorted(values, high, side="right" if closed else "left")
+        return np.sort(order[left:right])
+
+    def _encode(self, rank, sort, descending):
+        token = json.dumps([self.version, sort, int(descending), rank], separators=(",", ":"))
+        return base64.urlsafe_b64encode(token.encode()).decode().rstrip("=")
+
+    def _decode(self, cursor, sort, descending):
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            version, cursor_sort, cursor_descending, rank = json.loads(base64.urlsafe_b64decode(padded))
+        except (ValueError, TypeError):
+            raise InvalidCursor("Malformed cursor")
+        if version != self.version:
+            raise InvalidCursor("Cursor belongs to an older alert list; start again without a cursor")
+        if cursor_sort != sort or bool(cursor_descending) != bool(descending):
+            raise InvalidCursor("Cursor was issued for another sort order")
+        return int(rank)
+
+
+_NAT = np.iinfo(np.int64).min
+
+
+def _postings(categorical):
+    """value -> sorted positions"""
+    codes = categorical.codes
+    order = np.argsort(codes, kind="stable")
+    bounds = np.searchsorted(codes[order], np.arange(len(categorical.categories) + 1))
+    return {str(value): order[bounds[i]:bounds[i + 1]] for i, value in enumerate(categorical.categories)}
+
+
+def _intersect(candidates, positions):
+    return positions if candidates is None else np.intersect1d(candidates, positions, assume_unique=True)
+
+
+def _dates(alerts):
+    values = []
+    for alert in alerts:
+        value = next((alert[field] for field in DATE_FIELDS if alert.get(field) is not None), None)
+        values.append(value)
+    dates = pd.to_datetime(pd.Series(values, dtype=object), errors="coerce", format="mixed")
+    if getattr(dates.dt, "tz", None) is not None:
+        dates = dates.dt.tz_localize(None)
+    return dates.astype("datetime64[ns]").to_numpy().view(np.int64)
@@ -1,4 +1,16 @@
+import logging
 import pandas as pd
+from src.log import get_logger
+from src.metrics import instrumented
+
+log = get_logger("analytics")
+
+# Checks run by AdvancedAnalytics.run(), in report order
+ANALYTICS_CHECKS = [
+    'detect_high_risk_accounts',
+    'detect_frequent_transactions',
+    'detect_cross_border_transactions',
+]
 
 class AdvancedAnalytics:
     def __init__(self, transactions: pd.DataFrame, accounts: pd.DataFrame):
@@ -11,51 +23,62 @@ class AdvancedAnalytics:
         self.transactions = transactions
         self.accounts = accounts
 
+    @instrumented("analytics")
     def run(self):
         """
         Run all advanced analytics checks.
-        """
-        print("\n📈 Running Advanced Analytics...")
 
-        self.detect_high_risk_accounts()
-        self.detect_frequent_transactions()
-        self.detect_cross_border_transactions()
+        :return: {check name: list of findings}
+        """
+        log.info("Running advanced analytics")
+        results = {check: getattr(self, check)() for check in ANALYTICS_CHECKS}
+        log.info("Analytics findings: %s", {check: len(findings) for check, findings in results.items()})
+        return results
 
+    @instrumented("analytics")
     def detect_high_risk_accounts(self):
         """
         Detect accounts with very large transactions.
+
+        :return: [{"account_id"}], in order of first large transaction
         """
         high_risk_accounts = self.transactions[self.transactions["amount"] > 100000]["account_id"].unique()
-        if len(high_risk_accounts) > 0:
-            for acc in high_risk_accounts:
-                print(f"⚠️ High-Risk Account Detected: {acc}")
-        else:
-            print("✅ No high-risk accounts detected.")
+        findings = [{"account_id": acc} for acc in high_risk_accounts]
+        _log_findings("High-risk account", findings)
+        return findings
 
+    @instrumented("analytics")
     def detect_frequent_transactions(self):
         """
         Detect accounts with unusually frequent transactions.
+
+        :return: [{"account_id", "transaction_count"}], most active first
         """
         txn_counts = self.transactions["account_id"].value_counts()
-        frequent_accounts = txn_counts[txn_counts > 5].index.tolist()
-
-        if frequent_accounts:
-            for acc in frequent_accounts:
-                print(f"⚠️ Frequent Transactions Detected: {acc} ({txn_counts[acc]} transactions)")
-        else:
-            print("✅ No accounts with unusually frequent transactions.")
+        frequent = txn_counts[txn_counts > 5]
+        findings = [{"account_id": acc, "transaction_count": int(count)} for acc, count in frequent.items()]
+        _log_findings("Frequent transactions", findings)
+        return findings
 
+    @instrumented("analytics")
     def detect_cross_border_transactions(self):
         """
         Detect transactions marked as 'cross_border' (if such column exists).
+
+        :return: [{"account_id", "amount"}] per cross-border transaction
         """
-        if "type" in self.transactions.columns:
-            cross_border_txns = self.transactions[self.transactions["type"] == "cross_border"]
+        if "type" not in self.transactions.columns:
+            log.info("No transaction type information available")
+            return []
+        cross_border_txns = self.transactions.loc[self.transactions["type"] == "cross_border", ["account_id", "amount"]]
+        findings = cross_border_txns.to_dict("records")
+        _log_findings("Cross-border transaction", findings)
+        return findings
+
 
-            if not cross_border_txns.empty:
-                for _, row in cross_border_txns.iterrows():
-                    print(f"🌍 Cross-Border Transaction: Account {row['account_id']} | Amount {row['amount']}")
-            else:
-                print("✅ No cross-border transactions detected.")
-        else:
-            print("ℹ️ No transaction type information available.")
+def _log_findings(check, findings):
+    """One summary line; the individual findings only at DEBUG"""
+    log.info("%s: %d found", check, len(findings))
+    if log.isEnabledFor(logging.DEBUG):
+        for finding in findings:
+            log.debug("%s: %s", check, finding)
@@ -0,0 +1,165 @@
+# src/cache.py
+"""
+Memoized detection results.
+
+A result is keyed by the dataset's content fingerprint, the rule name and
+only the thresholds that rule reads (see RULE_THRESHOLDS in
+src/detector.py). Changing structuring_threshold therefore misses the
+cache for the structuring rule alone; every other rule is served from the
+cache.
+
+Entries live in an in-memory LRU of `max_entries` results. With a
+`directory`, they are also written there (one pickle per entry, under a
+folder per rule), so they survive restarts and can be shared between
+worker processes.
+
+Keys also carry CACHE_VERSION: bump it whenever a rule's output changes
+(new alert fields, a fixed rule), so results cached on disk by an older
+release are recomputed instead of served.
+"""
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+DEFAULT_MAX_ENTRIES = 256
+# Bump when cached rule output changes shape or meaning
+CACHE_VERSION = 2
+MISSING = object()
+
+
+def fingerprint(*frames):
+    """Content hash of one or more DataFrames (column names, dtypes and values; not the index)"""
+    digest = hashlib.blake2b(digest_size=16)
+    for frame in frames:
+        if frame is None:
+            digest.update(b"\0none")
+            continue
+        digest.update(repr([(str(name), str(dtype)) for name, dtype in frame.dtypes.items()]).encode())
+        digest.update(pd.util.hash_pandas_object(frame, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+class ResultCache:
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, directory=None):
+        """
+        :param max_entries: Results kept in memory before the least recently used are dropped
+        :param directory: Optional disk tier (None keeps the cache in memory only)
+        """
+        self.max_entries = max_entries
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()   # (rule, dataset fingerprint, params key) -> result
+        self._lock = threading.Lock()
+
+    def get(self, dataset_fingerprint, rule, params=None):
+        """The cached result, or MISSING"""
+        key = (rule, dataset_fingerprint, _params_key(params))
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+        value = self._read(key)
+        with self._lock:
+            if value is MISSING:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._remember(key, value)
+        return value
+
+    def put(self, dataset_fingerprint, rule, params, value):
+        key = (rule, dataset_fingerprint, _params_key(params))
+        with self._lock:
+            self._remember(key, value)
+        self._write(key, value)
+
+    def get_or_compute(self, dataset_fingerprint, rule, params, compute):
+        """
+        Cached result of `compute()` for this dataset, rule and thresholds.
+
+        :return: (result, hit)
+        """
+        value = self.get(dataset_fingerprint, rule, params)
+        if value is not MISSING:
+            return value, True
+        value = compute()
+        self.put(dataset_fingerprint, rule, params, value)
+        return value, False
+
+    def invalidate(self, rule=None, dataset_fingerprint=None):
+        """Drop the entries of one rule and/or one dataset (everything without arguments); returns entries dropped"""
+        matches = lambda key: (rule is None or key[0] == rule) and \
+            (dataset_fingerprint is None or key[1] == dataset_fingerprint)
+        with self._lock:
+            dropped = [key for key in self._entries if matches(key)]
+            for key in dropped:
+                del self._entries[key]
+        on_disk = 0
+        if self.directory and os.path.isdir(self.directory):
+            for rule_dir in os.listdir(self.directory):
+                if rule is not None and rule_dir != _safe(rule):
+                    continue
+                path = os.path.join(self.directory, rule_dir)
+                for name in os.listdir(path):
+                    if dataset_fingerprint is None or name.startswith(dataset_fingerprint + "-"):
+                        os.remove(os.path.join(path, name))
+                        on_disk += 1
+                if not os.listdir(path):
+                    shutil.rmtree(path, ignore_errors=True)
+        return max(len(dropped), on_disk)
+
+    def stats(self):
+        with self._lock:
+            rules = {}
+            for rule, _, _ in self._entries:
+                rules[rule] = rules.get(rule, 0) + 1
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries),
+                    "max_entries": self.max_entries, "rules": rules, "directory": self.directory}
+
+    def _remember(self, key, value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _path(self, key):
+        rule, dataset_fingerprint, params = key
+        params_hash = hashlib.blake2b(params.encode(), digest_size=8).hexdigest()
+        return os.path.join(self.directory, _safe(rule), f"{dataset_fingerprint}-{params_hash}.pkl")
+
+    def _read(self, key):
+        if not self.directory:
+            return MISSING
+        try:
+            with open(self._path(key), "rb") as f:
+                stored_params, value = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return MISSING
+        # Guards against a params hash collision
+        return value if stored_params == key[2] else MISSING
+
+    def _write(self, key, value):
+        if not self.directory:
+            return
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump((key[2], value), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+
+def _params_key(params):
+    return json.dumps({"version": CACHE_VERSION, "params": params or {}}, sort_keys=True, default=str)
+
+
+def _safe(rule):
+    return "".join(c if c.isalnum() or c in "-_" else "_" for c in rule)
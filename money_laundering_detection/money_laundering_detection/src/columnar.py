@@ -0,0 +1,213 @@
+# src/columnar.py
+"""
+Parquet and Arrow IPC/Feather input (needs pyarrow).
+
+Files are read through pyarrow.dataset, so a single file and a directory of
+files partitioned by day (hive layout: <root>/date=2025-08-09/part-0.parquet)
+are handled the same way. Only the requested columns are read, and a
+[start, end) timestamp range is pushed down: date partitions outside it are
+never opened and Parquet row groups whose timestamp statistics fall outside
+it are skipped. Arrow files are memory-mapped, so processes reading the same
+file share its pages.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from src.schema import TRANSACTION_SCHEMA, compact, filter_dates
+
+PARQUET_SUFFIXES = (".parquet", ".pq")
+ARROW_SUFFIXES = (".arrow", ".feather", ".ipc")
+PARTITION_COLUMN = "date"
+DEFAULT_ROW_GROUP_SIZE = 1000000
+# Stored as plain strings in Parquet (dictionary-encoded by the format) and
+# read back as pandas categoricals
+DICTIONARY_COLUMNS = [name for name, kind in TRANSACTION_SCHEMA.items() if kind == "category"]
+
+
+def is_columnar(path):
+    """True for Parquet/Arrow files and for directories of them"""
+    path = os.fspath(path) if isinstance(path, (str, os.PathLike)) else None
+    if path is None:
+        return False
+    if os.path.isdir(path):
+        return True
+    return path.lower().endswith(PARQUET_SUFFIXES + ARROW_SUFFIXES)
+
+
+def read_columnar(path, columns=None, start=None, end=None, memory_map=True, schema=TRANSACTION_SCHEMA):
+    """
+    Read a Parquet/Arrow file or partitioned directory into the compact layout.
+
+    :param columns: Columns to read (missing ones are ignored); None reads all
+    :param start: Keep timestamps >= start
+    :param end: Keep timestamps < end
+    :param memory_map: Memory-map the files instead of reading them into buffers
+    """
+    dataset = _dataset(path, memory_map)
+    table = dataset.to_table(columns=_projection(dataset, columns), filter=_filter(dataset, start, end))
+    return _to_frame(table, start, end, schema)
+
+
+def iter_columnar(path, batch_size=100000, columns=None, start=None, end=None, memory_map=True,
+                  schema=TRANSACTION_SCHEMA):
+    """read_columnar() as an iterator of DataFrames of up to `batch_size` rows"""
+    dataset = _dataset(path, memory_map)
+    batches = dataset.to_batches(
+        columns=_projection(dataset, columns), filter=_filter(dataset, start, end), batch_size=batch_size
+    )
+    import pyarrow as pa
+
+    for batch in batches:
+        if batch.num_rows:
+            yield _to_frame(pa.Table.from_batches([batch]), start, end, schema)
+
+
+def convert_csv(csv_path, output, chunksize=500000, partition_by_date=False,
+                row_group_size=DEFAULT_ROW_GROUP_SIZE, compression="snappy"):
+    """
+    One-shot CSV → Parquet conversion, streamed in chunks.
+
+    Writes one Parquet file, or with `partition_by_date` a directory with one
+    date=YYYY-MM-DD sub-directory per transaction day. Timestamps are stored
+    parsed, so later runs skip text parsing entirely. Column types come from
+    TRANSACTION_SCHEMA (unknown columns are strings), not from the values of
+    the first chunk, so a column that is empty at the start of the file does
+    not fail the conversion later on.
+
+    :return: Number of rows written
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer, schema, rows = None, None, 0
+    try:
+        for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+            table = _to_table(chunk)
+            if schema is None:
+                schema = _writer_schema(chunk)
+            table = table.select(schema.names).cast(schema)
+            rows += table.num_rows
+
+            if partition_by_date:
+                days = pd.to_datetime(chunk["timestamp"]).dt.strftime("%Y-%m-%d").to_numpy()
+                table = table.append_column(PARTITION_COLUMN, pa.array(days, type=pa.string()))
+                pq.write_to_dataset(
+                    table, output, partition_cols=[PARTITION_COLUMN], compression=compression,
+                    row_group_size=row_group_size, basename_template=f"part-{rows}-{{i}}.parquet"
+                )
+            else:
+                if writer is None:
+                    writer = pq.ParquetWriter(output, schema, compression=compression)
+                writer.write_table(table, row_group_size=row_group_size)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+# ---------------------- Internals ---------------------- #
+
+def _dataset(path, memory_map):
+    import pyarrow.dataset as ds
+    import pyarrow.fs as fs
+    import pyarrow as pa
+
+    path = os.fspath(path)
+    filesystem = fs.LocalFileSystem(use_mmap=memory_map)
+    if _is_arrow(path):
+        file_format = ds.IpcFileFormat()
+    else:
+        file_format = ds.ParquetFileFormat(read_options={"dictionary_columns": DICTIONARY_COLUMNS})
+
+    partitioning = None
+    if os.path.isdir(path):
+        partitioning = ds.partitioning(pa.schema([(PARTITION_COLUMN, pa.string())]), flavor="hive")
+    return ds.dataset(path, format=file_format, filesystem=filesystem, partitioning=partitioning)
+
+
+def _is_arrow(path):
+    if os.path.isdir(path):
+        for _, _, files in os.walk(path):
+            for name in files:
+                if name.lower().endswith(ARROW_SUFFIXES):
+                    return True
+                if name.lower().endswith(PARQUET_SUFFIXES):
+                    return False
+        return False
+    return path.lower().endswith(ARROW_SUFFIXES)
+
+
+def _projection(dataset, columns):
+    if columns is None:
+        return [name for name in dataset.schema.names if name != PARTITION_COLUMN] or None
+    return [name for name in columns if name in dataset.schema.names]
+
+
+def _filter(dataset, start, end):
+    """Pushdown filter, or None when the timestamp column cannot be compared in Arrow"""
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    if start is None and end is None:
+        return None
+    names = dataset.schema.names
+    if "timestamp" not in names or not pa.types.is_timestamp(dataset.schema.field("timestamp").type):
+        return None
+
+    expression = None
+    unit = dataset.schema.field("timestamp").type
+    for bound, keep in ((start, "start"), (end, "end")):
+        if bound is None:
+            continue
+        moment = pd.Timestamp(bound)
+        value = pa.scalar(moment.as_unit("ns").value, type=pa.timestamp("ns")).cast(unit)
+        term = ds.field("timestamp") >= value if keep == "start" else ds.field("timestamp") < value
+        if PARTITION_COLUMN in names:
+            # Whole days outside the range: the partition directory is never opened
+            day = moment.strftime("%Y-%m-%d")
+            term &= ds.field(PARTITION_COLUMN) >= day if keep == "start" else ds.field(PARTITION_COLUMN) <= day
+        expression = term if expression is None else expression & term
+    return expression
+
+
+def _to_frame(table, start, end, schema):
+    frame = compact(table.to_pandas(split_blocks=True), schema)
+    # Exact bounds, and the only filter for files whose timestamps are stored as text
+    if "timestamp" in frame.columns:
+        frame = filter_dates(frame, start, end)
+    return frame
+
+
+def _writer_schema(chunk):
+    """Arrow schema for the CSV's columns: by schema kind, strings for unknown columns"""
+    import pyarrow as pa
+
+    types = {"timestamp": pa.timestamp("ns"), "amount": pa.float64(), "flag": pa.bool_(), "category": pa.string()}
+    fields = []
+    for name in chunk.columns:
+        kind = TRANSACTION_SCHEMA.get(name)
+        if kind == "id":
+            # Numeric ids stay numeric (compact() downcasts them); anything else is text
+            fields.append(pa.field(name, pa.int64() if pd.api.types.is_integer_dtype(chunk[name].dtype)
+                                   else pa.string()))
+        else:
+            fields.append(pa.field(name, types.get(kind, pa.string())))
+    return pa.schema(fields)
+
+
+def _to_table(chunk):
+    import pyarrow as pa
+
+    chunk = chunk.copy()
+    for name, kind in TRANSACTION_SCHEMA.items():
+        if name not in chunk.columns:
+            continue
+        if kind == "timestamp":
+            chunk[name] = pd.to_datetime(chunk[name]).astype("datetime64[ns]")
+        elif kind == "amount":
+            chunk[name] = pd.to_numeric(chunk[name]).astype(np.float64)
+        elif kind == "flag":
+            chunk[name] = chunk[name].where(chunk[name].notna(), False).astype(bool)
+    return pa.Table.from_pandas(chunk, preserve_index=False)
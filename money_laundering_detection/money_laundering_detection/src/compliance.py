@@ -1,21 +1,305 @@
 # src/compliance.py
+"""
+Compliance summaries and regulatory report files.
+
+Reports are streamed to CSV, JSONL or XLSX in chunks of `chunk_size` rows,
+filtered on the fly with REGULATORY_THRESHOLDS from config/settings.py:
+    str    Suspicious Transaction Report, write_report(): alerts with
+           risk_score >= str_risk_threshold (alerts without a score are kept)
+    ctr    Cash Transaction Report, write_ctr_report(): cash transactions
+           (cash_transaction) with amount >= ctr_threshold
+    None   write_report() of every alert
+Alerts can be any iterable (a list, TransactionStore.iter_alerts(), a
+generator) and transactions a DataFrame or an iterable of DataFrame chunks
+(TransactionStore.iter_transactions()), so memory stays at one chunk
+however long the report is. CSV and JSONL can be gzip/bz2/xz-compressed
+while they are written; XLSX uses xlsxwriter's constant_memory mode (rows
+are flushed as they are written) and continues on a new sheet every
+XLSX_MAX_ROWS rows.
+"""
+import bz2
+import csv
+import functools
+import gzip
+import importlib.util
+import json
+import logging
+import lzma
+import math
+import os
+from collections import Counter
+from datetime import date, datetime
+
+import numpy as np
+
+from src.log import get_logger
+
+log = get_logger("compliance")
+
+SETTINGS_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config", "settings.py")
+REPORT_TYPES = ("str", "ctr")
+REPORT_FORMATS = ("csv", "jsonl", "xlsx")
+COMPRESSIONS = {
+    "gzip": (".gz", lambda path: gzip.open(path, "wt", compresslevel=6, encoding="utf-8", newline="")),
+    "bz2": (".bz2", lambda path: bz2.open(path, "wt", encoding="utf-8", newline="")),
+    "xz": (".xz", lambda path: lzma.open(path, "wt", encoding="utf-8", newline="")),
+}
+# CSV/XLSX columns; JSONL keeps every field
+REPORT_COLUMNS = ["alert_id", "account_id", "alert_type", "reason", "risk_score", "amount", "date",
+                  "description", "detected_at"]
+CTR_COLUMNS = ["transaction_id", "account_id", "counter_party", "amount", "transaction_type", "timestamp"]
+DEFAULT_CHUNK_SIZE = 10000
+XLSX_MAX_ROWS = 1048576   # per sheet, header included
 
 class RegulatoryCompliance:
-    def __init__(self, alerts):
+    def __init__(self, alerts, transactions=None):
         """
         Initialize the compliance module with the detected alerts.
 
         :param alerts: List of alert dictionaries generated by MoneyLaunderingDetector
+        :param transactions: Transactions (DataFrame or chunks) for cash transaction reports
         """
         self.alerts = alerts
+        self.transactions = transactions
 
     def generate_report(self):
         """
         Generate a compliance report based on detected alerts.
+
+        :return: {"alerts_count", "accounts_count", "by_reason": {reason: alerts}}
         """
-        print("\n📝 Compliance Report")
-        if self.alerts:
+        by_reason = Counter(_reason(alert) for alert in self.alerts)
+        report = {
+            "alerts_count": len(self.alerts),
+            "accounts_count": len({alert["account_id"] for alert in self.alerts}),
+            "by_reason": dict(by_reason.most_common()),
+        }
+        log.info("Compliance report: %d alerts on %d accounts", report["alerts_count"], report["accounts_count"])
+        if log.isEnabledFor(logging.DEBUG):
             for alert in self.alerts:
-                print(f" - Account {alert['account_id']} | {alert['alert_id']} | {alert['reason']}")
-        else:
-            print("✅ No compliance issues found.")
+                log.debug("Account %s | %s | %s", alert["account_id"], alert.get("alert_id"), _reason(alert))
+        return report
+
+    def write_report(self, path, report_type=None, **options):
+        """Write a report file: CTR from the transactions, otherwise from the alerts"""
+        if report_type == "ctr":
+            if self.transactions is None:
+                raise ValueError("CTR reports are built from transactions; none were given")
+            return write_ctr_report(self.transactions, path, **options)
+        return write_report(self.alerts, path, report_type=report_type, **options)
+
+
+def regulatory_thresholds(overrides=None):
+    """REGULATORY_THRESHOLDS from config/settings.py, updated with `overrides`"""
+    return {**_settings_thresholds(), **(overrides or {})}
+
+
+def write_report(alerts, path, report_type=None, fmt=None, compression=None, thresholds=None,
+                 columns=REPORT_COLUMNS, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Stream alerts into a report file.
+
+    :param alerts: Iterable of alert dicts (consumed once)
+    :param report_type: "str" or None (no filtering); CTRs come from write_ctr_report()
+    :param fmt: "csv", "jsonl" or "xlsx" (default: from the file extension)
+    :param compression: "gzip", "bz2" or "xz" for CSV/JSONL (default: from the file extension)
+    :param thresholds: Overrides for REGULATORY_THRESHOLDS
+    :param columns: CSV/XLSX columns ("amount" falls back to total_amount, "reason" to alert_type)
+    :param chunk_size: Alerts buffered between writes
+    :return: {"path", "report_type", "format", "compression", "written", "skipped"}
+    """
+    if report_type == "ctr":
+        raise ValueError("CTR reports are built from cash transactions; use write_ctr_report()")
+    if report_type not in (None, "str"):
+        raise ValueError(f"Unknown report type {report_type!r}; expected one of {', '.join(REPORT_TYPES)}")
+    threshold = regulatory_thresholds(thresholds)["str_risk_threshold"]
+    counts = {"skipped": 0}
+
+    def chunks():
+        chunk = []
+        for alert in alerts:
+            if report_type and _number(alert.get("risk_score"), threshold) < threshold:
+                counts["skipped"] += 1
+                continue
+            chunk.append(alert)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        yield chunk
+
+    return _write(chunks(), path, report_type, fmt, compression, columns, counts)
+
+
+def write_ctr_report(transactions, path, fmt=None, compression=None, thresholds=None,
+                     columns=CTR_COLUMNS, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Stream the cash transactions at or above ctr_threshold into a report file.
+    Without a cash_transaction column no transaction qualifies.
+
+    :param transactions: DataFrame, or iterable of DataFrame chunks (consumed once)
+    :return: {"path", "report_type", "format", "compression", "written", "skipped"}
+    """
+    threshold = regulatory_thresholds(thresholds)["ctr_threshold"]
+    frames = [transactions] if hasattr(transactions, "columns") else transactions
+    counts = {"skipped": 0}
+
+    def chunks():
+        for frame in frames:
+            if "cash_transaction" in frame.columns:
+                reported = frame[frame["cash_transaction"].fillna(False).astype(bool)
+                                 & (frame["amount"] >= threshold)]
+            else:
+                reported = frame.iloc[:0]
+            counts["skipped"] += len(frame) - len(reported)
+            for start in range(0, len(reported), chunk_size):
+                yield reported.iloc[start:start + chunk_size].to_dict("records")
+
+    return _write(chunks(), path, "ctr", fmt, compression, columns, counts)
+
+
+def _write(chunks, path, report_type, fmt, compression, columns, counts):
+    """Write chunks (lists of dicts) with the writer for fmt/compression"""
+    inferred_fmt, inferred_compression = _format_from_path(path)
+    fmt, compression = fmt or inferred_fmt, compression or inferred_compression
+    if fmt not in REPORT_FORMATS:
+        raise ValueError(f"Unknown report format {fmt!r}; expected one of {', '.join(REPORT_FORMATS)}")
+    if compression is not None and compression not in COMPRESSIONS:
+        raise ValueError(f"Unknown compression {compression!r}; expected one of {', '.join(COMPRESSIONS)}")
+    if fmt == "xlsx" and compression:
+        raise ValueError("XLSX files are already zip-compressed; compression applies to CSV and JSONL")
+
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    writer = _XlsxWriter(path, columns) if fmt == "xlsx" else _TextWriter(path, fmt, columns, compression)
+    written = 0
+    try:
+        for chunk in chunks:
+            writer.write(chunk)
+            written += len(chunk)
+    finally:
+        writer.close()
+    log.info("%s report: %d rows written to %s (%d filtered out)",
+             (report_type or "full").upper(), written, path, counts["skipped"])
+    return {"path": path, "report_type": report_type, "format": fmt, "compression": compression,
+            "written": written, "skipped": counts["skipped"]}
+
+
+class _TextWriter:
+    """CSV or JSONL, optionally through a compressing stream"""
+
+    def __init__(self, path, fmt, columns, compression):
+        opener = COMPRESSIONS[compression][1] if compression else \
+            lambda p: open(p, "w", encoding="utf-8", newline="")
+        self.handle = opener(path)
+        self.fmt = fmt
+        self.columns = columns
+        if fmt == "csv":
+            self.csv = csv.writer(self.handle)
+            self.csv.writerow(columns)
+
+    def write(self, alerts):
+        if self.fmt == "csv":
+            self.csv.writerows([_text(value) for value in _row(alert, self.columns)] for alert in alerts)
+        elif alerts:
+            self.handle.write("".join(json.dumps(alert, default=_json_default) + "\n" for alert in alerts))
+
+    def close(self):
+        self.handle.close()
+
+
+class _XlsxWriter:
+    """XLSX in constant_memory mode: each row is flushed once the next one starts"""
+
+    def __init__(self, path, columns):
+        import xlsxwriter   # only needed for XLSX reports
+        self.workbook = xlsxwriter.Workbook(path, {"constant_memory": True, "strings_to_numbers": False,
+                                                   "strings_to_formulas": False, "strings_to_urls": False})
+        self.header = self.workbook.add_format({"bold": True})
+        self.columns = columns
+        self.sheets = 0
+        self._new_sheet()
+
+    def write(self, alerts):
+        for alert in alerts:
+            if self.row >= XLSX_MAX_ROWS:
+                self._new_sheet()
+            self.sheet.write_row(self.row, 0, [_cell(value) for value in _row(alert, self.columns)])
+            self.row += 1
+
+    def close(self):
+        self.workbook.close()
+
+    def _new_sheet(self):
+        self.sheets += 1
+        self.sheet = self.workbook.add_worksheet(f"Alerts {self.sheets}" if self.sheets > 1 else "Alerts")
+        self.sheet.write_row(0, 0, self.columns, self.header)
+        self.row = 1
+
+
+@functools.lru_cache(maxsize=1)
+def _settings_thresholds():
+    # Loaded by path: the top-level config.py module shadows the config/ directory
+    spec = importlib.util.spec_from_file_location("aml_settings", SETTINGS_FILE)
+    settings = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(settings)
+    return dict(settings.REGULATORY_THRESHOLDS)
+
+
+def _format_from_path(path):
+    """("csv", "gzip") for report.csv.gz; (None, None) when the extension says nothing"""
+    stem, extension = os.path.splitext(path.lower())
+    compression = next((name for name, (suffix, _) in COMPRESSIONS.items() if suffix == extension), None)
+    if compression:
+        extension = os.path.splitext(stem)[1]
+    fmt = extension.lstrip(".")
+    return (fmt if fmt in REPORT_FORMATS else None), compression
+
+
+def _row(alert, columns):
+    aliases = {"amount": _amount, "reason": _reason}
+    return [aliases[column](alert) if column in aliases else alert.get(column) for column in columns]
+
+
+def _amount(alert):
+    amount = alert.get("amount")
+    return alert.get("total_amount") if amount is None else amount
+
+
+def _reason(alert):
+    """Detector alerts carry a reason, PatternDetector alerts an alert_type"""
+    return alert.get("reason") or alert.get("alert_type")
+
+
+def _number(value, missing):
+    """float(value), or `missing` for None/NaN/non-numeric values"""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return missing
+    return missing if math.isnan(number) else number
+
+
+def _text(value):
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return ""
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _cell(value):
+    """Values xlsxwriter writes as plain numbers/strings (no date formats, no NaN errors)"""
+    value = _text(value)
+    if isinstance(value, (bool, int, float, str)):
+        return value if value != "" else None
+    return str(value)
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
@@ -0,0 +1,350 @@
+# src/datastore.py
+"""
+Dataset registry for the web app: uploaded data keyed by dataset id.
+
+Each dataset (transactions, accounts, detection results, incremental
+detector state) has its own reader/writer lock, so analysts working on
+different datasets never block each other and a detection run never sees
+its data replaced halfway.
+
+Datasets are kept in memory up to `memory_budget` bytes. Beyond that, the
+least recently used ones are spilled to `spill_dir` (frames as Feather
+when pyarrow is available, pickle otherwise) and loaded back on next
+access. With `write_through`, every dataset is written to `spill_dir` as
+soon as it is stored, so processes sharing the directory (gunicorn
+workers) see each other's datasets and results. A `loader` supplies
+datasets that are in neither place (e.g. from src/store.py after a restart).
+"""
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import pandas as pd
+
+DEFAULT_MEMORY_BUDGET = 1024 * 2 ** 20
+DEFAULT_SPILL_DIR = os.path.join(tempfile.gettempdir(), "aml-datasets")
+FRAMES = ("transactions", "accounts")
+
+
+class DatasetNotFound(KeyError):
+    """No dataset with this id, in memory or on disk"""
+
+
+class RWLock:
+    """Many readers or one writer; waiting writers block new readers"""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+
+    @contextmanager
+    def read(self):
+        with self._cond:
+            while self._writer or self._waiting_writers:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
+
+    def acquire_write(self, blocking=True):
+        with self._cond:
+            if not blocking and (self._writer or self._readers):
+                return False
+            self._waiting_writers += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._waiting_writers -= 1
+            self._writer = True
+            return True
+
+    def release_write(self):
+        with self._cond:
+            self._writer = False
+            self._cond.notify_all()
+
+    @property
+    def busy(self):
+        with self._cond:
+            return bool(self._writer or self._readers or self._waiting_writers)
+
+
+class Dataset:
+    def __init__(self, dataset_id, transactions=None, accounts=None, name=None):
+        self.id = dataset_id
+        self.name = name
+        self.transactions = transactions
+        self.accounts = accounts
+        self.results = None
+        self.incremental = None
+        # src/alert_index.AlertIndex over results['alerts'], built on first read
+        self.alert_index = None
+        # src/cache.fingerprint() of the frames, computed on first use; reset when they are replaced
+        self.fingerprint = None
+        self.created_at = time.time()
+        self.last_access = self.created_at
+        self.lock = RWLock()
+        self.nbytes = 0
+        self.measure()
+
+    def measure(self):
+        self.nbytes = sum(
+            int(frame.memory_usage(index=True, deep=True).sum())
+            for frame in (self.transactions, self.accounts) if frame is not None
+        )
+        if self.incremental is not None:
+            # Stream datasets also hold append()'s running aggregates
+            self.nbytes += self.incremental.nbytes()
+        return self.nbytes
+
+    def info(self):
+        return {
+            "dataset_id": self.id,
+            "name": self.name,
+            "transactions_count": 0 if self.transactions is None else len(self.transactions),
+            "accounts_count": 0 if self.accounts is None else len(self.accounts),
+            "memory_bytes": self.nbytes,
+            "has_results": self.results is not None,
+            "created_at": self.created_at,
+            "last_access": self.last_access,
+        }
+
+
+class DatasetRegistry:
+    def __init__(self, memory_budget=DEFAULT_MEMORY_BUDGET, spill_dir=DEFAULT_SPILL_DIR, write_through=False,
+                 loader=None):
+        """
+        :param memory_budget: Bytes of frames kept in memory before LRU datasets are spilled
+        :param spill_dir: Directory for spilled (and write-through) datasets
+        :param write_through: Persist every dataset and result update immediately
+        :param loader: Callable(dataset_id) -> Dataset or None, for ids unknown in memory and on disk
+        """
+        self.memory_budget = memory_budget
+        self.spill_dir = spill_dir
+        self.write_through = write_through
+        self.loader = loader
+        self._datasets = OrderedDict()
+        self._loaded = {}       # dataset id -> on-disk results mtime when last loaded
+        self._lock = threading.RLock()
+
+    # ---------------------- Registry ---------------------- #
+
+    def create(self, transactions, accounts, name=None):
+        """Register a new dataset and return its id"""
+        dataset = Dataset(uuid.uuid4().hex, transactions, accounts, name)
+        if self.write_through:
+            self._spill(dataset)
+        with self._lock:
+            self._datasets[dataset.id] = dataset
+            self._evict(keep=dataset.id)
+        return dataset.id
+
+    def get(self, dataset_id):
+        """
+        The dataset (loaded from disk when spilled), marked most recently used.
+        Hold its lock (see read()/write()) while using its contents.
+
+        :raises DatasetNotFound:
+        """
+        with self._lock:
+            dataset = self._datasets.get(dataset_id)
+            if dataset is None:
+                dataset = self._load(dataset_id)
+                self._datasets[dataset_id] = dataset
+            else:
+                self._datasets.move_to_end(dataset_id)
+                self._refresh(dataset)
+            dataset.last_access = time.time()
+            self._evict(keep=dataset_id)
+            return dataset
+
+    @contextmanager
+    def read(self, dataset_id):
+        """Shared access to a dataset"""
+        dataset = self.get(dataset_id)
+        with dataset.lock.read():
+            yield dataset
+
+    @contextmanager
+    def write(self, dataset_id):
+        """
+        Exclusive access to a dataset; changes are measured (and persisted
+        with write_through) on exit.
+        """
+        dataset = self.get(dataset_id)
+        with dataset.lock.write():
+            with self._lock:
+                # Evicted between get() and the lock: this copy is the current one
+                self._datasets.setdefault(dataset_id, dataset)
+            frames = [getattr(dataset, name) for name in FRAMES]
+            yield dataset
+            dataset.measure()
+            replaced = any(getattr(dataset, name) is not frame for name, frame in zip(FRAMES, frames))
+            if replaced:
+                dataset.fingerprint = None
+            if self.write_through:
+                self._spill(dataset, frames=replaced)
+        with self._lock:
+            self._evict(keep=dataset_id)
+
+    def delete(self, dataset_id):
+        """Drop a dataset from memory and disk; False when it did not exist"""
+        with self._lock:
+            found = self._datasets.pop(dataset_id, None) is not None
+            self._loaded.pop(dataset_id, None)
+            path = self._path(dataset_id)
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+                found = True
+            return found
+
+    def datasets(self):
+        """info() of every known dataset, in memory or spilled"""
+        with self._lock:
+            known = {dataset_id: {**dataset.info(), "in_memory": True}
+                     for dataset_id, dataset in self._datasets.items()}
+        if os.path.isdir(self.spill_dir):
+            for dataset_id in os.listdir(self.spill_dir):
+                if dataset_id not in known and os.path.exists(os.path.join(self._path(dataset_id), "meta.pkl")):
+                    known[dataset_id] = {**self._read_meta(dataset_id), "in_memory": False}
+        return list(known.values())
+
+    def memory_used(self):
+        with self._lock:
+            return sum(dataset.nbytes for dataset in self._datasets.values())
+
+    def in_memory(self, dataset_id):
+        with self._lock:
+            return dataset_id in self._datasets
+
+    # ---------------------- Spilling ---------------------- #
+
+    def _evict(self, keep=None):
+        """Spill least recently used idle datasets until under the memory budget"""
+        used = sum(dataset.nbytes for dataset in self._datasets.values())
+        for dataset_id in list(self._datasets):
+            if used <= self.memory_budget:
+                break
+            dataset = self._datasets[dataset_id]
+            if dataset_id == keep or not dataset.lock.acquire_write(blocking=False):
+                continue
+            try:
+                if not self.write_through:
+                    self._spill(dataset)
+                del self._datasets[dataset_id]
+                used -= dataset.nbytes
+            finally:
+                dataset.lock.release_write()
+
+    def _spill(self, dataset, frames=True):
+        path = self._path(dataset.id)
+        os.makedirs(path, exist_ok=True)
+        for name in FRAMES if frames else ():
+            frame = getattr(dataset, name)
+            if frame is not None:
+                _write_frame(frame, os.path.join(path, name))
+        state = {"results": dataset.results, "incremental": dataset.incremental}
+        _atomic_pickle(state, os.path.join(path, "state.pkl"))
+        _atomic_pickle(dataset.info(), os.path.join(path, "meta.pkl"))
+        self._loaded[dataset.id] = _mtime(os.path.join(path, "state.pkl"))
+
+    def _load(self, dataset_id):
+        path = self._path(dataset_id)
+        if not os.path.exists(os.path.join(path, "meta.pkl")):
+            dataset = self.loader(dataset_id) if self.loader else None
+            if dataset is None:
+                raise DatasetNotFound(dataset_id)
+            if self.write_through:
+                self._spill(dataset)
+            return dataset
+        meta = self._read_meta(dataset_id)
+        frames = {name: _read_frame(os.path.join(path, name)) for name in FRAMES}
+        dataset = Dataset(dataset_id, frames["transactions"], frames["accounts"], meta.get("name"))
+        dataset.created_at = meta.get("created_at", dataset.created_at)
+        self._load_state(dataset)
+        return dataset
+
+    def _refresh(self, dataset):
+        """Pick up results another process wrote through since this copy was loaded"""
+        if not self.write_through:
+            return
+        if _mtime(os.path.join(self._path(dataset.id), "state.pkl")) <= self._loaded.get(dataset.id, 0):
+            return
+        # Never wait for a long-running reader here; a busy dataset refreshes on a later access
+        if dataset.lock.acquire_write(blocking=False):
+            try:
+                self._load_state(dataset)
+            finally:
+                dataset.lock.release_write()
+
+    def _load_state(self, dataset):
+        state_file = os.path.join(self._path(dataset.id), "state.pkl")
+        if os.path.exists(state_file):
+            with open(state_file, "rb") as f:
+                state = pickle.load(f)
+            dataset.results, dataset.incremental = state["results"], state["incremental"]
+            dataset.measure()
+        self._loaded[dataset.id] = _mtime(state_file)
+
+    def _read_meta(self, dataset_id):
+        with open(os.path.join(self._path(dataset_id), "meta.pkl"), "rb") as f:
+            return pickle.load(f)
+
+    def _path(self, dataset_id):
+        if not dataset_id or os.sep in dataset_id or (os.altsep and os.altsep in dataset_id) \
+                or dataset_id in (os.curdir, os.pardir):
+            raise DatasetNotFound(dataset_id)
+        return os.path.join(self.spill_dir, dataset_id)
+
+
+def _write_frame(frame, stem):
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        _atomic_pickle(frame, stem + ".pkl")
+        return
+    tmp = stem + ".feather.tmp"
+    frame.reset_index(drop=True).to_feather(tmp)
+    os.replace(tmp, stem + ".feather")
+
+
+def _read_frame(stem):
+    if os.path.exists(stem + ".feather"):
+        return pd.read_feather(stem + ".feather")
+    if os.path.exists(stem + ".pkl"):
+        return pd.read_pickle(stem + ".pkl")
+    return None
+
+
+def _atomic_pickle(value, path):
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return 0
@@ -1,11 +1,31 @@
 # src/detector.py
 import pandas as pd
 import uuid
+from src.aggregates import STATE_ENTRY_BYTES, TransactionAggregator
+from src.log import get_logger
+from src.metrics import instrumented
+from src.schema import columns_for, read_accounts, read_transactions
+
+log = get_logger("detector")
+
+# Rules of the vectorized engine, in alert order, with the thresholds each one reads
+# (results are cached per rule on exactly these; see src/cache.py)
+RULE_THRESHOLDS = {
+    "large_transactions": ("large_txn_threshold",),
+    "structuring": ("structuring_threshold",),
+    "custom_pattern": (),
+}
+# Daily transaction count above which detect_custom_pattern() flags an account-day
+CUSTOM_TXN_COUNT = 5
 
 class MoneyLaunderingDetector:
-    def __init__(self, transactions=None, accounts=None):
+    def __init__(self, transactions=None, accounts=None, aggregates=None):
         self.transactions = transactions if transactions is not None else pd.DataFrame()
         self.accounts = accounts if accounts is not None else pd.DataFrame()
+        # ✅ Streaming mode: running aggregates instead of raw transactions
+        self.aggregates = aggregates
+        # (rule, account_id, day) -> reason of alerts already emitted by append()
+        self._alert_state = None
 
         # ✅ Thresholds are now customizable
         self.thresholds = {
@@ -14,12 +34,47 @@ class MoneyLaunderingDetector:
         }
 
     # ✅ Load your own CSV data
-    def load_data(self, transactions_file, accounts_file):
-        self.transactions = pd.read_csv(transactions_file)
-        self.accounts = pd.read_csv(accounts_file)
+    def load_data(self, transactions_file, accounts_file, chunksize=None, start=None, end=None):
+        """
+        Load transactions + accounts in the compact layout of src/schema.py.
+        Files may be CSV, Parquet or Arrow/Feather; only the columns these
+        rules use are read, and [start, end) limits the timestamps loaded.
+        With `chunksize`, transactions are streamed and folded into a
+        TransactionAggregator instead of being held in memory; set thresholds
+        before loading in that mode.
+        """
+        if chunksize:
+            self.aggregates = TransactionAggregator.from_csv(
+                transactions_file,
+                chunksize=chunksize,
+                large_txn_threshold=self.thresholds["large_txn_threshold"],
+                columns=columns_for("detector"), start=start, end=end
+            )
+            self.transactions = pd.DataFrame()
+        else:
+            self.transactions = read_transactions(
+                transactions_file, columns=columns_for("detector"), start=start, end=end
+            )
+            self.aggregates = None
+        self.accounts = read_accounts(accounts_file)
+
+    # ✅ Load from the persistent store (src/store.py)
+    def load_store(self, store, start=None, end=None, account_ids=None, dataset_id=None):
+        """
+        Load only the transactions in [start, end) (and of `account_ids`)
+        through the store's (account_id, timestamp) index, plus the accounts
+        they reference; the rest of the history is never read.
+        """
+        self.transactions = store.transactions(
+            account_ids, start, end, dataset_id, columns=columns_for("detector")
+        )
+        self.aggregates = None
+        self.accounts = store.accounts(self.transactions["account_id"].unique().tolist(), dataset_id) \
+            if len(self.transactions) else store.accounts([])
 
     # ---------------------- Detection Methods ---------------------- #
 
+    @instrumented("detector")
     def detect_large_transactions(self):
         alerts = []
         for _, txn in self.transactions.iterrows():
@@ -27,15 +82,16 @@ class MoneyLaunderingDetector:
                 alerts.append({
                     "account_id": txn["account_id"],
                     "alert_id": self._generate_alert_id(),
-                    "reason": "Unusually Large Transaction"
+                    "reason": "Unusually Large Transaction",
+                    **self._large_fields(txn["amount"])
                 })
         return alerts
 
+    @instrumented("detector")
     def detect_structuring(self):
         alerts = []
 
-        # 🔍 Debug: check available columns
-        print("Columns in transactions DataFrame:", self.transactions.columns)
+        log.debug("Columns in transactions DataFrame: %s", self.transactions.columns)
 
         # Use 'timestamp' column for date
         if "timestamp" not in self.transactions.columns:
@@ -45,17 +101,19 @@ class MoneyLaunderingDetector:
         self.transactions["date"] = pd.to_datetime(self.transactions["timestamp"]).dt.date
 
         # Group by account and date → sum amounts
-        grouped = self.transactions.groupby(["account_id", "date"])["amount"].sum().reset_index()
+        grouped = self.transactions.groupby(["account_id", "date"], observed=True)["amount"].sum().reset_index()
         for _, row in grouped.iterrows():
             if row["amount"] > self.thresholds["structuring_threshold"]:
                 alerts.append({
                     "account_id": row["account_id"],
                     "alert_id": self._generate_alert_id(),
-                    "reason": "Structuring/Smurfing Detected"
+                    "reason": "Structuring/Smurfing Detected",
+                    **self._structuring_fields(row["amount"], row["date"])
                 })
         return alerts
 
     # ✅ Custom Pattern Hook
+    @instrumented("detector")
     def detect_custom_pattern(self):
         """
         Add your own detection logic here.
@@ -70,18 +128,149 @@ class MoneyLaunderingDetector:
         # Convert to datetime and extract date only
         self.transactions["date"] = pd.to_datetime(self.transactions["timestamp"]).dt.date
 
-        grouped = self.transactions.groupby(["account_id", "date"]).size().reset_index(name="txn_count")
+        grouped = self.transactions.groupby(["account_id", "date"], observed=True).size().reset_index(name="txn_count")
         for _, row in grouped.iterrows():
-            if row["txn_count"] > 5:
+            if row["txn_count"] > CUSTOM_TXN_COUNT:
                 alerts.append({
                     "account_id": row["account_id"],
                     "alert_id": self._generate_alert_id(),
-                    "reason": f"Unusual activity: {row['txn_count']} transactions on {row['date']}"
+                    "reason": f"Unusual activity: {row['txn_count']} transactions on {row['date']}",
+                    **self._custom_fields(row["txn_count"], row["date"])
                 })
         return alerts
 
+    # ---------------------- Vectorized Engine ---------------------- #
+
+    @instrumented("detector")
+    def daily_aggregates(self):
+        """
+        Parse timestamps once and build the shared per-(account, day) table
+        used by both the daily-sum and the daily-count rules.
+        """
+        if "timestamp" not in self.transactions.columns:
+            raise KeyError("No timestamp column found in transactions DataFrame.")
+
+        dates = pd.to_datetime(self.transactions["timestamp"]).dt.normalize().rename("date")
+        amounts = self.transactions["amount"].astype("float64")
+        daily = amounts.groupby([self.transactions["account_id"], dates], observed=True).agg(["sum", "count"])
+        daily.columns = ["total_amount", "txn_count"]
+        return daily.reset_index()
+
+    def detect_vectorized(self):
+        """
+        Same alerts as detect(), built from boolean masks instead of iterrows().
+        Alert order is preserved: large transactions in row order, then the
+        structuring and custom rules in (account_id, date) order.
+        """
+        daily = self.aggregates.daily_frame() if self.aggregates is not None else self.daily_aggregates()
+        alerts = []
+        for rule in RULE_THRESHOLDS:
+            alerts.extend(self.detect_rule(rule, daily))
+        return alerts
+
+    @instrumented("detector", rule=lambda self, rule, daily=None: rule)
+    def detect_rule(self, rule, daily=None):
+        """
+        Alerts of one rule of RULE_THRESHOLDS (vectorized). Pass `daily`
+        (daily_aggregates()) to share it between the daily rules.
+        """
+        if rule == "large_transactions":
+            threshold = self.thresholds["large_txn_threshold"]
+            if self.aggregates is not None:
+                large = self.aggregates.large_transactions(threshold)
+            else:
+                large = self.transactions[self.transactions["amount"] > threshold]
+            return self._build_alerts(large["account_id"].tolist(), "Unusually Large Transaction",
+                                      [self._large_fields(amount) for amount in large["amount"].tolist()])
+        if rule not in RULE_THRESHOLDS:
+            raise KeyError(f"Unknown rule: {rule}")
+
+        if daily is None:
+            daily = self.aggregates.daily_frame() if self.aggregates is not None else self.daily_aggregates()
+        findings = self._structuring_findings(daily) if rule == "structuring" else self._custom_findings(daily)
+        return self._findings_alerts(findings)
+
+    def _daily_findings(self, daily):
+        """
+        (key, account_id, reason, fields) for every structuring/custom hit,
+        key = (rule, account, day), fields = the alert's amount/risk/date.
+        """
+        return self._structuring_findings(daily) + self._custom_findings(daily)
+
+    def _structuring_findings(self, daily):
+        structuring = daily[daily["total_amount"] > self.thresholds["structuring_threshold"]]
+        return [
+            (("structuring", acc, day), acc, "Structuring/Smurfing Detected", self._structuring_fields(total, date))
+            for acc, day, total, date in zip(
+                structuring["account_id"].tolist(),
+                self._day_keys(structuring),
+                structuring["total_amount"].tolist(),
+                structuring["date"].dt.date.tolist()
+            )
+        ]
+
+    def _custom_findings(self, daily):
+        busy = daily[daily["txn_count"] > CUSTOM_TXN_COUNT]
+        return [
+            (("custom", acc, day), acc, f"Unusual activity: {count} transactions on {date}",
+             self._custom_fields(count, date))
+            for acc, day, count, date in zip(
+                busy["account_id"].tolist(),
+                self._day_keys(busy),
+                busy["txn_count"].tolist(),
+                busy["date"].dt.date.tolist()
+            )
+        ]
+
+    # ---------------------- Incremental Detection ---------------------- #
+
+    @instrumented("detector")
+    def append(self, batch):
+        """
+        Fold a micro-batch into the running aggregates and re-evaluate only
+        the account-days it touches. Returns the alerts that are new, or
+        whose reason changed (e.g. a higher daily count), since the last call.
+
+        The first call moves the detector into aggregate mode: any loaded
+        transactions are folded in and their alerts count as already seen.
+        """
+        if self.aggregates is None:
+            self.aggregates = TransactionAggregator(large_txn_threshold=self.thresholds["large_txn_threshold"])
+            if not self.transactions.empty:
+                self.aggregates.update(self.transactions)
+            self.transactions = pd.DataFrame()
+        if self._alert_state is None:
+            self._alert_state = {
+                key: reason for key, _, reason, _ in self._daily_findings(self.aggregates.daily_frame())
+            }
+
+        touched = self.aggregates.update(batch)
+        large = batch[batch["amount"] > self.thresholds["large_txn_threshold"]]
+        alerts = self._build_alerts(large["account_id"].tolist(), "Unusually Large Transaction",
+                                    [self._large_fields(amount) for amount in large["amount"].tolist()])
+
+        changed = []
+        for finding in self._daily_findings(self.aggregates.daily_frame(touched)):
+            key, _, reason, _ = finding
+            if self._alert_state.get(key) != reason:
+                self._alert_state[key] = reason
+                changed.append(finding)
+
+        alerts.extend(self._findings_alerts(changed))
+        return alerts
+
+    def nbytes(self):
+        """Approximate memory held by append() state (aggregates and emitted-alert keys)"""
+        aggregates = self.aggregates.nbytes() if self.aggregates is not None else 0
+        return aggregates + len(self._alert_state or ()) * STATE_ENTRY_BYTES
+
     # ---------------------- Orchestrator ---------------------- #
-    def detect(self):
+    @instrumented("detector")
+    def detect(self, vectorized=False):
+        # Streamed data only exists as aggregates, so it always takes the vectorized path
+        if vectorized or self.aggregates is not None:
+            return self.detect_vectorized()
+
         alerts = []
         alerts.extend(self.detect_large_transactions())
         alerts.extend(self.detect_structuring())
@@ -91,3 +280,46 @@ class MoneyLaunderingDetector:
     # ---------------------- Helpers ---------------------- #
     def _generate_alert_id(self):
         return "A" + str(uuid.uuid4().int)[:4]  # short unique ID
+
+    @staticmethod
+    def _day_keys(daily):
+        return daily["date"].astype("datetime64[ns]").astype("int64").tolist()
+
+    def _build_alerts(self, account_ids, reasons, fields=None):
+        """
+        Bulk alert construction; `reasons` is one string or one per account,
+        `fields` one dict of extra alert fields per account.
+        """
+        if isinstance(reasons, str):
+            reasons = [reasons] * len(account_ids)
+        if fields is None:
+            fields = [{}] * len(account_ids)
+        return [
+            {"account_id": acc, "alert_id": self._generate_alert_id(), "reason": reason, **extra}
+            for acc, reason, extra in zip(account_ids, reasons, fields)
+        ]
+
+    def _findings_alerts(self, findings):
+        """Alerts for _daily_findings() tuples"""
+        return self._build_alerts(
+            [account_id for _, account_id, _, _ in findings],
+            [reason for _, _, reason, _ in findings],
+            [fields for _, _, _, fields in findings]
+        )
+
+    # Risk scores (0-100) let compliance reports apply REGULATORY_THRESHOLDS["str_risk_threshold"]:
+    # amount rules score 50 at their threshold and 100 at twice it; the count rule 10 per transaction
+    def _large_fields(self, amount):
+        return {"amount": float(amount), "risk_score": _amount_risk(amount, self.thresholds["large_txn_threshold"])}
+
+    def _structuring_fields(self, total, date):
+        return {"amount": float(total), "date": date,
+                "risk_score": _amount_risk(total, self.thresholds["structuring_threshold"])}
+
+    @staticmethod
+    def _custom_fields(count, date):
+        return {"transaction_count": int(count), "date": date, "risk_score": min(100, int(count) * 10)}
+
+
+def _amount_risk(amount, threshold):
+    return min(100, int(50 * float(amount) / threshold)) if threshold > 0 else 100
@@ -0,0 +1,80 @@
+# src/features.py
+import numpy as np
+import pandas as pd
+
+DAY = pd.Timedelta(days=1).value
+HOUR = pd.Timedelta(hours=1).value
+ROUND_UNIT = 1000  # multiples of 5000, 10000 and 25000 are multiples of 1000 too
+
+
+class FeatureFrame:
+    """
+    Account-sorted transaction features shared by the PatternDetector rules.
+
+    Built once per transaction set: rows are sorted by (account, timestamp)
+    and every column is a NumPy array in that order, so the rows of account
+    code v are offsets[v]:offsets[v + 1] and per-account or per-(account, day)
+    figures are reduceat() calls over contiguous runs. The input DataFrame is
+    never modified.
+    """
+
+    def __init__(self, transactions):
+        codes, accounts = pd.factorize(transactions["account_id"], sort=True)
+        timestamps = pd.to_datetime(transactions["timestamp"]).to_numpy().astype("datetime64[ns]").view("int64")
+        order = np.lexsort((timestamps, codes))
+
+        self.accounts = accounts
+        self.codes = codes[order].astype(np.int64)
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(self.codes, minlength=len(accounts)))])
+        self.timestamp = timestamps[order]
+        # Rows without a timestamp sort first in their account and carry day / hour -1
+        self.timed = self.timestamp != np.iinfo(np.int64).min
+        self.amount = transactions["amount"].to_numpy(dtype=np.float64)[order]
+        self.date = np.where(self.timed, self.timestamp // DAY, -1)
+        self.hour = np.where(self.timed, self.timestamp // HOUR, -1)
+        self.is_round = self.amount % ROUND_UNIT == 0
+        self.is_cash = _flag(transactions, "cash_transaction", order)
+        self.is_international = _flag(transactions, "is_international", order)
+        # .array keeps categorical counter parties as codes
+        self.counter_party = (
+            transactions["counter_party"].array.take(order) if "counter_party" in transactions.columns else None
+        )
+
+    def __len__(self):
+        return len(self.codes)
+
+    @property
+    def account_count(self):
+        return len(self.accounts)
+
+    def starts(self):
+        """First row of every account (accounts are never empty)"""
+        return self.offsets[:-1]
+
+    def account_sum(self, values):
+        """Per-account sum of a row array"""
+        if len(self) == 0:
+            return np.zeros(0, dtype=np.asarray(values).dtype)
+        return np.add.reduceat(values, self.starts())
+
+    def runs(self, key):
+        """Start rows of the (account, key) runs, e.g. key=self.date for account-days"""
+        return np.flatnonzero(np.r_[True, (self.codes[1:] != self.codes[:-1]) | (key[1:] != key[:-1])])
+
+    def frame(self, mask=None):
+        """account_id, counter_party, amount, timestamp as a (sorted) DataFrame"""
+        rows = slice(None) if mask is None else mask
+        columns = {
+            "account_id": self.accounts[self.codes[rows]],
+            "amount": self.amount[rows],
+            "timestamp": self.timestamp[rows].view("datetime64[ns]"),
+        }
+        if self.counter_party is not None:
+            columns["counter_party"] = self.counter_party[rows]
+        return pd.DataFrame(columns)
+
+
+def _flag(transactions, column, order):
+    if column not in transactions.columns:
+        return np.zeros(len(order), dtype=bool)
+    return (transactions[column].to_numpy() == True)[order]
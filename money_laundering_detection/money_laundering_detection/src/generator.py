@@ -0,0 +1,327 @@
+# src/generator.py
+"""
+Seeded, vectorized synthetic transaction generator with planted laundering
+typologies and ground-truth labels.
+
+Background traffic is drawn in NumPy chunks (no per-row Python), so tens of
+millions of rows can be streamed straight to CSV or Parquet. Each planted
+scenario gets its own accounts, which background traffic never touches, and
+is shaped to trip the matching PatternDetector rule:
+
+    structuring  3-6 cash deposits just under ₹10,000 on one day
+    smurfing     10-20 cash deposits from 8-15 depositors within 30 days
+    layering     a 3-5 hop wire-transfer chain, each hop within a day and
+                 2-5% smaller than the previous one
+    dormant      early activity, 90+ silent days, then 3-6 large
+                 transactions in the last 30 days of the range
+    velocity     10-20 transactions within 45 minutes
+
+The same seed and parameters always give the same rows.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+TYPOLOGIES = ("structuring", "smurfing", "layering", "dormant", "velocity")
+DEFAULT_SCENARIOS = {typology: 10 for typology in TYPOLOGIES}
+# PatternDetector alert_type raised for each typology
+ALERT_TYPES = {
+    "structuring": "Structuring",
+    "smurfing": "Smurfing",
+    "layering": "Layering",
+    "dormant": "Dormant Reactivation",
+    "velocity": "High Velocity",
+}
+# Accounts each scenario reserves for itself
+SCENARIO_ACCOUNTS = {"structuring": 1, "smurfing": 1, "layering": 6, "dormant": 1, "velocity": 1}
+
+TRANSACTION_TYPES = np.array(["Transfer", "Cash Deposit", "Wire Transfer", "Purchase"])
+TYPE_WEIGHTS = np.array([0.35, 0.2, 0.15, 0.3])
+COUNTRIES = np.array(["India", "USA", "UK", "UAE", "Singapore"])
+RISK_LEVELS = np.array(["Low", "Medium", "High"])
+DEFAULT_START = "2025-01-01"
+DAY = np.timedelta64(1, "D").astype("timedelta64[s]").astype(np.int64)
+MIN_DORMANT_DAYS = 140
+
+
+def account_names(accounts):
+    """ACC001, ACC002, ... zero-padded to the width of the largest id"""
+    width = max(3, len(str(accounts)))
+    return np.array([f"ACC{i:0{width}d}" for i in range(1, accounts + 1)], dtype=object)
+
+
+def generate_accounts(accounts=1000, seed=42):
+    """Account master data: account_id, customer_name, country, risk_level"""
+    rng = np.random.default_rng([seed, 0])
+    names = account_names(accounts)
+    return pd.DataFrame({
+        "account_id": names,
+        "customer_name": [f"Customer_{i}" for i in range(1, accounts + 1)],
+        "country": COUNTRIES[rng.integers(0, len(COUNTRIES), accounts)],
+        "risk_level": RISK_LEVELS[rng.integers(0, len(RISK_LEVELS), accounts)],
+    })
+
+
+def generate_transactions(rows, accounts=1000, days=180, start=DEFAULT_START, seed=42,
+                          scenarios=None, chunk_size=1000000):
+    """
+    Generate transactions in chunks.
+
+    :param rows: Background (unlabelled) transactions; planted rows come on top
+    :param accounts: Total accounts, including the ones scenarios reserve
+    :param days: Length of the date range starting at `start`
+    :param scenarios: {typology: count}; None plants DEFAULT_SCENARIOS, {} none
+    :return: (chunks, labels) where chunks is an iterator of DataFrames
+        (planted rows arrive with the last chunk) and labels has one row per
+        planted scenario: scenario_id, typology, account_id, accounts,
+        first_txn, last_txn, transactions
+    """
+    scenarios = DEFAULT_SCENARIOS if scenarios is None else scenarios
+    unknown = set(scenarios) - set(TYPOLOGIES)
+    if unknown:
+        raise ValueError(f"Unknown typologies: {sorted(unknown)}")
+    if scenarios.get("dormant") and days < MIN_DORMANT_DAYS:
+        raise ValueError(f"Dormant scenarios need days >= {MIN_DORMANT_DAYS}.")
+
+    reserved = sum(SCENARIO_ACCOUNTS[typology] * count for typology, count in scenarios.items())
+    if accounts - reserved < 2:
+        raise ValueError(f"{accounts} accounts leave none for background traffic ({reserved} reserved).")
+
+    names = account_names(accounts)
+    origin = np.datetime64(pd.Timestamp(start).normalize().to_datetime64(), "s").astype(np.int64)
+    planted, labels = _plant(scenarios, accounts - reserved, origin, days, seed)
+
+    def chunks():
+        emitted = 0
+        for index, first in enumerate(range(0, max(rows, 1), chunk_size)):
+            count = min(chunk_size, rows - first)
+            frame = _background(count, accounts - reserved, origin, days, np.random.default_rng([seed, 1, index]))
+            if first + count >= rows:
+                frame = {name: np.concatenate([frame[name], planted[name]]) for name in frame}
+            frame["transaction_id"] = np.arange(emitted + 1, emitted + len(frame["amount"]) + 1)
+            emitted += len(frame["amount"])
+            yield _frame(frame, names)
+
+    labels = pd.DataFrame(labels, columns=["scenario_id", "typology", "account_id", "accounts",
+                                           "first_txn", "last_txn", "transactions"])
+    if len(labels):
+        labels["account_id"] = names[labels["account_id"].to_numpy()]
+        labels["accounts"] = [" → ".join(names[list(group)]) for group in labels["accounts"]]
+        labels["first_txn"] = pd.to_datetime(labels["first_txn"], unit="s")
+        labels["last_txn"] = pd.to_datetime(labels["last_txn"], unit="s")
+    return chunks(), labels
+
+
+def write_transactions(path, rows, accounts=1000, days=180, start=DEFAULT_START, seed=42,
+                       scenarios=None, chunk_size=1000000, file_format=None):
+    """
+    Stream generated transactions to one CSV or Parquet file, chunk by chunk.
+    Ground-truth labels go to <path stem>_labels.csv next to it.
+
+    :param file_format: "csv" or "parquet" (default: from the file suffix)
+    :return: (rows written, labels)
+    """
+    file_format = file_format or ("parquet" if str(path).lower().endswith((".parquet", ".pq")) else "csv")
+    chunks, labels = generate_transactions(rows, accounts, days, start, seed, scenarios, chunk_size)
+
+    written, writer = 0, None
+    try:
+        for chunk in chunks:
+            writer = _write_chunk(path, chunk, file_format, writer, first=written == 0)
+            written += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    labels.to_csv(os.path.splitext(str(path))[0] + "_labels.csv", index=False)
+    return written, labels
+
+
+def recall(labels, alerts):
+    """
+    Share of planted scenarios whose account was flagged with the matching
+    alert type, per typology.
+
+    :param labels: Labels from generate_transactions()
+    :param alerts: PatternDetector alerts (dicts with alert_type, account_id)
+    """
+    flagged = {(alert["alert_type"], str(alert["account_id"])) for alert in alerts}
+    hits = [
+        (ALERT_TYPES[typology], account_id) in flagged
+        for typology, account_id in zip(labels["typology"], labels["account_id"])
+    ]
+    return pd.Series(hits, index=labels["typology"].to_numpy(), dtype=float).groupby(level=0).mean().to_dict()
+
+
+def _write_chunk(path, chunk, file_format, writer, first):
+    """Append one chunk; returns the open pyarrow writer (None for the pandas CSV fallback)"""
+    try:
+        import pyarrow as pa
+    except ImportError:
+        if file_format == "parquet":
+            raise
+        chunk.to_csv(path, mode="w" if first else "a", header=first, index=False)
+        return None
+
+    table = pa.Table.from_pandas(chunk, preserve_index=False)
+    if file_format == "parquet":
+        import pyarrow.parquet as pq
+
+        writer = writer or pq.ParquetWriter(path, table.schema)
+    else:
+        import pyarrow.csv as csv
+
+        # Whole seconds, so the CSV reads "2025-01-01 09:30:00" like the bundled data
+        timestamp = table.schema.get_field_index("timestamp")
+        table = table.set_column(timestamp, "timestamp", table.column(timestamp).cast(pa.timestamp("s")))
+        writer = writer or csv.CSVWriter(path, table.schema)
+    writer.write_table(table)
+    return writer
+
+
+# ---------------------- Background ---------------------- #
+
+def _background(count, accounts, origin, days, rng):
+    account = rng.integers(0, accounts, count)
+    # Never the account itself
+    counter_party = (account + rng.integers(1, accounts, count)) % accounts
+    kind = rng.choice(len(TRANSACTION_TYPES), count, p=TYPE_WEIGHTS)
+    return {
+        "account_id": account,
+        "counter_party": counter_party,
+        "amount": np.round(rng.exponential(20000, count), 2),
+        "transaction_type": kind,
+        "timestamp": origin + rng.integers(0, days * DAY, count),
+        "is_international": rng.random(count) < 0.1,
+        "typology": np.full(count, -1),
+    }
+
+
+# ---------------------- Planted scenarios ---------------------- #
+
+def _plant(scenarios, first_account, origin, days, seed):
+    """Rows (same layout as _background) and labels for every planted scenario"""
+    rng = np.random.default_rng([seed, 2])
+    parts, labels = [], []
+    next_account = first_account
+    for code, typology in enumerate(TYPOLOGIES):
+        for _ in range(scenarios.get(typology, 0)):
+            owned = np.arange(next_account, next_account + SCENARIO_ACCOUNTS[typology])
+            next_account += len(owned)
+            rows = PLANTERS[typology](rng, owned, first_account, origin, days)
+            rows["typology"] = np.full(len(rows["amount"]), code)
+            rows.setdefault("is_international", rng.random(len(rows["amount"])) < 0.1)
+            parts.append(rows)
+            labels.append((
+                len(labels) + 1, typology, int(owned[0]), _participants(typology, rows, owned),
+                int(rows["timestamp"].min()), int(rows["timestamp"].max()), len(rows["amount"]),
+            ))
+
+    if not parts:
+        empty = _rows([], [], [], 0, [])
+        empty.update(is_international=np.zeros(0, dtype=bool), typology=np.zeros(0, dtype=np.int64))
+        return empty, labels
+    return {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}, labels
+
+
+def _participants(typology, rows, owned):
+    if typology == "layering":
+        return tuple(np.r_[rows["account_id"], rows["counter_party"][-1]])
+    return (int(owned[0]),)
+
+
+def _structuring(rng, owned, background, origin, days):
+    count = rng.integers(3, 7)
+    day = origin + rng.integers(0, days) * DAY
+    return _rows(
+        np.full(count, owned[0]), rng.integers(0, background, count),
+        np.round(rng.uniform(8000, 9900, count), 2), 1,
+        day + np.sort(rng.integers(9 * 3600, 18 * 3600, count)),
+    )
+
+
+def _smurfing(rng, owned, background, origin, days):
+    count = rng.integers(10, 21)
+    depositors = rng.choice(background, rng.integers(8, 16), replace=False)
+    # Every depositor at least once
+    senders = np.r_[depositors, rng.choice(depositors, count - len(depositors))] if count > len(depositors) \
+        else depositors[:count]
+    begin = origin + rng.integers(0, max(days - 30, 1)) * DAY
+    return _rows(
+        np.full(len(senders), owned[0]), senders,
+        np.round(rng.uniform(12000, 49000, len(senders)), 2), 1,
+        begin + np.sort(rng.integers(0, 30 * DAY, len(senders))),
+    )
+
+
+def _layering(rng, owned, background, origin, days):
+    hops = rng.integers(3, 6)
+    chain = owned[:hops + 1]
+    amount = rng.uniform(200000, 900000) * np.cumprod(np.r_[1, rng.uniform(0.95, 0.98, hops - 1)])
+    begin = origin + rng.integers(0, max(days - 7, 1)) * DAY
+    return _rows(
+        chain[:-1], chain[1:], np.round(amount, 2), 2,
+        begin + np.cumsum(rng.integers(3600, DAY, hops)),
+    )
+
+
+def _dormant(rng, owned, background, origin, days):
+    early = rng.integers(2, 5)
+    recent = rng.integers(3, 7)
+    timestamps = np.r_[
+        origin + np.sort(rng.integers(0, 20 * DAY, early)),
+        origin + (days - 30) * DAY + np.sort(rng.integers(0, 29 * DAY, recent)),
+    ]
+    amounts = np.r_[rng.uniform(1000, 20000, early), rng.uniform(80000, 300000, recent)]
+    return _rows(
+        np.full(early + recent, owned[0]), rng.integers(0, background, early + recent),
+        np.round(amounts, 2), 0, timestamps,
+    )
+
+
+def _velocity(rng, owned, background, origin, days):
+    count = rng.integers(10, 21)
+    begin = origin + rng.integers(0, days) * DAY + rng.integers(0, 23 * 3600)
+    return _rows(
+        np.full(count, owned[0]), rng.integers(0, background, count),
+        np.round(rng.uniform(5000, 60000, count), 2), 3,
+        begin + np.sort(rng.integers(0, 45 * 60, count)),
+    )
+
+
+PLANTERS = {
+    "structuring": _structuring,
+    "smurfing": _smurfing,
+    "layering": _layering,
+    "dormant": _dormant,
+    "velocity": _velocity,
+}
+
+
+def _rows(account, counter_party, amount, kind, timestamp):
+    return {
+        "account_id": np.asarray(account, dtype=np.int64),
+        "counter_party": np.asarray(counter_party, dtype=np.int64),
+        "amount": np.asarray(amount, dtype=np.float64),
+        "transaction_type": np.full(len(amount), kind),
+        "timestamp": np.asarray(timestamp, dtype=np.int64),
+    }
+
+
+def _frame(columns, names):
+    """Code arrays → DataFrame with categorical ids and datetime64 timestamps"""
+    kind = columns["transaction_type"]
+    typology = columns["typology"]
+    return pd.DataFrame({
+        "transaction_id": columns["transaction_id"],
+        "account_id": pd.Categorical.from_codes(columns["account_id"], categories=names),
+        "counter_party": pd.Categorical.from_codes(columns["counter_party"], categories=names),
+        "amount": columns["amount"],
+        "transaction_type": pd.Categorical.from_codes(kind, categories=TRANSACTION_TYPES),
+        "timestamp": columns["timestamp"].astype("datetime64[s]").astype("datetime64[ns]"),
+        "cash_transaction": kind == 1,
+        "is_international": columns["is_international"],
+        "is_suspicious": typology >= 0,
+        "typology": pd.Categorical.from_codes(typology, categories=list(TYPOLOGIES)),
+    })
@@ -0,0 +1,266 @@
+# src/graph.py
+import numpy as np
+import pandas as pd
+
+
+class TransactionGraph:
+    """
+    Compact directed multigraph of transfers, built in bulk from columns.
+
+    Nodes are integer ids into `names`. Edges are kept one per transfer
+    (parallel transfers between the same two parties are not merged) in
+    per-edge arrays sorted by (source, timestamp), with CSR `offsets` so the
+    out-edges of node v are edges offsets[v]:offsets[v + 1].
+    """
+
+    def __init__(self, names, src, dst, amount, timestamp, txn_id=None):
+        # Transfers with a missing party (code -1) have no edge
+        known = (src >= 0) & (dst >= 0)
+        if not known.all():
+            src, dst, amount, timestamp = src[known], dst[known], amount[known], timestamp[known]
+            txn_id = txn_id[known] if txn_id is not None else None
+        order = np.lexsort((timestamp, src))
+        self.names = np.asarray(names, dtype=object)
+        self.src = src[order]
+        self.dst = dst[order]
+        self.amount = amount[order]
+        self.timestamp = timestamp[order]
+        self.txn_id = txn_id[order] if txn_id is not None else None
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(self.src, minlength=len(self.names)))])
+
+    @classmethod
+    def from_transactions(cls, transactions, transaction_type="Wire Transfer"):
+        """
+        Build the graph from account_id → counter_party transfers.
+
+        :param transactions: DataFrame with account_id, counter_party, amount,
+            timestamp and (optionally) transaction_id columns
+        :param transaction_type: Only keep rows of this type; None keeps all
+        """
+        if transaction_type is not None and "transaction_type" in transactions.columns:
+            transactions = transactions[transactions["transaction_type"] == transaction_type]
+
+        src, dst, names = _shared_codes(transactions["account_id"], transactions["counter_party"])
+        timestamps = pd.to_datetime(transactions["timestamp"]).to_numpy().astype("datetime64[ns]")
+        txn_id = transactions["transaction_id"].to_numpy() if "transaction_id" in transactions.columns else None
+
+        return cls(
+            names,
+            src,
+            dst,
+            transactions["amount"].to_numpy(dtype=np.float64),
+            timestamps.view("int64"),
+            txn_id,
+        )
+
+    # ---------------------- Structure ---------------------- #
+
+    @property
+    def node_count(self):
+        return len(self.names)
+
+    @property
+    def edge_count(self):
+        return len(self.src)
+
+    def out_degree(self):
+        return np.diff(self.offsets)
+
+    def in_degree(self):
+        return np.bincount(self.dst, minlength=self.node_count)
+
+    def out_edges(self, node):
+        """Edge indices leaving `node`, in timestamp order"""
+        return np.arange(self.offsets[node], self.offsets[node + 1])
+
+    def node_ids(self, accounts):
+        """Integer ids for account names (-1 if unknown)"""
+        return pd.Index(self.names).get_indexer(accounts)
+
+    def memory_usage(self):
+        """Bytes held by the edge arrays, CSR offsets and node table"""
+        arrays = [self.src, self.dst, self.amount, self.timestamp, self.offsets]
+        if self.txn_id is not None:
+            arrays.append(self.txn_id)
+        return sum(array.nbytes for array in arrays) + self.names.nbytes
+
+    # ---------------------- Conversion ---------------------- #
+
+    def to_scipy(self):
+        """Sparse (source x target) matrix of summed transfer amounts (needs scipy)"""
+        from scipy.sparse import csr_matrix
+
+        shape = (self.node_count, self.node_count)
+        return csr_matrix((self.amount, (self.src, self.dst)), shape=shape)
+
+    def to_networkx(self, accounts):
+        """
+        networkx.MultiDiGraph of the transfers among `accounts` only.
+        Meant for inspecting small subgraphs, e.g. one layering chain.
+        """
+        import networkx as nx
+
+        nodes = self.node_ids(accounts)
+        nodes = nodes[nodes >= 0]
+        inside = np.zeros(self.node_count, dtype=bool)
+        inside[nodes] = True
+        edges = np.flatnonzero(inside[self.src] & inside[self.dst])
+
+        G = nx.MultiDiGraph()
+        G.add_nodes_from(self.names[nodes])
+        for edge in edges:
+            G.add_edge(
+                self.names[self.src[edge]],
+                self.names[self.dst[edge]],
+                weight=self.amount[edge],
+                timestamp=pd.Timestamp(self.timestamp[edge]),
+                txn_id=self.txn_id[edge] if self.txn_id is not None else None
+            )
+        return G
+
+
+class TransferIndex:
+    """
+    Transfers kept per account, out-edges and in-edges each sorted by time,
+    and appended batch by batch. PatternDetector.update() cuts the subgraph
+    around a batch's transfers out of it instead of rebuilding the
+    TransactionGraph of the whole history.
+    """
+
+    def __init__(self, transaction_type="Wire Transfer"):
+        self.transaction_type = transaction_type
+        self._out = {}    # account -> (seq, timestamp, counter_party, amount), by (timestamp, seq)
+        self._in = {}     # account -> (seq, timestamp, account_id), by (timestamp, seq)
+        self._added = 0   # seq: arrival order, which breaks timestamp ties like the full graph does
+
+    def add(self, transactions):
+        """
+        Index the transfers among `transactions` (selected like
+        TransactionGraph.from_transactions); returns (senders, timestamps)
+        of the transfers added.
+        """
+        if self.transaction_type is not None and "transaction_type" in transactions.columns:
+            transactions = transactions[transactions["transaction_type"] == self.transaction_type]
+        if "counter_party" not in transactions.columns or transactions.empty:
+            return np.array([], dtype=object), np.array([], dtype=np.int64)
+
+        src, dst, names = _shared_codes(transactions["account_id"], transactions["counter_party"])
+        known = (src >= 0) & (dst >= 0)
+        src, dst = names[src[known]], names[dst[known]]
+        timestamps = pd.to_datetime(transactions["timestamp"]).to_numpy().astype("datetime64[ns]").view("int64")
+        timestamps = timestamps[known]
+        amount = transactions["amount"].to_numpy(dtype=np.float64)[known]
+        seq = np.arange(self._added, self._added + len(src))
+        self._added += len(src)
+
+        _append(self._out, src, seq, timestamps, dst, amount)
+        _append(self._in, dst, seq, timestamps, src)
+        return src, timestamps
+
+    def sources(self, senders, timestamps, hops, window):
+        """
+        Accounts whose chains of up to `hops` transfers can include one of the
+        transfers out of `senders` at `timestamps`: the senders and, hop by
+        hop, the accounts that paid them at most `window` ns earlier.
+        """
+        found = set(senders)
+        frontier = _time_ranges(senders, timestamps)
+        for _ in range(hops - 1):
+            payers, times = [], []
+            for account, (first, last) in frontier.items():
+                if account not in self._in:
+                    continue
+                _, ts, src = self._in[account]
+                # A hop at t can follow hops at [t - window, t)
+                lo, hi = np.searchsorted(ts, first - window), np.searchsorted(ts, last)
+                payers.append(src[lo:hi])
+                times.append(ts[lo:hi])
+            if not payers:
+                break
+            frontier = _time_ranges(np.concatenate(payers), np.concatenate(times))
+            found |= set(frontier)
+        return found
+
+    def subgraph(self, sources, hops, window):
+        """
+        The transfers chains of up to `hops` transfers starting at `sources`
+        can use: every transfer out of `sources`, then hop by hop the ones
+        leaving the accounts reached, in (earliest arrival, latest arrival +
+        window]. Returns (TransactionGraph, full out-degree per graph node).
+        """
+        selected = {}
+        frontier = {account: None for account in sources}
+        for _ in range(hops):
+            reached, times = [], []
+            for account, bounds in frontier.items():
+                if account not in self._out:
+                    continue
+                _, ts, dst, _ = self._out[account]
+                if bounds is None:
+                    lo, hi = 0, len(ts)
+                else:
+                    lo, hi = np.searchsorted(ts, bounds[0], side="right"), \
+                        np.searchsorted(ts, bounds[1] + window, side="right")
+                if hi > lo:
+                    selected.setdefault(account, []).append(np.arange(lo, hi))
+                    reached.append(dst[lo:hi])
+                    times.append(ts[lo:hi])
+            if not reached:
+                break
+            frontier = _time_ranges(np.concatenate(reached), np.concatenate(times))
+
+        src, edges = [np.array([], dtype=object)], [_EMPTY_OUT]
+        for account, positions in selected.items():
+            positions = np.unique(np.concatenate(positions))
+            src.append(np.full(len(positions), account, dtype=object))
+            edges.append(tuple(column[positions] for column in self._out[account]))
+        seq, ts, dst, amount = (np.concatenate(column) for column in zip(*edges))
+        # Arrival order, so equal-time transfers tie as they do in the full graph
+        order = np.argsort(seq, kind="stable")
+        src_codes, dst_codes, names = _shared_codes(pd.Series(np.concatenate(src)[order]), pd.Series(dst[order]))
+        graph = TransactionGraph(names, src_codes, dst_codes, amount[order], ts[order])
+        degree = np.array([len(self._out[name][0]) if name in self._out else 0 for name in names], dtype=np.int64)
+        return graph, degree
+
+
+_EMPTY_OUT = (np.array([], dtype=np.int64), np.array([], dtype=np.int64),
+              np.array([], dtype=object), np.array([], dtype=np.float64))
+
+
+def _append(index, keys, seq, timestamps, *columns):
+    """Add rows to index[key] = (seq, timestamp, *columns), keeping each account's rows in (timestamp, seq) order"""
+    codes, accounts = pd.factorize(keys)
+    order = np.argsort(codes, kind="stable")
+    bounds = np.searchsorted(codes[order], np.arange(len(accounts) + 1))
+    for code, account in enumerate(accounts):
+        rows = order[bounds[code]:bounds[code + 1]]
+        added = (seq[rows], timestamps[rows]) + tuple(column[rows] for column in columns)
+        if account in index:
+            added = tuple(np.concatenate(pair) for pair in zip(index[account], added))
+        by_time = np.lexsort((added[0], added[1]))
+        index[account] = tuple(column[by_time] for column in added)
+
+
+def _time_ranges(accounts, timestamps):
+    """{account: (earliest, latest)} over (account, timestamp) pairs"""
+    if len(accounts) == 0:
+        return {}
+    ranges = pd.DataFrame({"account": accounts, "timestamp": timestamps}).groupby("account", sort=False)["timestamp"]
+    return {account: (first, last) for account, first, last in zip(ranges.min().index, ranges.min(), ranges.max())}
+
+
+def _shared_codes(left, right):
+    """
+    Integer codes of two id columns over one shared node table. Each side is
+    factorized on its own (categorical columns just reuse their codes), so
+    the ids are never concatenated into one large object column.
+    """
+    left_codes, left_names = pd.factorize(left)
+    right_codes, right_names = pd.factorize(right)
+    left_names = np.asarray(left_names, dtype=object)
+    right_names = np.asarray(right_names, dtype=object)
+    names = pd.Index(left_names).append(pd.Index(right_names)).unique()
+    # Missing ids keep code -1 (the appended last entry); TransactionGraph drops their edges
+    src = np.r_[names.get_indexer(left_names), -1][left_codes]
+    dst = np.r_[names.get_indexer(right_names), -1][right_codes]
+    return src.astype(np.int64), dst.astype(np.int64), np.asarray(names, dtype=object)
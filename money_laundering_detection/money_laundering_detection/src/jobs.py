@@ -0,0 +1,206 @@
+# src/jobs.py
+"""
+Background detection jobs for the web app.
+
+A job is a list of named steps (one per rule) run in order on a bounded
+worker pool. Submitting returns at once with a job id; progress, per-step
+timings and results are read back with JobManager.get(). When every worker
+is busy and the queue is full, submit() raises JobQueueFull instead of
+queueing without limit.
+
+Cancellation is cooperative: a queued job never starts, a running job stops
+before its next step (a step that already started runs to completion).
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (COMPLETED, FAILED, CANCELLED)
+
+
+class JobQueueFull(Exception):
+    """Every worker is busy and the queue is at capacity"""
+
+
+class JobCancelled(Exception):
+    """Raised inside a job that was cancelled between steps"""
+
+
+class Job:
+    def __init__(self, steps, finalize=None, metadata=None):
+        """
+        :param steps: [(name, fn)] run in order; fn(results) receives the
+            results of the steps before it and returns this step's result
+        :param finalize: fn(results) → the job result (default: the results dict)
+        """
+        self.id = uuid.uuid4().hex
+        self.status = QUEUED
+        self.steps = list(steps)
+        self.finalize = finalize
+        self.metadata = dict(metadata or {})
+        self.progress = OrderedDict((name, {"status": QUEUED, "seconds": None}) for name, _ in self.steps)
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def run(self):
+        if self.cancelled:
+            self._finish(CANCELLED)
+            return
+        with self._lock:
+            self.status, self.started_at = RUNNING, time.time()
+
+        results = {}
+        try:
+            for name, fn in self.steps:
+                if self.cancelled:
+                    raise JobCancelled()
+                self._step(name, status=RUNNING)
+                started = time.perf_counter()
+                results[name] = fn(results)
+                self._step(name, status=COMPLETED, seconds=round(time.perf_counter() - started, 6),
+                           **_summary(results[name]))
+            result = self.finalize(results) if self.finalize else results
+            with self._lock:
+                self.result = result
+            self._finish(COMPLETED)
+        except JobCancelled:
+            self._finish(CANCELLED)
+        except Exception as e:
+            with self._lock:
+                self.error = f"{type(e).__name__}: {e}"
+                for step in self.progress.values():
+                    if step["status"] == RUNNING:
+                        step["status"] = FAILED
+            self._finish(FAILED)
+
+    def cancel(self):
+        """Request cancellation; returns False when the job already finished"""
+        with self._lock:
+            if self.status in FINISHED:
+                return False
+            self._cancel.set()
+            if self.status == QUEUED:
+                self.status = CANCELLED
+                self.finished_at = time.time()
+            return True
+
+    def to_dict(self, include_result=True):
+        with self._lock:
+            completed = sum(step["status"] == COMPLETED for step in self.progress.values())
+            job = {
+                "job_id": self.id,
+                "status": self.status,
+                "progress": {
+                    "completed_steps": completed,
+                    "total_steps": len(self.progress),
+                    "percent": round(100 * completed / len(self.progress), 1) if self.progress else 100.0,
+                    # A list: JSON encoders may sort object keys, steps keep run order
+                    "steps": [{"name": name, **step} for name, step in self.progress.items()],
+                },
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                "error": self.error,
+                **self.metadata,
+            }
+            if include_result:
+                job["result"] = self.result
+            return job
+
+    def _step(self, name, **fields):
+        with self._lock:
+            self.progress[name].update(fields)
+
+    def _finish(self, status):
+        with self._lock:
+            self.status = status
+            self.finished_at = self.finished_at or time.time()
+            if status == CANCELLED:
+                for step in self.progress.values():
+                    if step["status"] == QUEUED:
+                        step["status"] = CANCELLED
+
+
+class JobManager:
+    def __init__(self, max_workers=2, max_queued=8, keep_finished=100):
+        """
+        :param max_workers: Jobs running at the same time
+        :param max_queued: Jobs waiting for a worker before submit() is refused
+        :param keep_finished: Finished jobs kept for polling (oldest dropped first)
+        """
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.keep_finished = keep_finished
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="aml-job")
+        self._slots = threading.BoundedSemaphore(max_workers + max_queued)
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, steps, finalize=None, **metadata):
+        """
+        Queue a job and return it without waiting.
+
+        :raises JobQueueFull: when max_workers + max_queued jobs are pending
+        """
+        if not self._slots.acquire(blocking=False):
+            raise JobQueueFull(f"{self.max_workers + self.max_queued} detection jobs already pending")
+        job = Job(steps, finalize, metadata)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        try:
+            future = self._executor.submit(job.run)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        """Cancel a job; None when the id is unknown, else whether it was cancellable"""
+        job = self.get(job_id)
+        return None if job is None else job.cancel()
+
+    def jobs(self):
+        with self._lock:
+            return list(self._jobs.values())
+
+    def pending(self):
+        return sum(job.status in (QUEUED, RUNNING) for job in self.jobs())
+
+    def shutdown(self, wait=True):
+        for job in self.jobs():
+            job.cancel()
+        self._executor.shutdown(wait=wait)
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.status in FINISHED]
+        for job_id in finished[:max(0, len(finished) - self.keep_finished)]:
+            del self._jobs[job_id]
+
+
+def _summary(result):
+    """Per-step progress fields for common step results"""
+    if isinstance(result, list):
+        return {"alerts": len(result)}
+    return {}
@@ -0,0 +1,146 @@
+# src/layering.py
+import numpy as np
+import pandas as pd
+
+from src.graph import TransactionGraph
+from src.utils import expansion_batches, sorted_searchsorted
+
+# Chain search settings used by PatternDetector.detect_layering
+LAYERING_DEFAULTS = {
+    "min_hops": 2,                  # 3+ entities, as before
+    "max_hops": 5,                  # same depth as the old all_simple_paths cutoff
+    "time_window": pd.Timedelta(days=7),   # next hop must follow within this window
+    "amount_tolerance": 0.2,        # next hop moves 80%-120% of the previous amount
+    "min_total_amount": 100000,     # sum of hop amounts, as before
+    "max_branching": 10,            # continuations kept per chain and hop (earliest first)
+    "max_out_degree": 1000,         # hub accounts are not expanded through
+    "max_frontier": 2000000,        # live chains kept per hop (largest totals first)
+}
+
+# Candidate hops materialized at once while expanding a frontier
+EXPANSION_BATCH = 4000000
+
+
+def find_layering_chains(graph, starts=None, out_degree=None, **options):
+    """
+    Bounded-depth, time-ordered chain expansion over a wire-transfer graph.
+
+    Every transfer starts a chain. A chain a → b → c ... is extended by a
+    transfer out of its last account that happens strictly after the previous
+    hop, within `time_window`, and moves an amount within `amount_tolerance`
+    of the previous hop. Accounts are not revisited. Expansion runs level by
+    level on NumPy arrays: the graph's edges are sorted by (source, timestamp)
+    so each hop's candidates are one searchsorted range.
+
+    :param graph: TransactionGraph, or a DataFrame of transfers to build one from
+    :param starts: Node ids whose transfers start chains (default: every node)
+    :param out_degree: Per-node out-degree max_out_degree is checked against
+        (default: the graph's own; a subgraph passes the full graph's)
+    :param options: Overrides for LAYERING_DEFAULTS
+    :return: DataFrame with one row per chain: nodes (tuple of account ids),
+        hops, total_amount, first_txn, last_txn
+    """
+    if isinstance(graph, pd.DataFrame):
+        graph = TransactionGraph.from_transactions(graph, transaction_type=None)
+
+    settings = {**LAYERING_DEFAULTS, **options}
+    columns = ["nodes", "hops", "total_amount", "first_txn", "last_txn"]
+    if graph.edge_count == 0:
+        return pd.DataFrame(columns=columns)
+    return _expand(graph, settings, columns, starts, out_degree)
+
+
+def _expand(graph, settings, columns, starts=None, out_degree=None):
+    src, dst, ts, amount = graph.src, graph.dst, graph.timestamp, graph.amount
+    window = pd.Timedelta(settings["time_window"]).value
+    tolerance = settings["amount_tolerance"]
+    min_total = settings["min_total_amount"]
+
+    # (source, timestamp rank) keys make every "out of v after t" query one searchsorted
+    times = np.sort(ts)
+    times = times[np.r_[True, times[1:] != times[:-1]]]
+    stride = len(times) + 1
+    rank = sorted_searchsorted(times, ts)
+    keys = src * stride + rank
+    # Per edge: timestamp ranks bounding the next hop, (t, t + window]
+    after = rank + 1
+    until = sorted_searchsorted(times, ts + window, side="right")
+    degree = graph.out_degree() if out_degree is None else out_degree
+
+    # Level 1: every transfer (out of `starts`) is a one-hop chain
+    last = np.arange(len(src)) if starts is None else np.flatnonzero(np.isin(src, starts))
+    path = np.stack([src[last], dst[last]], axis=1)
+    total = amount[last]
+    first = ts[last]
+
+    found = []
+    for hops in range(2, settings["max_hops"] + 1):
+        node = dst[last]
+        lo = sorted_searchsorted(keys, node * stride + after[last])
+        hi = sorted_searchsorted(keys, node * stride + until[last])
+        count = np.where(degree[node] <= settings["max_out_degree"], hi - lo, 0)
+
+        parents, steps = [], []
+        for chunk in expansion_batches(count, EXPANSION_BATCH):
+            parent = np.repeat(chunk, count[chunk])
+            if len(parent) == 0:
+                continue
+            run_start = np.repeat(np.cumsum(count[chunk]) - count[chunk], count[chunk])
+            step = lo[parent] + (np.arange(len(parent)) - run_start)
+
+            previous = amount[last[parent]]
+            keep = (amount[step] >= previous * (1 - tolerance)) & (amount[step] <= previous * (1 + tolerance))
+            keep &= ~(path[parent] == dst[step][:, None]).any(axis=1)
+            parent, step = parent[keep], step[keep]
+
+            # Earliest `max_branching` continuations per chain
+            boundary = np.r_[True, parent[1:] != parent[:-1]]
+            group_start = np.maximum.accumulate(np.where(boundary, np.arange(len(parent)), 0))
+            keep = (np.arange(len(parent)) - group_start) < settings["max_branching"]
+            parents.append(parent[keep])
+            steps.append(step[keep])
+
+        if not parents:
+            break
+        parent = np.concatenate(parents)
+        step = np.concatenate(steps)
+        if len(parent) == 0:
+            break
+
+        path = np.hstack([path[parent], dst[step][:, None]])
+        total = total[parent] + amount[step]
+        first = first[parent]
+        last = step
+
+        if len(last) > settings["max_frontier"]:
+            top = np.sort(np.argsort(-total, kind="stable")[:settings["max_frontier"]])
+            path, total, first, last = path[top], total[top], first[top], last[top]
+
+        if hops >= settings["min_hops"]:
+            hit = total > min_total
+            found.append((path[hit], total[hit], first[hit], ts[last[hit]]))
+
+    if not found:
+        return pd.DataFrame(columns=columns)
+
+    # Pad to a common width, then keep the longest (then largest) chain per 4-account prefix
+    width = settings["max_hops"] + 1
+    path = np.vstack([np.pad(p, ((0, 0), (0, width - p.shape[1])), constant_values=-1) for p, _, _, _ in found])
+    total = np.concatenate([t for _, t, _, _ in found])
+    first = np.concatenate([f for _, _, f, _ in found])
+    final = np.concatenate([f for _, _, _, f in found])
+    hops = (path >= 0).sum(axis=1) - 1
+
+    best = np.lexsort((-total, -hops) + tuple(path[:, i] for i in reversed(range(4))))
+    prefix = path[best, :4]
+    keep = np.sort(best[np.r_[True, (prefix[1:] != prefix[:-1]).any(axis=1)]])
+
+    names = graph.names
+    return pd.DataFrame({
+        "nodes": [tuple(names[chain[chain >= 0]]) for chain in path[keep]],
+        "hops": hops[keep],
+        "total_amount": total[keep],
+        "first_txn": pd.to_datetime(first[keep]),
+        "last_txn": pd.to_datetime(final[keep]),
+    }, columns=columns)
+
@@ -0,0 +1,129 @@
+# src/log.py
+"""
+Buffered, level-gated logging for the detectors, the CLI and the web app.
+
+Modules log through get_logger(name) ("aml.<name>" loggers) instead of
+printing. Calls below the configured level return after one integer
+comparison; callers that build per-row messages also check
+logger.isEnabledFor(DEBUG) first so nothing is formatted when it is off.
+
+configure() sends every record through a queue: the calling thread (a
+detection job, a waitress thread) only enqueues, and a single background
+listener thread writes to the handlers:
+    reports/system.log     rotated at max_bytes, `backups` old files kept
+    stderr (optional)      records at console_level and above
+A RotatingFileHandler must be the only writer of its file, so processes
+sharing a log directory (gunicorn -w 4) each write their own file: a
+"{pid}" in the file name (PER_PROCESS_LOG_FILE, wsgi.py's default) is
+replaced with the process id. Alternatively rotation="external" writes one
+shared file through a WatchedFileHandler, which reopens the file once
+logrotate has moved it.
+Until configure() is called, "aml" loggers discard their records, so
+importing the detectors has no logging side effects.
+"""
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+
+DEFAULT_LOG_FILE = os.path.join("reports", "system.log")
+PER_PROCESS_LOG_FILE = os.path.join("reports", "system-{pid}.log")
+ROTATIONS = ("size", "external")
+DEFAULT_MAX_BYTES = 10 * 2 ** 20
+DEFAULT_BACKUPS = 5
+DEFAULT_QUEUE_SIZE = 10000   # records buffered before callers start dropping them
+LOG_FORMAT = "%(asctime)s %(levelname)-7s %(name)s [%(threadName)s] %(message)s"
+
+ROOT = logging.getLogger("aml")
+ROOT.addHandler(logging.NullHandler())
+ROOT.propagate = False
+
+_lock = threading.Lock()
+_listener = None
+
+
+def get_logger(name):
+    """Logger for one module, e.g. get_logger("patterns") -> "aml.patterns\""""
+    return ROOT.getChild(name)
+
+
+def configure(level=None, log_file=DEFAULT_LOG_FILE, max_bytes=DEFAULT_MAX_BYTES, backups=DEFAULT_BACKUPS,
+              console_level=logging.WARNING, queue_size=DEFAULT_QUEUE_SIZE, rotation=None):
+    """
+    Route "aml" records through a queue to a rotating log file (and stderr).
+    Calling it again replaces the previous configuration.
+
+    :param level: Minimum level logged (name or number; default: LOG_LEVEL env var, else INFO)
+    :param log_file: Log file ("{pid}" is replaced with the process id), or None for no file
+    :param console_level: Minimum level echoed to stderr, or None for no console output
+    :param queue_size: Records buffered for the writer thread; further records are dropped
+        (counted in dropped()) rather than blocking the caller
+    :param rotation: "size" (rotated here, at max_bytes) or "external" (left to logrotate);
+        default: LOG_ROTATION env var, else "size"
+    :return: the QueueListener writing the records
+    """
+    global _listener
+    level = level or os.environ.get("LOG_LEVEL", "INFO")
+    rotation = rotation or os.environ.get("LOG_ROTATION", "size")
+    if rotation not in ROTATIONS:
+        raise ValueError(f"Unknown log rotation {rotation!r}; expected one of {', '.join(ROTATIONS)}")
+    handlers = []
+    if log_file:
+        log_file = log_file.replace("{pid}", str(os.getpid()))
+        os.makedirs(os.path.dirname(log_file) or ".", exist_ok=True)
+        if rotation == "external":
+            handlers.append(logging.handlers.WatchedFileHandler(log_file, encoding="utf-8", delay=True))
+        else:
+            handlers.append(logging.handlers.RotatingFileHandler(
+                log_file, maxBytes=max_bytes, backupCount=backups, encoding="utf-8", delay=True
+            ))
+    if console_level is not None:
+        console = logging.StreamHandler()
+        console.setLevel(console_level)
+        handlers.append(console)
+    formatter = logging.Formatter(LOG_FORMAT)
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    with _lock:
+        shutdown()
+        records = queue.Queue(maxsize=queue_size)
+        listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+        ROOT.handlers = [_DroppingQueueHandler(records)]
+        ROOT.setLevel(level.upper() if isinstance(level, str) else level)
+        listener.start()
+        _listener = listener
+    return listener
+
+
+def shutdown():
+    """Write out the queued records and stop the writer thread (also run at exit)"""
+    global _listener
+    listener, _listener = _listener, None
+    if listener is None:
+        return
+    ROOT.handlers = [logging.NullHandler()]
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
+
+
+def dropped():
+    """Records discarded because the queue was full"""
+    return _DroppingQueueHandler.dropped
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records instead of blocking when the writer falls behind"""
+    dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _DroppingQueueHandler.dropped += 1
+
+
+atexit.register(shutdown)
@@ -0,0 +1,284 @@
+# src/metrics.py
+"""
+In-process metrics: counters, histograms and sampled values, rendered in the
+Prometheus text format (/metrics in the web app) or as a JSON summary
+(end of run.py).
+
+Detector methods are wrapped with @instrumented(component). Every call
+records, labelled by component and rule:
+    aml_rule_duration_seconds          histogram of wall-clock time
+    aml_rule_rows_total                rows the detector was working on
+    aml_rule_alerts_total              alerts returned
+    aml_rule_peak_memory_delta_bytes   histogram of peak memory growth
+Peak memory growth is taken from tracemalloc while it is tracing (see
+src/profiling.py). Otherwise it comes from the process RSS high-water
+mark, which is exact when the call set a new peak and the net RSS change
+otherwise. Where neither /proc nor the POSIX-only `resource` module is
+available (Windows), the memory delta is not recorded.
+
+Metrics are per process: worker processes (src/parallel.py, gunicorn)
+each keep their own.
+"""
+import functools
+import json
+import math
+import sys
+import threading
+import time
+import tracemalloc
+
+from src import profiling
+
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+MEMORY_BUCKETS = tuple(2 ** power for power in range(16, 34, 2))   # 64 KiB .. 4 GiB
+
+
+class Counter:
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = None
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.sum += value
+        self.max = value if self.max is None else max(self.max, value)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}      # name -> (kind, help, {label items: metric})
+        self._callbacks = []    # (name, help, kind, fn() -> value), sampled on render
+        self._lock = threading.Lock()
+
+    def sampled(self, name, help_text, fn, kind="gauge"):
+        """A gauge (or counter kept elsewhere) read from fn() whenever metrics are rendered"""
+        with self._lock:
+            self._callbacks = [c for c in self._callbacks if c[0] != name] + [(name, help_text, kind, fn)]
+
+    def inc(self, name, help_text, amount=1, **labels):
+        """Thread-safe counter increment"""
+        with self._lock:
+            self._unlocked(name, "counter", help_text, labels, Counter).inc(amount)
+
+    def observe(self, name, help_text, value, buckets=DURATION_BUCKETS, **labels):
+        """Thread-safe histogram observation"""
+        with self._lock:
+            self._unlocked(name, "histogram", help_text, labels, lambda: Histogram(buckets)).observe(value)
+
+    def observe_rule(self, component, rule, seconds, rows=None, alerts=None, memory_delta=None):
+        """Record one detector call (what @instrumented does)"""
+        with self._lock:
+            labels = {"component": component, "rule": rule}
+            self._unlocked("aml_rule_duration_seconds", "histogram", "Detector call duration",
+                           labels, lambda: Histogram(DURATION_BUCKETS)).observe(seconds)
+            if rows is not None:
+                self._unlocked("aml_rule_rows_total", "counter", "Rows processed by detector calls",
+                               labels, Counter).inc(rows)
+            if alerts is not None:
+                self._unlocked("aml_rule_alerts_total", "counter", "Alerts emitted by detector calls",
+                               labels, Counter).inc(alerts)
+            if memory_delta is not None:
+                self._unlocked("aml_rule_peak_memory_delta_bytes", "histogram",
+                               "Peak memory growth during detector calls",
+                               labels, lambda: Histogram(MEMORY_BUCKETS)).observe(memory_delta)
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            callbacks = list(self._callbacks)
+            for name, (kind, help_text, series) in sorted(self._metrics.items()):
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+                for label_items, metric in series.items():
+                    lines += _render(name, kind, dict(label_items), metric)
+        for name, help_text, kind, fn in callbacks:
+            try:
+                value = fn()
+            except Exception:
+                continue
+            if value is None:
+                continue
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", f"{name} {_number(value)}"]
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        """
+        JSON-friendly per-rule summary:
+        {component: {rule: {calls, seconds, mean_seconds, max_seconds, rows, alerts, peak_memory_delta_bytes}}}
+        """
+        with self._lock:
+            series = {name: dict(entry[2]) for name, entry in self._metrics.items() if name.startswith("aml_rule_")}
+        summary = {}
+        for label_items, duration in series.get("aml_rule_duration_seconds", {}).items():
+            labels = dict(label_items)
+            memory = series.get("aml_rule_peak_memory_delta_bytes", {}).get(label_items)
+            rows = series.get("aml_rule_rows_total", {}).get(label_items)
+            alerts = series.get("aml_rule_alerts_total", {}).get(label_items)
+            summary.setdefault(labels["component"], {})[labels["rule"]] = {
+                "calls": duration.count,
+                "seconds": round(duration.sum, 6),
+                "mean_seconds": round(duration.sum / duration.count, 6) if duration.count else None,
+                "max_seconds": round(duration.max, 6) if duration.max is not None else None,
+                "rows": rows.value if rows else None,
+                "alerts": alerts.value if alerts else None,
+                "peak_memory_delta_bytes": memory.max if memory else None,
+            }
+        return summary
+
+    def summary_json(self, **options):
+        return json.dumps(self.summary(), **options)
+
+    def reset(self):
+        with self._lock:
+            self._metrics.clear()
+
+    def _unlocked(self, name, kind, help_text, labels, factory):
+        entry = self._metrics.get(name)
+        if entry is None:
+            entry = self._metrics[name] = (kind, help_text, {})
+        key = tuple(sorted(labels.items()))
+        series = entry[2]
+        if key not in series:
+            series[key] = factory()
+        return series[key]
+
+
+# Process-wide registry used by @instrumented, the web app and run.py
+REGISTRY = MetricsRegistry()
+
+
+def instrumented(component, rule=None, rows=None, registry=None):
+    """
+    Decorator recording duration, rows, alerts and peak memory growth of a
+    detector method.
+
+    :param component: "detector", "patterns", "analytics", ...
+    :param rule: Label (default: the method name), or callable(self, *args, **kwargs) -> label
+    :param rows: Callable(self) -> rows processed (default: len of self.transactions / transactions_df)
+
+    Inside an active src/profiling.ProfileSession the call is also profiled.
+    """
+    def decorate(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            label = rule(self, *args, **kwargs) if callable(rule) else (rule or method.__name__)
+            session = profiling.current()
+            memory = _MemoryProbe()
+            started = time.perf_counter()
+            try:
+                if session is None:
+                    return_value = method(self, *args, **kwargs)
+                else:
+                    with session.rule(f"{component}.{label}"):
+                        return_value = method(self, *args, **kwargs)
+            finally:
+                seconds = time.perf_counter() - started
+            (registry or REGISTRY).observe_rule(
+                component, label, seconds,
+                rows=(rows or _default_rows)(self),
+                alerts=_alert_count(return_value),
+                memory_delta=memory.delta()
+            )
+            return return_value
+        return wrapper
+    return decorate
+
+
+class _MemoryProbe:
+    """Peak memory growth since construction (tracemalloc when tracing, RSS high-water mark otherwise)"""
+
+    def __init__(self):
+        self.tracing = tracemalloc.is_tracing()
+        if self.tracing:
+            self.start = tracemalloc.get_traced_memory()[0]
+            self.peak_before = tracemalloc.get_traced_memory()[1]
+        else:
+            self.rss, self.hwm = _rss_and_hwm()
+
+    def delta(self):
+        if self.tracing:
+            current, peak = tracemalloc.get_traced_memory()
+            # Peak set before this call (e.g. by an enclosing one) says nothing about this call
+            return max(0, (peak if peak > self.peak_before else current) - self.start)
+        rss, hwm = _rss_and_hwm()
+        if self.rss is None or rss is None:
+            return None
+        return max(0, (hwm if hwm > self.hwm else rss) - self.rss)
+
+
+def _rss_and_hwm():
+    """(current RSS, peak RSS) in bytes; None for what this platform cannot tell"""
+    try:
+        values = {}
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(("VmRSS:", "VmHWM:")):
+                    key, value = line.split(":", 1)
+                    values[key] = int(value.split()[0]) * 1024
+        return values["VmRSS"], values["VmHWM"]
+    except (OSError, KeyError, ValueError):
+        pass
+    try:
+        import resource   # POSIX only
+    except ImportError:
+        return None, None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return None, peak if sys.platform == "darwin" else peak * 1024
+
+
+def _default_rows(detector):
+    for name in ("transactions", "transactions_df"):
+        frame = getattr(detector, name, None)
+        if frame is not None and hasattr(frame, "__len__"):
+            if len(frame) == 0 and getattr(detector, "aggregates", None) is not None:
+                return detector.aggregates.rows
+            return len(frame)
+    return None
+
+
+def _alert_count(value):
+    if isinstance(value, tuple) and value and isinstance(value[0], list):
+        value = value[0]   # (alerts, timings) from PatternDetector.run_all()
+    return len(value) if isinstance(value, list) else None
+
+
+def _render(name, kind, labels, metric):
+    if kind == "histogram":
+        lines, cumulative = [], 0
+        for bound, count in zip(metric.buckets, metric.counts):
+            cumulative += count
+            lines.append(f"{name}_bucket{_labels({**labels, 'le': _number(bound)})} {cumulative}")
+        lines.append(f"{name}_bucket{_labels({**labels, 'le': '+Inf'})} {metric.count}")
+        lines.append(f"{name}_sum{_labels(labels)} {_number(metric.sum)}")
+        lines.append(f"{name}_count{_labels(labels)} {metric.count}")
+        return lines
+    return [f"{name}{_labels(labels)} {_number(metric.value)}"]
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    escape = lambda v: str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+    return "{" + ",".join(f'{key}="{escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _number(value):
+    value = float(value)
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(int(value)) if value.is_integer() and abs(value) < 2 ** 53 else repr(value)
@@ -0,0 +1,154 @@
+# src/parallel.py
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from src.detector import MoneyLaunderingDetector
+from src.patterns import PatternDetector, PER_ACCOUNT_RULES
+
+# Columns shipped to workers. Strings travel as integer codes; only the
+# (small) category tables for account_id / transaction_type are pickled.
+STRING_COLUMNS = ["account_id", "transaction_type"]
+CODE_COLUMNS = ["counter_party", "transaction_id"]
+FLAG_COLUMNS = ["cash_transaction", "is_international"]
+DAILY_RULE_ORDER = {"structuring": 0, "custom": 1}
+
+
+def shard_ids(account_ids, shards):
+    """Stable hash partition of account ids; the same account always lands in the same shard."""
+    hashes = pd.util.hash_pandas_object(pd.Series(account_ids), index=False).to_numpy()
+    return (hashes % np.uint64(shards)).astype(np.int64)
+
+
+def detect_parallel(transactions, accounts=None, workers=None, thresholds=None,
+                    pattern_rules=PER_ACCOUNT_RULES, layering=True, shards=None, reference_time=None):
+    """
+    Run every per-account rule on account-hash shards in a process pool.
+
+    Columns are written once as memory-mapped .npy buffers ordered by shard;
+    each worker maps only its own row range, so no DataFrame is pickled.
+    Shard results are merged into the same order a single-process run gives.
+
+    :param workers: Pool size (default: $DETECTION_WORKERS, else os.cpu_count())
+    :param thresholds: Overrides for MoneyLaunderingDetector.thresholds
+    :param pattern_rules: PatternDetector per-account rules to run, () for none
+    :param layering: Also run PatternDetector.detect_layering on the full data
+    :param shards: Number of hash partitions (default: workers)
+    :param reference_time: "Now" for the recency-window rules (default: wall clock)
+    :return: (alerts, pattern_alerts)
+    """
+    workers = workers or int(os.environ.get("DETECTION_WORKERS", 0)) or os.cpu_count() or 1
+    shards = shards or workers
+    accounts = accounts if accounts is not None else pd.DataFrame()
+    thresholds = {**MoneyLaunderingDetector().thresholds, **(thresholds or {})}
+
+    timestamps = pd.to_datetime(transactions["timestamp"]).astype("datetime64[ns]")
+    row_shards = shard_ids(transactions["account_id"], shards)
+    order = np.argsort(row_shards, kind="stable")
+    offsets = np.searchsorted(row_shards[order], np.arange(shards + 1))
+
+    with tempfile.TemporaryDirectory(prefix="aml-shards-") as workdir:
+        columns, categories = {}, {}
+        columns["position"] = _write(workdir, "position", order)
+        columns["timestamp"] = _write(workdir, "timestamp", timestamps.to_numpy().view("int64")[order])
+        for name in STRING_COLUMNS + CODE_COLUMNS:
+            if name in transactions.columns:
+                codes, uniques = pd.factorize(transactions[name])
+                columns[name] = _write(workdir, name, codes[order])
+                if name in STRING_COLUMNS:
+                    categories[name] = np.asarray(uniques, dtype=object)
+        if "amount" in transactions.columns:
+            columns["amount"] = _write(workdir, "amount", pd.to_numeric(transactions["amount"]).to_numpy(dtype=np.float64)[order])
+        for name in FLAG_COLUMNS:
+            if name in transactions.columns:
+                flags = transactions[name].fillna(False).astype(bool).to_numpy()
+                columns[name] = _write(workdir, name, flags[order])
+
+        tasks = [
+            {
+                "columns": columns,
+                "categories": categories,
+                "start": int(offsets[shard]),
+                "stop": int(offsets[shard + 1]),
+                "thresholds": thresholds,
+                "pattern_rules": list(pattern_rules),
+                "reference_time": reference_time,
+            }
+            for shard in range(shards) if offsets[shard + 1] > offsets[shard]
+        ]
+
+        if workers == 1:
+            results = [_run_shard(task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(_run_shard, tasks))
+
+    alerts, pattern_alerts = _merge(results, pattern_rules, thresholds)
+    if layering:
+        frame = transactions.assign(timestamp=timestamps)
+        pattern_alerts.extend(PatternDetector(frame, accounts, reference_time=reference_time).detect_layering())
+    return alerts, pattern_alerts
+
+
+# ---------------------- Worker side ---------------------- #
+
+def _run_shard(task):
+    start, stop = task["start"], task["stop"]
+    frame = {}
+    for name, path in task["columns"].items():
+        # Copy just this shard's rows out of the shared pages
+        frame[name] = np.array(np.load(path, mmap_mode="r")[start:stop])
+    for name, uniques in task["categories"].items():
+        frame[name] = uniques[frame[name]]
+    frame["timestamp"] = frame["timestamp"].view("datetime64[ns]")
+    position = frame.pop("position")
+    transactions = pd.DataFrame(frame, index=position)
+
+    detector = MoneyLaunderingDetector(transactions)
+    detector.thresholds.update(task["thresholds"])
+    large = transactions["amount"] > detector.thresholds["large_txn_threshold"]
+    result = {
+        "large": list(zip(transactions.index[large].tolist(), transactions.loc[large, "account_id"].tolist(),
+                          transactions.loc[large, "amount"].tolist())),
+        "daily": detector._daily_findings(detector.daily_aggregates()),
+        "patterns": {},
+    }
+
+    if task["pattern_rules"]:
+        patterns = PatternDetector(transactions, pd.DataFrame(), reference_time=task["reference_time"])
+        for rule in task["pattern_rules"]:
+            result["patterns"][rule] = getattr(patterns, rule)()
+    return result
+
+
+# ---------------------- Merge ---------------------- #
+
+def _merge(results, pattern_rules, thresholds):
+    """Order shard output exactly like a single-process run"""
+    merger = MoneyLaunderingDetector()
+    merger.thresholds.update(thresholds)
+
+    large = sorted(hit for result in results for hit in result["large"])
+    daily = sorted(
+        (finding for result in results for finding in result["daily"]),
+        key=lambda finding: (DAILY_RULE_ORDER[finding[0][0]], finding[0][1], finding[0][2])
+    )
+    alerts = merger._build_alerts([account_id for _, account_id, _ in large], "Unusually Large Transaction",
+                                  [merger._large_fields(amount) for _, _, amount in large])
+    alerts.extend(merger._findings_alerts(daily))
+
+    pattern_alerts = []
+    for rule in pattern_rules:
+        rule_alerts = [alert for result in results for alert in result["patterns"][rule]]
+        rule_alerts.sort(key=lambda alert: (alert["account_id"], alert.get("date") or 0))
+        pattern_alerts.extend(rule_alerts)
+    return alerts, pattern_alerts
+
+
+def _write(workdir, name, values):
+    path = os.path.join(workdir, f"{name}.npy")
+    np.save(path, np.ascontiguousarray(values))
+    return path
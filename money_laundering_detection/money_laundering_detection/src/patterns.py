@@ -1,270 +1,474 @@
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-import networkx as nx
+import time
 from collections import Counter
+from src.features import DAY, FeatureFrame
+from src.graph import TransactionGraph, TransferIndex
+from src.layering import LAYERING_DEFAULTS, find_layering_chains
+from src.log import get_logger
+from src.metrics import instrumented
+from src.sketches import DEFAULT_PRECISION
+from src.smurfing import rolling_smurfing_windows
+from src.velocity import VELOCITY_WINDOWS, sliding_window_velocity
+
+log = get_logger("patterns")
+
+# Rules that only look at one account's own history; layering spans accounts
+PER_ACCOUNT_RULES = [
+    'detect_structuring',
+    'detect_smurfing',
+    'detect_round_amounts',
+    'detect_velocity_anomalies',
+    'detect_dormant_reactivation',
+]
+
+# Every rule run by run_all(), in report order
+ALL_RULES = [
+    'detect_structuring',
+    'detect_layering',
+    'detect_smurfing',
+    'detect_round_amounts',
+    'detect_velocity_anomalies',
+    'detect_dormant_reactivation',
+]
+
 
 class PatternDetector:
-    def __init__(self, transactions_df, accounts_df):
-        self.transactions_df = transactions_df
+    def __init__(self, transactions_df, accounts_df, reference_time=None):
+        self._transactions_df = transactions_df
         self.accounts_df = accounts_df
-        
+        # "Now" for recency windows; None means the wall clock
+        self.reference_time = reference_time
+        # Incremental state, created on the first update()
+        self._pending = []
+        self._account_history = None
+        self._alert_state = None
+        self._transfers = None
+        self._graph = None
+        self._features = None
+
+    @property
+    def transactions_df(self):
+        """Full transaction history, including batches added by update()"""
+        if self._pending:
+            self._transactions_df = pd.concat([self._transactions_df] + self._pending, ignore_index=True)
+            self._pending = []
+        return self._transactions_df
+
+    @transactions_df.setter
+    def transactions_df(self, value):
+        self._transactions_df = value
+        self._pending = []
+        self._account_history = None
+        self._alert_state = None
+        self._transfers = None
+        self._graph = None
+        self._features = None
+
+    def transaction_graph(self):
+        """Wire-transfer TransactionGraph shared by the graph-based rules (rebuilt after update())"""
+        if self._graph is None:
+            self._graph = TransactionGraph.from_transactions(self.transactions_df)
+        return self._graph
+
+    def features(self):
+        """Account-sorted FeatureFrame shared by the per-account rules (rebuilt after update())"""
+        if self._features is None:
+            self._features = FeatureFrame(self.transactions_df)
+        return self._features
+
+    @instrumented("patterns")
+    def run_all(self, rules=ALL_RULES):
+        """
+        Run every rule over one shared FeatureFrame and TransactionGraph.
+
+        :param rules: Rule method names, in the order their alerts are returned
+        :return: (alerts, timings) where timings maps 'features', 'graph',
+            each rule and 'total' to wall-clock seconds
+        """
+        timings = {}
+        started = time.perf_counter()
+
+        self.features()
+        timings['features'] = time.perf_counter() - started
+        if 'detect_layering' in rules:
+            mark = time.perf_counter()
+            self.transaction_graph()
+            timings['graph'] = time.perf_counter() - mark
+
+        alerts = []
+        for rule in rules:
+            mark = time.perf_counter()
+            alerts.extend(getattr(self, rule)())
+            timings[rule] = time.perf_counter() - mark
+        timings['total'] = time.perf_counter() - started
+
+        log.info("Pattern rule timings: %s", {name: round(seconds, 3) for name, seconds in timings.items()})
+        return alerts, timings
+
+    # ---------------------- Incremental Updates ---------------------- #
+
+    @instrumented("patterns", rows=lambda detector: _history_rows(detector))
+    def update(self, batch):
+        """
+        Append a micro-batch and re-run the per-account rules only for the
+        accounts it touches (structuring only for the touched account-days).
+        Layering is re-run only from the accounts whose chains can include
+        the batch's wire transfers (their senders and the senders' payers up
+        to max_hops - 1 hops back within time_window), on the subgraph those
+        chains can reach, so a batch costs its neighbourhood, not the history.
+        Returns alerts that are new or changed since the previous update.
+        """
+        if self._account_history is None:
+            self._start_incremental()
+
+        batch = batch.copy()
+        batch['timestamp'] = pd.to_datetime(batch['timestamp'])
+        self._pending.append(batch)
+        self._graph = None
+        self._features = None
+
+        for account_id, rows in batch.groupby('account_id', sort=False, observed=True):
+            history = self._account_history.get(account_id)
+            self._account_history[account_id] = rows if history is None else pd.concat([history, rows])
+
+        touched = set(batch['account_id'].unique())
+        scoped = PatternDetector(
+            pd.concat([self._account_history[account_id] for account_id in touched], ignore_index=True),
+            self.accounts_df,
+            reference_time=self.reference_time
+        )
+
+        touched_days = set(zip(batch['account_id'], batch['timestamp'].dt.date))
+        alerts = [
+            alert for alert in scoped.detect_structuring()
+            if (alert['account_id'], alert['date']) in touched_days
+        ]
+        for rule in PER_ACCOUNT_RULES[1:]:
+            alerts.extend(getattr(scoped, rule)())
+
+        # Per-account alerts that stopped firing are forgotten, so they are re-emitted if they return
+        scope = {
+            key for key in self._alert_state
+            if key[1] in touched and key[0] != 'Layering'
+            and (key[0] != 'Structuring' or (key[1], key[2]) in touched_days)
+        }
+        senders, times = self._transfers.add(batch)
+        if len(senders):
+            hops = LAYERING_DEFAULTS['max_hops']
+            window = pd.Timedelta(LAYERING_DEFAULTS['time_window']).value
+            sources = self._transfers.sources(senders, times, hops, window)
+            graph, degree = self._transfers.subgraph(sources, hops, window)
+            starts = graph.node_ids(list(sources))
+            chains = find_layering_chains(graph, starts=starts[starts >= 0], out_degree=degree)
+            alerts.extend(self._layering_alerts(chains))
+            scope |= {key for key in self._alert_state if key[0] == 'Layering' and key[1] in sources}
+
+        return self._diff_alerts(alerts, scope)
+
+    def _start_incremental(self):
+        """Split the loaded history by account and mark its current alerts as seen"""
+        history = self.transactions_df
+        self._account_history = {
+            account_id: rows for account_id, rows in history.groupby('account_id', sort=False, observed=True)
+        }
+        self._alert_state = {}
+        self._transfers = TransferIndex()
+        self._transfers.add(history)
+        if not history.empty:
+            alerts = [alert for rule in PER_ACCOUNT_RULES for alert in getattr(self, rule)()]
+            alerts.extend(self.detect_layering())
+            self._diff_alerts(alerts, set())
+
+    def _diff_alerts(self, alerts, scope):
+        """Keep alerts whose content differs from the last emitted version"""
+        emitted = []
+        seen = set()
+        for alert in alerts:
+            key = self._alert_key(alert)
+            signature = {k: v for k, v in alert.items() if k != 'detected_at'}
+            seen.add(key)
+            if self._alert_state.get(key) != signature:
+                self._alert_state[key] = signature
+                emitted.append(alert)
+
+        for key in scope - seen:
+            del self._alert_state[key]
+        return emitted
+
+    @staticmethod
+    def _alert_key(alert):
+        if alert['alert_type'] == 'Structuring':
+            return (alert['alert_type'], alert['account_id'], alert['date'])
+        if alert['alert_type'] == 'Layering':
+            return (alert['alert_type'], alert['account_id'], alert['path'])
+        return (alert['alert_type'], alert['account_id'], None)
+        
+    @instrumented("patterns")
     def detect_structuring(self):
         """Detect structuring patterns"""
-        print("🔍 Detecting Structuring Patterns...")
+        log.debug("Detecting Structuring Patterns")
         alerts = []
         
-        # Group by account and day
-        daily_groups = self.transactions_df.groupby([
-            'account_id',
-            self.transactions_df['timestamp'].dt.date
-        ]).agg({
-            'amount': ['sum', 'count'],
-            'cash_transaction': 'sum'
-        }).reset_index()
-        
-        daily_groups.columns = ['account_id', 'date', 'total_amount', 'txn_count', 'cash_count']
+        # Account-days are contiguous runs of the account-sorted feature frame
+        features = self.features()
+        if len(features) == 0:
+            log.info("Found 0 structuring patterns")
+            return alerts
+        
+        starts = features.runs(features.date)
+        total_amount = np.add.reduceat(features.amount, starts)
+        txn_count = np.diff(np.r_[starts, len(features)])
+        cash_count = np.add.reduceat(features.is_cash.astype(np.int64), starts)
+        
+        flagged = np.flatnonzero(
+            (features.date[starts] >= 0) &
+            (txn_count >= 3) &
+            (total_amount > 10000) &
+            (cash_count >= 2)
+        )
+        dates = pd.to_datetime(features.date[starts[flagged]] * DAY).date
+        
+        for i, date in zip(flagged, dates):
+            count, total, cash = int(txn_count[i]), total_amount[i], int(cash_count[i])
+            alerts.append({
+                'alert_type': 'Structuring',
+                'account_id': features.accounts[features.codes[starts[i]]],
+                'date': date,
+                'transaction_count': count,
+                'total_amount': total,
+                'risk_score': min(100, (count * 8) + (cash * 10)),
+                'description': f"Account made {count} transactions totaling ₹{total:,.2f}",
+                'detected_at': datetime.now()
+            })
+        
+        log.info("Found %d structuring patterns", len(alerts))
+        return alerts
+    
+    @instrumented("patterns")
+    def detect_layering(self, **options):
+        """Detect layering patterns (time-ordered wire-transfer chains, see src/layering.py)"""
+        log.debug("Detecting Layering Patterns")
         
-        for _, row in daily_groups.iterrows():
-            if (row['txn_count'] >= 3 and 
-                row['total_amount'] > 10000 and 
-                row['cash_count'] >= 2):
-                
-                alerts.append({
-                    'alert_type': 'Structuring',
-                    'account_id': row['account_id'],
-                    'date': row['date'],
-                    'transaction_count': row['txn_count'],
-                    'total_amount': row['total_amount'],
-                    'risk_score': min(100, (row['txn_count'] * 8) + (row['cash_count'] * 10)),
-                    'description': f"Account made {row['txn_count']} transactions totaling ₹{row['total_amount']:,.2f}",
-                    'detected_at': datetime.now()
-                })
+        # One chain per start account and 4-entity path prefix
+        alerts = self._layering_alerts(find_layering_chains(self.transaction_graph(), **options))
         
-        print(f"Found {len(alerts)} structuring patterns")
+        log.info("Found %d layering patterns", len(alerts))
         return alerts
     
-    def detect_layering(self):
-        """Detect layering patterns"""
-        print("🔍 Detecting Layering Patterns...")
+    @staticmethod
+    def _layering_alerts(chains):
+        """One Layering alert per chain found by find_layering_chains"""
         alerts = []
-        
-        # Create transaction network
-        G = nx.DiGraph()
-        
-        wire_transfers = self.transactions_df[
-            self.transactions_df['transaction_type'] == 'Wire Transfer'
-        ]
-        
-        for _, txn in wire_transfers.iterrows():
-            G.add_edge(
-                txn['account_id'], 
-                txn['counter_party'],
-                weight=txn['amount'],
-                timestamp=txn['timestamp'],
-                txn_id=txn['transaction_id']
-            )
-        
-        # Find complex transfer chains
-        for account in list(G.nodes())[:50]:  # Limit for performance
-            try:
-                # Find all paths from this account
-                for target in list(G.nodes())[:20]:
-                    if target != account and target in G:
-                        paths = list(nx.all_simple_paths(G, account, target, cutoff=5))
-                        
-                        for path in paths:
-                            if len(path) >= 3:
-                                total_amount = 0
-                                try:
-                                    for i in range(len(path)-1):
-                                        if G.has_edge(path[i], path[i+1]):
-                                            total_amount += G[path[i]][path[i+1]]['weight']
-                                except:
-                                    continue
-                                
-                                if total_amount > 100000:
-                                    alerts.append({
-                                        'alert_type': 'Layering',
-                                        'account_id': account,
-                                        'chain_length': len(path),
-                                        'total_amount': total_amount,
-                                        'path': ' → '.join(path[:4]),
-                                        'risk_score': min(100, (len(path) * 12) + (total_amount / 50000)),
-                                        'description': f"Complex transfer chain through {len(path)} entities",
-                                        'detected_at': datetime.now()
-                                    })
-            except Exception as e:
-                continue
-        
-        # Remove duplicate alerts
-        unique_alerts = {}
-        for alert in alerts:
-            key = f"{alert['account_id']}_{alert['path']}"
-            if key not in unique_alerts or unique_alerts[key]['risk_score'] < alert['risk_score']:
-                unique_alerts[key] = alert
-        
-        print(f"Found {len(unique_alerts)} layering patterns")
-        return list(unique_alerts.values())
+        for chain in chains.itertuples(index=False):
+            path = [str(node) for node in chain.nodes]
+            alerts.append({
+                'alert_type': 'Layering',
+                'account_id': chain.nodes[0],
+                'chain_length': len(path),
+                'total_amount': chain.total_amount,
+                'path': ' → '.join(path[:4]),
+                'first_txn': chain.first_txn,
+                'last_txn': chain.last_txn,
+                'risk_score': min(100, (len(path) * 12) + (chain.total_amount / 50000)),
+                'description': f"Complex transfer chain through {len(path)} entities",
+                'detected_at': datetime.now()
+            })
+        return alerts
     
-    def detect_smurfing(self):
-        """Detect smurfing patterns"""
-        print("🔍 Detecting Smurfing Patterns...")
+    @instrumented("patterns")
+    def detect_smurfing(self, approximate=False, precision=DEFAULT_PRECISION, **options):
+        """
+        Detect smurfing patterns.
+        
+        Looks at every rolling `window_days` window of cash deposits (see
+        src/smurfing.py), so a burst inside a long history is still found.
+        With `approximate=True` distinct depositors are estimated from
+        per-day HyperLogLog sketches instead of being counted exactly.
+        """
+        log.debug("Detecting Smurfing Patterns")
         alerts = []
         
         # Analyze cash deposits by account
-        cash_deposits = self.transactions_df[
-            self.transactions_df['cash_transaction'] == True
-        ]
-        
-        account_analysis = cash_deposits.groupby('account_id').agg({
-            'counter_party': 'nunique',
-            'amount': ['sum', 'count', 'std'],
-            'timestamp': ['min', 'max']
-        }).reset_index()
-        
-        account_analysis.columns = ['account_id', 'unique_depositors', 'total_amount', 
-                                   'txn_count', 'amount_std', 'first_txn', 'last_txn']
-        
-        for _, row in account_analysis.iterrows():
-            if (row['unique_depositors'] >= 6 and 
-                row['total_amount'] > 100000 and
-                row['txn_count'] >= 10):
-                
-                time_span = (row['last_txn'] - row['first_txn']).days
-                if time_span <= 45:  # Within 45 days
-                    alerts.append({
-                        'alert_type': 'Smurfing',
-                        'account_id': row['account_id'],
-                        'unique_depositors': row['unique_depositors'],
-                        'total_amount': row['total_amount'],
-                        'transaction_count': row['txn_count'],
-                        'time_period_days': time_span,
-                        'risk_score': min(100, (row['unique_depositors'] * 6) + (row['txn_count'] * 3)),
-                        'description': f"{row['unique_depositors']} depositors, ₹{row['total_amount']:,.2f} in {time_span} days",
-                        'detected_at': datetime.now()
-                    })
-        
-        print(f"Found {len(alerts)} smurfing patterns")
+        features = self.features()
+        cash_deposits = features.frame(features.is_cash & features.timed)
+        
+        windows = rolling_smurfing_windows(cash_deposits, approximate=approximate, precision=precision, **options)
+        
+        # Strongest window per account: most depositors, then largest total
+        best = windows.sort_values(
+            ['account_id', 'unique_depositors', 'total_amount'], ascending=[True, False, False], kind='stable'
+        ).drop_duplicates('account_id')
+        
+        for _, row in best.iterrows():
+            depositors = int(row['unique_depositors'])
+            txn_count = int(row['txn_count'])
+            time_span = (row['window_end'] - row['window_start']).days
+            alerts.append({
+                'alert_type': 'Smurfing',
+                'account_id': row['account_id'],
+                'unique_depositors': depositors,
+                'total_amount': row['total_amount'],
+                'transaction_count': txn_count,
+                'time_period_days': time_span,
+                'window_start': row['window_start'],
+                'window_end': row['window_end'],
+                'risk_score': min(100, (depositors * 6) + (txn_count * 3)),
+                'description': f"{depositors} depositors, ₹{row['total_amount']:,.2f} in {time_span} days",
+                'detected_at': datetime.now()
+            })
+        
+        log.info("Found %d smurfing patterns", len(alerts))
         return alerts
     
+    @instrumented("patterns")
     def detect_round_amounts(self):
         """Detect suspicious round amount patterns"""
-        print("🔍 Detecting Round Amount Patterns...")
+        log.debug("Detecting Round Amount Patterns")
         alerts = []
         
-        # Identify round amounts
-        self.transactions_df['is_round'] = self.transactions_df['amount'].apply(
-            lambda x: x % 1000 == 0 or x % 5000 == 0 or x % 10000 == 0 or x % 25000 == 0
+        # Round amounts (multiples of 1000, 5000, 10000 or 25000) are flagged in the feature frame
+        features = self.features()
+        round_count = features.account_sum(features.is_round.astype(np.int64))
+        total_txns = np.diff(features.offsets)
+        total_amount = features.account_sum(features.amount)
+        intl_count = features.account_sum(features.is_international.astype(np.int64))
+        round_percentage = round_count / np.maximum(total_txns, 1)
+        
+        flagged = np.flatnonzero(
+            (round_percentage > 0.6) &
+            (total_txns >= 5) &
+            (total_amount > 200000)
         )
         
-        account_round_analysis = self.transactions_df.groupby('account_id').agg({
-            'is_round': 'sum',
-            'transaction_id': 'count',
-            'amount': 'sum',
-            'is_international': 'sum'
-        }).reset_index()
-        
-        account_round_analysis.columns = ['account_id', 'round_count', 'total_txns', 
-                                         'total_amount', 'intl_count']
-        
-        account_round_analysis['round_percentage'] = (
-            account_round_analysis['round_count'] / account_round_analysis['total_txns']
-        )
-        
-        for _, row in account_round_analysis.iterrows():
-            if (row['round_percentage'] > 0.6 and 
-                row['total_txns'] >= 5 and
-                row['total_amount'] > 200000):
-                
-                alerts.append({
-                    'alert_type': 'Round Amount Fraud',
-                    'account_id': row['account_id'],
-                    'round_percentage': row['round_percentage'] * 100,
-                    'round_transactions': row['round_count'],
-                    'total_amount': row['total_amount'],
-                    'risk_score': min(100, (row['round_percentage'] * 60) + (row['intl_count'] * 8)),
-                    'description': f"{row['round_percentage']*100:.1f}% round amounts, total ₹{row['total_amount']:,.2f}",
-                    'detected_at': datetime.now()
-                })
-        
-        print(f"Found {len(alerts)} round amount patterns")
+        for i in flagged:
+            alerts.append({
+                'alert_type': 'Round Amount Fraud',
+                'account_id': features.accounts[i],
+                'round_percentage': round_percentage[i] * 100,
+                'round_transactions': int(round_count[i]),
+                'total_amount': total_amount[i],
+                'risk_score': min(100, (round_percentage[i] * 60) + (intl_count[i] * 8)),
+                'description': f"{round_percentage[i]*100:.1f}% round amounts, total ₹{total_amount[i]:,.2f}",
+                'detected_at': datetime.now()
+            })
+        
+        log.info("Found %d round amount patterns", len(alerts))
         return alerts
     
-    def detect_velocity_anomalies(self):
-        """Detect transaction velocity anomalies"""
-        print("🔍 Detecting Velocity Anomalies...")
+    @instrumented("patterns")
+    def detect_velocity_anomalies(self, windows=None, min_hourly_transactions=8):
+        """
+        Detect transaction velocity anomalies.
+        
+        Uses true sliding windows (see src/velocity.py): 8 transactions between
+        10:55 and 11:05 count as 8 in one hour, not 4 + 4 in two clock hours.
+        """
+        log.debug("Detecting Velocity Anomalies")
         alerts = []
         
-        # Calculate hourly velocity
-        self.transactions_df['date_hour'] = self.transactions_df['timestamp'].dt.floor('H')
-        
-        hourly_velocity = self.transactions_df.groupby(['account_id', 'date_hour']).agg({
-            'transaction_id': 'count',
-            'amount': 'sum'
-        }).reset_index()
-        
-        hourly_velocity.columns = ['account_id', 'date_hour', 'hourly_count', 'hourly_amount']
-        
-        # Find high velocity accounts
-        max_velocity = hourly_velocity.groupby('account_id')['hourly_count'].max()
-        
-        for account_id, max_vel in max_velocity.items():
-            if max_vel >= 8:  # 8+ transactions in one hour
-                account_data = hourly_velocity[hourly_velocity['account_id'] == account_id]
-                avg_amount = account_data['hourly_amount'].mean()
-                
-                alerts.append({
-                    'alert_type': 'High Velocity',
-                    'account_id': account_id,
-                    'max_hourly_transactions': max_vel,
-                    'avg_hourly_amount': avg_amount,
-                    'risk_score': min(100, (max_vel * 8) + (avg_amount / 20000)),
-                    'description': f"Up to {max_vel} transactions in single hour",
-                    'detected_at': datetime.now()
-                })
-        
-        print(f"Found {len(alerts)} velocity anomalies")
+        windows = {**VELOCITY_WINDOWS, **(windows or {})}
+        features = self.features()
+        velocity = sliding_window_velocity(features, windows)
+        
+        # Average amount per active clock hour, kept for the risk score
+        hour_starts = features.runs(features.hour)
+        hour_starts = hour_starts[features.timed[hour_starts]]
+        active_hours = np.bincount(features.codes[hour_starts], minlength=features.account_count)
+        total_amount = features.account_sum(features.amount)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            avg_hourly_amount = pd.Series(total_amount / active_hours, index=features.accounts)
+        velocity['avg_hourly_amount'] = avg_hourly_amount.reindex(velocity.index).to_numpy()
+        
+        flagged = velocity[velocity['max_count_1h'] >= min_hourly_transactions]
+        
+        for account_id, row in flagged.iterrows():
+            max_vel = int(row['max_count_1h'])
+            alert = {
+                'alert_type': 'High Velocity',
+                'account_id': account_id,
+                'max_hourly_transactions': max_vel,
+                'avg_hourly_amount': row['avg_hourly_amount'],
+            }
+            for name in windows:
+                alert[f'max_transactions_{name}'] = int(row[f'max_count_{name}'])
+                alert[f'max_amount_{name}'] = row[f'max_amount_{name}']
+            alert.update({
+                'risk_score': min(100, (max_vel * 8) + (row['avg_hourly_amount'] / 20000)),
+                'description': f"Up to {max_vel} transactions in any 60-minute window",
+                'detected_at': datetime.now()
+            })
+            alerts.append(alert)
+        
+        log.info("Found %d velocity anomalies", len(alerts))
         return alerts
     
-    def detect_dormant_reactivation(self):
-        """Detect dormant account reactivation"""
-        print("🔍 Detecting Dormant Account Reactivation...")
+    @instrumented("patterns")
+    def detect_dormant_reactivation(self, reference_time=None):
+        """
+        Detect dormant account reactivation.
+        
+        Single pass: one sort by (account_id, timestamp), then grouped gaps and
+        recent-window sums. `reference_time` (default: self.reference_time, else
+        now) anchors the 30-day recent window, and transactions after it are
+        ignored, so backfills are reproducible when later data arrives.
+        """
+        log.debug("Detecting Dormant Account Reactivation")
         alerts = []
         
-        account_activity = self.transactions_df.groupby('account_id').agg({
-            'timestamp': ['min', 'max', 'count'],
-            'amount': 'sum'
-        }).reset_index()
-        
-        account_activity.columns = ['account_id', 'first_txn', 'last_txn', 'txn_count', 'total_amount']
-        
-        for _, row in account_activity.iterrows():
-            if row['txn_count'] >= 2:
-                account_txns = self.transactions_df[
-                    self.transactions_df['account_id'] == row['account_id']
-                ].sort_values('timestamp')
-                
-                # Find gaps in activity
-                gaps = account_txns['timestamp'].diff().dt.days
-                max_gap = gaps.max()
-                
-                if max_gap >= 90:  # 90+ days dormant
-                    recent_txns = account_txns[
-                        account_txns['timestamp'] >= (datetime.now() - timedelta(days=30))
-                    ]
-                    
-                    if len(recent_txns) >= 3 and recent_txns['amount'].sum() > 200000:
-                        alerts.append({
-                            'alert_type': 'Dormant Reactivation',
-                            'account_id': row['account_id'],
-                            'dormant_period_days': int(max_gap),
-                            'recent_transactions': len(recent_txns),
-                            'recent_amount': recent_txns['amount'].sum(),
-                            'risk_score': min(100, (max_gap / 5) + (len(recent_txns) * 8)),
-                            'description': f"Dormant {int(max_gap)} days, then ₹{recent_txns['amount'].sum():,.2f}",
-                            'detected_at': datetime.now()
-                        })
+        reference_time = pd.Timestamp(reference_time or self.reference_time or datetime.now())
+        recent_start = reference_time - timedelta(days=30)
+        
+        # Gap to the previous transaction of the same account, on the account-sorted feature frame
+        features = self.features()
+        timed = features.timed.copy()
+        timed[timed] = features.timestamp[timed] <= reference_time.value
+        codes, ts, amount = features.codes[timed], features.timestamp[timed], features.amount[timed]
+        same_account = np.r_[False, codes[1:] == codes[:-1]]
+        gap = np.where(same_account, np.r_[0, np.diff(ts)] // DAY, -1)
+        recent = ts >= recent_start.value
+        
+        account_activity = pd.DataFrame({
+            'account_id': features.accounts,
+            'txn_count': np.bincount(codes, minlength=features.account_count),
+            'max_gap': _account_max(codes, gap, features.account_count),
+            'recent_transactions': np.bincount(codes, weights=recent, minlength=features.account_count),
+            'recent_amount': np.bincount(codes, weights=np.where(recent, amount, 0), minlength=features.account_count),
+        })
+        
+        flagged = account_activity[
+            (account_activity['txn_count'] >= 2) &
+            (account_activity['max_gap'] >= 90) &           # 90+ days dormant
+            (account_activity['recent_transactions'] >= 3) &
+            (account_activity['recent_amount'] > 200000)
+        ]
         
-        print(f"Found {len(alerts)} dormant reactivation patterns")
-        return alerts
\ No newline at end of file
+        for row in flagged.itertuples(index=False):
+            alerts.append({
+                'alert_type': 'Dormant Reactivation',
+                'account_id': row.account_id,
+                'dormant_period_days': int(row.max_gap),
+                'recent_transactions': int(row.recent_transactions),
+                'recent_amount': row.recent_amount,
+                'risk_score': min(100, (row.max_gap / 5) + (row.recent_transactions * 8)),
+                'description': f"Dormant {int(row.max_gap)} days, then ₹{row.recent_amount:,.2f}",
+                'detected_at': datetime.now()
+            })
+        
+        log.info("Found %d dormant reactivation patterns", len(alerts))
+        return alerts
+
+
+def _account_max(codes, values, accounts):
+    """Per-account maximum over rows sorted by account code (-1 for accounts without rows)"""
+    result = np.full(accounts, -1, dtype=np.int64)
+    if len(codes):
+        segments = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+        result[codes[segments]] = np.maximum.reduceat(values, segments)
+    return result
+
+
+def _history_rows(detector):
+    """Rows loaded so far, counted without concatenating the pending batches"""
+    return len(detector._transactions_df) + sum(len(batch) for batch in detector._pending)
@@ -0,0 +1,185 @@
+# src/profiling.py
+"""
+Opt-in per-rule profiling (run.py --profile, X-Profile: 1 on
+/api/run-detection).
+
+While a ProfileSession is active in a thread, every @instrumented detector
+call made by that thread (src/metrics.py) is profiled on its own:
+    cProfile       the rule's functions and lines, excluding nested rules
+                   (those get their own profile)
+    tracemalloc    peak memory growth and the source lines that allocated
+                   the most memory during the rule
+save() writes, per rule, <component>.<rule>.prof (load with pstats or
+snakeviz) and <component>.<rule>.txt, plus a summary.txt, under
+reports/profiles/<session>/.
+
+With no active session, the only cost is one thread-local lookup per
+detector call. tracemalloc is process-wide: while it traces, other threads
+run slower and their allocations are counted too, and each rule boundary
+takes a snapshot (up to about a second on large heaps); memory=False
+profiles time only.
+"""
+import cProfile
+import io
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+
+DEFAULT_DIRECTORY = os.path.join("reports", "profiles")
+DEFAULT_TOP = 30
+
+_local = threading.local()
+_tracing_lock = threading.Lock()
+_tracing_sessions = 0   # active sessions that need tracemalloc
+
+
+def current():
+    """The ProfileSession active in this thread, or None"""
+    sessions = getattr(_local, "sessions", None)
+    return sessions[-1] if sessions else None
+
+
+class ProfileSession:
+    def __init__(self, name=None, directory=DEFAULT_DIRECTORY, top=DEFAULT_TOP, memory=True):
+        """
+        :param name: Sub-directory of `directory` for this session's reports (default: timestamp)
+        :param top: Functions and allocation sites listed per text report
+        :param memory: Also trace allocations (slower; turn off for timing-only profiles)
+        """
+        self.name = name or f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        self.path = os.path.join(directory, self.name)
+        self.top = top
+        self.memory = memory
+        self._rules = {}    # label -> {"calls", "seconds", "stats", "peak", "allocations"}
+        self._lock = threading.Lock()
+
+    # ---------------------- Activation ---------------------- #
+
+    def start(self):
+        """Profile this thread's instrumented calls until stop()"""
+        global _tracing_sessions
+        if self.memory:
+            with _tracing_lock:
+                if _tracing_sessions == 0 and not tracemalloc.is_tracing():
+                    tracemalloc.start()
+                _tracing_sessions += 1
+        _local.__dict__.setdefault("sessions", []).append(self)
+
+    def stop(self):
+        global _tracing_sessions
+        _local.sessions.remove(self)
+        if self.memory:
+            with _tracing_lock:
+                _tracing_sessions -= 1
+                if _tracing_sessions == 0 and tracemalloc.is_tracing():
+                    tracemalloc.stop()
+
+    @contextmanager
+    def activate(self):
+        self.start()
+        try:
+            yield self
+        finally:
+            self.stop()
+
+    @contextmanager
+    def rule(self, label):
+        """Profile one rule call; the enclosing rule's profiler pauses meanwhile"""
+        stack = _local.__dict__.setdefault("stack", [])
+        if stack:
+            stack[-1].disable()
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            before = tracemalloc.take_snapshot()
+            start, peak_before = tracemalloc.get_traced_memory()
+        profile = cProfile.Profile()
+        stack.append(profile)
+        started = time.perf_counter()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            seconds = time.perf_counter() - started
+            stack.pop()
+            peak = allocations = None
+            if tracing and tracemalloc.is_tracing():
+                current, peak_now = tracemalloc.get_traced_memory()
+                peak = max(0, (peak_now if peak_now > peak_before else current) - start)
+                allocations = _top_allocations(tracemalloc.take_snapshot().compare_to(before, "lineno"), self.top)
+            self._record(label, profile, seconds, peak, allocations)
+            if stack:
+                stack[-1].enable()
+
+    # ---------------------- Reports ---------------------- #
+
+    def save(self):
+        """Write .prof/.txt per rule and summary.txt; returns the paths written"""
+        os.makedirs(self.path, exist_ok=True)
+        with self._lock:
+            rules = dict(self._rules)
+        written = []
+        summary = [f"Profile session {self.name}", "",
+                   f"{'rule':<50} {'calls':>6} {'seconds':>10} {'peak MB':>9}"]
+        for label, entry in sorted(rules.items(), key=lambda item: -item[1]["seconds"]):
+            stem = os.path.join(self.path, _safe(label))
+            entry["stats"].dump_stats(stem + ".prof")
+            with open(stem + ".txt", "w") as f:
+                f.write(self._text_report(label, entry))
+            written += [stem + ".prof", stem + ".txt"]
+            peak = "-" if entry["peak"] is None else f"{entry['peak'] / 2 ** 20:.2f}"
+            summary.append(f"{label:<50} {entry['calls']:>6} {entry['seconds']:>10.4f} {peak:>9}")
+        with open(os.path.join(self.path, "summary.txt"), "w") as f:
+            f.write("\n".join(summary) + "\n")
+        written.append(os.path.join(self.path, "summary.txt"))
+        return written
+
+    def rules(self):
+        """{label: {"calls", "seconds", "peak_memory_bytes"}} profiled so far"""
+        with self._lock:
+            return {label: {"calls": entry["calls"], "seconds": round(entry["seconds"], 6),
+                            "peak_memory_bytes": entry["peak"]}
+                    for label, entry in self._rules.items()}
+
+    def _record(self, label, profile, seconds, peak, allocations):
+        with self._lock:
+            entry = self._rules.get(label)
+            if entry is None:
+                self._rules[label] = {"calls": 1, "seconds": seconds, "stats": pstats.Stats(profile),
+                                      "peak": peak, "allocations": allocations}
+                return
+            entry["calls"] += 1
+            entry["seconds"] += seconds
+            entry["stats"].add(profile)
+            if peak is not None and (entry["peak"] is None or peak > entry["peak"]):
+                entry["peak"], entry["allocations"] = peak, allocations
+
+    def _text_report(self, label, entry):
+        out = io.StringIO()
+        out.write(f"{label}: {entry['calls']} call(s), {entry['seconds']:.4f}s wall clock\n\n")
+        out.write(f"Top {self.top} functions by cumulative time (nested rules excluded)\n")
+        stats = entry["stats"]
+        stats.stream = out
+        stats.sort_stats("cumulative").print_stats(self.top)
+        if entry["peak"] is None:
+            out.write("\nMemory: not traced\n")
+        else:
+            out.write(f"\nPeak memory growth: {entry['peak'] / 2 ** 20:.2f} MB (largest call)\n")
+            out.write(f"Top {self.top} allocation sites (net, by line)\n")
+            for stat in entry["allocations"] or []:
+                out.write(f"  {stat}\n")
+        return out.getvalue()
+
+
+def _top_allocations(differences, top):
+    """Largest growth first, without this module's and tracemalloc's own allocations"""
+    own = (tracemalloc.__file__, __file__)
+    return [stat for stat in differences if stat.size_diff > 0 and stat.traceback[0].filename not in own][:top]
+
+
+def _safe(label):
+    return "".join(c if c.isalnum() or c in "-_." else "_" for c in label)
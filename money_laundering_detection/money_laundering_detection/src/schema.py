@@ -0,0 +1,249 @@
+# src/schema.py
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+# How each known column is stored in memory. Unknown columns are left as read.
+#   id        - categorical when values repeat (codes + one copy of each string),
+#               integer ids downcast to the narrowest integer type
+#   category  - always categorical
+#   timestamp - datetime64[ns], parsed once at load
+#   amount    - float32 when that is lossless for every value, else float64
+#   flag      - bool
+TRANSACTION_SCHEMA = {
+    "transaction_id": "id",
+    "account_id": "category",
+    "counter_party": "category",
+    "transaction_type": "category",
+    "type": "category",
+    "timestamp": "timestamp",
+    "amount": "amount",
+    "cash_transaction": "flag",
+    "is_international": "flag",
+    "is_suspicious": "flag",
+    "typology": "category",         # ground-truth label in generated data (src/generator.py)
+}
+
+ACCOUNT_SCHEMA = {
+    "account_id": "category",
+    "customer_name": "id",
+    "country": "category",
+    "risk_level": "category",
+}
+
+# Columns a file must have to be loaded at all
+REQUIRED_COLUMNS = {
+    "transactions": ["account_id", "amount", "timestamp"],
+    "accounts": ["account_id"],
+}
+
+# An "id" column becomes categorical below this unique-values / rows ratio;
+# near-unique ids (e.g. transaction_id) are smaller as plain values
+CATEGORY_MAX_RATIO = 0.5
+
+
+# Columns each detector reads; loaders can project to just these
+DETECTOR_COLUMNS = {
+    "detector": ["account_id", "amount", "timestamp"],
+    "patterns": ["transaction_id", "account_id", "counter_party", "amount", "transaction_type",
+                 "timestamp", "cash_transaction", "is_international"],
+    "analytics": ["account_id", "amount", "type"],
+    "compliance": ["transaction_id", "account_id", "counter_party", "amount", "transaction_type",
+                   "timestamp", "cash_transaction"],
+}
+
+
+class SchemaError(ValueError):
+    """Input that does not match the expected columns or types"""
+
+
+def columns_for(*detectors):
+    """Union of DETECTOR_COLUMNS for the given detectors, in first-seen order"""
+    return list(dict.fromkeys(name for detector in detectors for name in DETECTOR_COLUMNS[detector]))
+
+
+def read_transactions(filepath_or_buffer, chunksize=None, columns=None, start=None, end=None, **read_csv_kwargs):
+    """
+    Read transactions straight into the compact layout (see compact()).
+
+    CSV files are parsed; Parquet/Arrow files and partitioned directories go
+    through src/columnar.py (pyarrow), which pushes the projection and the
+    date range down to the files.
+
+    :param chunksize: Return an iterator of compacted chunks instead
+    :param columns: Only these columns (missing ones are ignored)
+    :param start: Keep timestamps >= start
+    :param end: Keep timestamps < end
+    """
+    from src.columnar import is_columnar
+
+    if is_columnar(filepath_or_buffer):
+        from src.columnar import iter_columnar, read_columnar
+
+        if chunksize:
+            return iter_columnar(filepath_or_buffer, chunksize, columns=columns, start=start, end=end)
+        return read_columnar(filepath_or_buffer, columns=columns, start=start, end=end)
+
+    if columns is not None:
+        read_csv_kwargs["usecols"] = lambda name: name in columns
+    frames = _read(filepath_or_buffer, TRANSACTION_SCHEMA, chunksize, read_csv_kwargs)
+    if start is None and end is None:
+        return frames
+    if chunksize:
+        return (filter_dates(chunk, start, end) for chunk in frames)
+    return filter_dates(frames, start, end)
+
+
+def read_accounts(filepath_or_buffer, **read_csv_kwargs):
+    """Read an accounts CSV (or Parquet/Arrow file) into the compact layout"""
+    from src.columnar import is_columnar
+
+    if is_columnar(filepath_or_buffer):
+        from src.columnar import read_columnar
+
+        return read_columnar(filepath_or_buffer, schema=ACCOUNT_SCHEMA)
+    return _read(filepath_or_buffer, ACCOUNT_SCHEMA, None, read_csv_kwargs)
+
+
+def compact(frame, schema=TRANSACTION_SCHEMA):
+    """
+    Copy of `frame` with every schema column in its compact dtype.
+    Categoricals keep the original values, so detectors group and compare on
+    the integer codes without converting back to strings.
+    """
+    columns = {}
+    for name in frame.columns:
+        kind = schema.get(name)
+        column = frame[name]
+        if kind == "category":
+            column = _sorted_categories(column.astype("category"))
+        elif kind == "id":
+            if not isinstance(column.dtype, pd.CategoricalDtype) and column.dtype == object \
+                    and column.nunique() < CATEGORY_MAX_RATIO * len(column):
+                column = column.astype("category")
+            elif pd.api.types.is_integer_dtype(column.dtype):
+                column = pd.to_numeric(column, downcast="integer")
+        elif kind == "timestamp":
+            column = pd.to_datetime(column).astype("datetime64[ns]")
+        elif kind == "amount":
+            column = _narrow_float(pd.to_numeric(column))
+        elif kind == "flag":
+            column = column.where(column.notna(), False).astype(bool)
+        columns[name] = column
+    return pd.DataFrame(columns, index=frame.index)
+
+
+def validate(chunk, schema=TRANSACTION_SCHEMA, required=(), first_line=2):
+    """
+    Check one raw (just parsed) chunk and return it with amount and timestamp
+    columns converted, ready for compact().
+
+    :param required: Columns that must be present
+    :param first_line: File line number of the chunk's first row, for messages
+    :raises SchemaError: naming the first offending line and value
+    """
+    missing = [name for name in required if name not in chunk.columns]
+    if missing:
+        raise SchemaError(f"Missing required columns: {', '.join(missing)}")
+
+    chunk = chunk.copy()
+    for name in chunk.columns:
+        kind = schema.get(name)
+        if kind == "amount":
+            converted = pd.to_numeric(chunk[name], errors="coerce")
+        elif kind == "timestamp":
+            converted = pd.to_datetime(chunk[name], errors="coerce")
+        else:
+            continue
+        bad = np.flatnonzero(converted.isna().to_numpy() & chunk[name].notna().to_numpy())
+        if len(bad):
+            value = chunk[name].iloc[bad[0]]
+            expected = "a number" if kind == "amount" else "a timestamp"
+            raise SchemaError(f"Line {first_line + bad[0]}: {name} {value!r} is not {expected} "
+                              f"({len(bad)} bad value(s) in this chunk)")
+        chunk[name] = converted
+    return chunk
+
+
+def concat_compact(chunks, schema=TRANSACTION_SCHEMA, consume=False):
+    """
+    Concatenate compacted chunks without losing the compact layout:
+    categoricals with different categories are unioned (pd.concat would turn
+    them back into object columns).
+
+    Columns are concatenated one at a time. With consume=True each column is
+    dropped from the chunks once it has been concatenated, so the chunks and
+    the result together hold little more than one copy of the data (the
+    chunks are left empty).
+    """
+    chunks = list(chunks)
+    if not chunks:
+        return pd.DataFrame()
+    if len(chunks) == 1:
+        return chunks[0].reset_index(drop=True)
+
+    columns = {}
+    for name in list(chunks[0].columns):
+        parts = [chunk[name] for chunk in chunks]
+        if all(isinstance(part.dtype, pd.CategoricalDtype) for part in parts):
+            column = pd.Series(union_categoricals(parts, sort_categories=True), name=name)
+        else:
+            parts = [part.astype(object) if isinstance(part.dtype, pd.CategoricalDtype) else part for part in parts]
+            column = pd.concat(parts, ignore_index=True)
+        del parts
+        if consume:
+            for chunk in chunks:
+                del chunk[name]
+        columns[name] = compact(column.to_frame(), schema)[name]
+    return pd.DataFrame(columns, copy=False)
+
+
+def memory_report(frame):
+    """
+    Per-column dtype and bytes in memory (string payloads included), with a
+    'total' row.
+    """
+    usage = frame.memory_usage(index=False, deep=True)
+    report = pd.DataFrame({"dtype": frame.dtypes.astype(str), "bytes": usage})
+    report.loc["total"] = ["", int(usage.sum())]
+    report["megabytes"] = (report["bytes"] / 2 ** 20).round(2)
+    return report
+
+
+def _read(filepath_or_buffer, schema, chunksize, read_csv_kwargs):
+    # Categorical columns are built by the CSV parser itself (no object column in between)
+    dtype = {name: "category" for name, kind in schema.items() if kind == "category"}
+    dtype.update(read_csv_kwargs.pop("dtype", {}) or {})
+    reader = pd.read_csv(filepath_or_buffer, dtype=dtype, chunksize=chunksize, **read_csv_kwargs)
+    if chunksize:
+        return (compact(chunk, schema) for chunk in reader)
+    return compact(reader, schema)
+
+
+def filter_dates(frame, start=None, end=None):
+    """Rows with start <= timestamp < end (either bound may be None)"""
+    if start is None and end is None:
+        return frame
+    keep = pd.Series(True, index=frame.index)
+    if start is not None:
+        keep &= frame["timestamp"] >= pd.Timestamp(start)
+    if end is not None:
+        keep &= frame["timestamp"] < pd.Timestamp(end)
+    return frame[keep].reset_index(drop=True)
+
+
+def _sorted_categories(column):
+    """Same category order whatever the source (CSV parser, Arrow dictionary, ...)"""
+    categories = column.cat.categories
+    if categories.is_monotonic_increasing:
+        return column
+    return column.cat.reorder_categories(categories.sort_values())
+
+
+def _narrow_float(column):
+    if not pd.api.types.is_float_dtype(column.dtype) and not pd.api.types.is_integer_dtype(column.dtype):
+        return column
+    values = column.to_numpy(dtype=np.float64)
+    narrow = values.astype(np.float32)
+    same = (narrow.astype(np.float64) == values) | np.isnan(values)
+    return column.astype(np.float32) if same.all() else column.astype(np.float64)
@@ -0,0 +1,180 @@
+# src/smurfing.py
+import numpy as np
+import pandas as pd
+
+from src.utils import expansion_batches
+from src.sketches import DEFAULT_PRECISION, estimate, hash_values, register_ranks
+from src.velocity import rolling_window_starts
+
+# Rolling-window smurfing settings used by PatternDetector.detect_smurfing
+SMURFING_DEFAULTS = {
+    "window_days": 45,
+    "min_depositors": 6,
+    "min_transactions": 10,
+    "min_total_amount": 100000,
+}
+
+# Window members materialized at once when counting depositors
+EXPANSION_BATCH = 4000000
+DAY = pd.Timedelta(days=1).value
+COLUMNS = ["account_id", "window_start", "window_end", "txn_count", "total_amount", "unique_depositors"]
+
+
+def rolling_smurfing_windows(cash, approximate=False, precision=DEFAULT_PRECISION, **options):
+    """
+    Cash-deposit windows that meet every smurfing threshold.
+
+    Exact mode: one window (t - window_days, t] per deposit. Count and total
+    come from prefix sums; unique depositors are counted only for windows
+    that already pass the count and total thresholds.
+
+    Approximate mode: windows are whole days (the `window_days` days ending
+    at each active day) and depositors are estimated from per-(account, day)
+    HyperLogLog sketches, which stay bounded in size and merge across shards
+    (see depositor_sketches / merge_sketches).
+
+    :param cash: Cash deposits with account_id, counter_party, amount, timestamp
+    :param options: Overrides for SMURFING_DEFAULTS
+    :return: DataFrame, one row per qualifying window
+    """
+    settings = {**SMURFING_DEFAULTS, **options}
+    cash = cash[cash["timestamp"].notna()]
+    if cash.empty:
+        return pd.DataFrame(columns=COLUMNS)
+
+    if approximate:
+        return _approximate_windows(cash, settings, precision)
+    return _exact_windows(cash, settings)
+
+
+def depositor_sketches(cash, precision=DEFAULT_PRECISION):
+    """
+    Sparse per-(account, day) HyperLogLog registers of counter parties:
+    account_id, day (int days since epoch), register, rank.
+    """
+    register, rank = register_ranks(hash_values(cash["counter_party"].array), precision)
+    sketches = pd.DataFrame({
+        "account_id": cash["account_id"].array,
+        "day": _days(cash["timestamp"]),
+        "register": register,
+        "rank": rank,
+    })
+    return merge_sketches(sketches)
+
+
+def merge_sketches(*tables):
+    """Union of sketch tables (e.g. from chunks or shards): max rank per register"""
+    sketches = pd.concat(tables, ignore_index=True) if len(tables) > 1 else tables[0]
+    return sketches.groupby(["account_id", "day", "register"], as_index=False, sort=True, observed=True)["rank"].max()
+
+
+# ---------------------- Exact ---------------------- #
+
+def _exact_windows(cash, settings):
+    codes, accounts = pd.factorize(cash["account_id"], sort=True)
+    parties = pd.factorize(cash["counter_party"])[0]
+    ts = cash["timestamp"].to_numpy().astype("datetime64[ns]").view("int64")
+    amount = cash["amount"].to_numpy(dtype=np.float64)
+
+    order = np.lexsort((ts, codes))
+    codes, parties, ts, amount = codes[order].astype(np.int64), parties[order], ts[order], amount[order]
+
+    window = pd.Timedelta(days=settings["window_days"])
+    start = rolling_window_starts(codes, ts, [window])[0]
+    end = np.arange(len(ts))
+    prefix = np.concatenate([[0.0], np.cumsum(amount)])
+    count = end - start + 1
+    total = prefix[end + 1] - prefix[start]
+
+    candidate = np.flatnonzero((count >= settings["min_transactions"]) & (total > settings["min_total_amount"]))
+
+    # previous[j]: earlier deposit into the same account from the same counter party (-1 if none);
+    # j counts as a new depositor in window [s, i] when previous[j] < s
+    by_party = np.lexsort((end, parties, codes))
+    same = np.r_[False, (codes[by_party][1:] == codes[by_party][:-1]) & (parties[by_party][1:] == parties[by_party][:-1])]
+    previous = np.full(len(ts), -1)
+    previous[by_party[same]] = by_party[np.flatnonzero(same) - 1]
+
+    depositors = np.zeros(len(candidate), dtype=np.int64)
+    for chunk in expansion_batches(count[candidate], EXPANSION_BATCH):
+        owner = np.repeat(chunk, count[candidate[chunk]])
+        member = start[candidate[owner]] + (np.arange(len(owner)) - np.repeat(
+            np.cumsum(count[candidate[chunk]]) - count[candidate[chunk]], count[candidate[chunk]]
+        ))
+        first_seen = previous[member] < start[candidate[owner]]
+        depositors += np.bincount(owner[first_seen], minlength=len(candidate))
+
+    windows = pd.DataFrame({
+        "account_id": accounts[codes[candidate]],
+        "window_start": pd.to_datetime(ts[start[candidate]]),
+        "window_end": pd.to_datetime(ts[candidate]),
+        "txn_count": count[candidate],
+        "total_amount": total[candidate],
+        "unique_depositors": depositors,
+    }, columns=COLUMNS)
+    return windows[windows["unique_depositors"] >= settings["min_depositors"]].reset_index(drop=True)
+
+
+# ---------------------- Approximate ---------------------- #
+
+def _approximate_windows(cash, settings, precision):
+    days = _days(cash["timestamp"])
+    daily = pd.DataFrame({
+        "account_id": cash["account_id"].array,
+        "day": days,
+        "amount": cash["amount"].to_numpy(dtype=np.float64),
+        "timestamp": cash["timestamp"].to_numpy(),
+    }).groupby(["account_id", "day"], as_index=False, sort=True, observed=True).agg(
+        txn_count=("amount", "size"),
+        total_amount=("amount", "sum"),
+        first_txn=("timestamp", "min"),
+        last_txn=("timestamp", "max"),
+    )
+
+    codes = pd.factorize(daily["account_id"], sort=True)[0].astype(np.int64)
+    start = rolling_window_starts(codes, daily["day"].to_numpy() * DAY, [pd.Timedelta(days=settings["window_days"])])[0]
+    end = np.arange(len(daily))
+    count = np.concatenate([[0], np.cumsum(daily["txn_count"].to_numpy())])
+    total = np.concatenate([[0.0], np.cumsum(daily["total_amount"].to_numpy())])
+    count = count[end + 1] - count[start]
+    total = total[end + 1] - total[start]
+
+    candidate = np.flatnonzero((count >= settings["min_transactions"]) & (total > settings["min_total_amount"]))
+
+    # Sketch entries are sorted by (account, day), i.e. by daily row
+    sketches = depositor_sketches(cash, precision)
+    row = pd.MultiIndex.from_frame(daily[["account_id", "day"]]).get_indexer(
+        pd.MultiIndex.from_frame(sketches[["account_id", "day"]])
+    )
+    bounds = np.searchsorted(row, np.arange(len(daily) + 1))
+    rank = sketches["rank"].to_numpy()
+    register = sketches["register"].to_numpy()
+
+    depositors = np.zeros(len(candidate))
+    first, stop = bounds[start[candidate]], bounds[candidate + 1]
+    sizes = stop - first
+    for chunk in expansion_batches(sizes, EXPANSION_BATCH):
+        owner = np.repeat(chunk, sizes[chunk])
+        entry = first[owner] + (np.arange(len(owner)) - np.repeat(np.cumsum(sizes[chunk]) - sizes[chunk], sizes[chunk]))
+        merged = pd.DataFrame({"owner": owner, "register": register[entry], "rank": rank[entry]}).groupby(
+            ["owner", "register"], sort=False
+        )["rank"].max().reset_index()
+        merged["weight"] = np.ldexp(1.0, -merged["rank"].to_numpy().astype(np.int64))
+        used = merged.groupby("owner").agg(filled=("rank", "size"), harmonic=("weight", "sum"))
+        m = 1 << precision
+        depositors[used.index] = estimate(m - used["filled"], used["harmonic"] + (m - used["filled"]), precision)
+
+    windows = pd.DataFrame({
+        "account_id": daily["account_id"].to_numpy()[candidate],
+        "window_start": daily["first_txn"].to_numpy()[start[candidate]],
+        "window_end": daily["last_txn"].to_numpy()[candidate],
+        "txn_count": count[candidate],
+        "total_amount": total[candidate],
+        "unique_depositors": np.round(depositors).astype(np.int64),
+    }, columns=COLUMNS)
+    return windows[windows["unique_depositors"] >= settings["min_depositors"]].reset_index(drop=True)
+
+
+def _days(timestamps):
+    return pd.to_datetime(timestamps).to_numpy().astype("datetime64[ns]").view("int64") // DAY
+
@@ -0,0 +1,496 @@
+# src/store.py
+"""
+Persistent transaction, account and alert store on SQLite.
+
+Transactions are indexed on (account_id, timestamp), so account-scoped and
+time-range lookups read only the matching rows instead of the full
+history; alerts are indexed on account, type/risk score, date and run.
+Writes go through executemany in batches inside one transaction per call.
+Timestamps are stored as integer nanoseconds since the epoch, so they
+round-trip exactly with datetime64[ns] columns.
+
+Queries return DataFrames in the compact layout of src/schema.py, ready for
+any detector.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+from src.schema import ACCOUNT_SCHEMA, TRANSACTION_SCHEMA, compact
+
+DEFAULT_PATH = os.path.join("data", "aml.db")
+DEFAULT_BATCH_SIZE = 50000
+# Page cache per connection: index pages of a bulk load stay in memory
+CACHE_KIB = 64 * 1024
+MAX_PARAMETERS = 900
+NAT_NANOSECONDS = np.iinfo(np.int64).min   # the int64 behind NaT
+
+TRANSACTION_COLUMNS = ["transaction_id", "account_id", "counter_party", "amount", "transaction_type", "type",
+                       "timestamp", "cash_transaction", "is_international", "is_suspicious"]
+ACCOUNT_COLUMNS = ["account_id", "customer_name", "country", "risk_level"]
+ALERT_DATE_FIELDS = ("date", "window_start", "first_txn")
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS transactions (
+    id INTEGER PRIMARY KEY,
+    dataset_id TEXT NOT NULL DEFAULT '',
+    transaction_id TEXT,
+    account_id TEXT NOT NULL,
+    counter_party TEXT,
+    amount REAL NOT NULL,
+    transaction_type TEXT,
+    type TEXT,
+    timestamp INTEGER,
+    cash_transaction INTEGER,
+    is_international INTEGER,
+    is_suspicious INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_transactions_account_time ON transactions (account_id, timestamp);
+CREATE INDEX IF NOT EXISTS idx_transactions_time ON transactions (timestamp);
+CREATE INDEX IF NOT EXISTS idx_transactions_dataset ON transactions (dataset_id, timestamp);
+
+CREATE TABLE IF NOT EXISTS accounts (
+    dataset_id TEXT NOT NULL DEFAULT '',
+    account_id TEXT NOT NULL,
+    customer_name TEXT,
+    country TEXT,
+    risk_level TEXT,
+    PRIMARY KEY (dataset_id, account_id)
+);
+CREATE INDEX IF NOT EXISTS idx_accounts_account ON accounts (account_id);
+
+CREATE TABLE IF NOT EXISTS datasets (
+    dataset_id TEXT PRIMARY KEY,
+    name TEXT,
+    created_at REAL
+);
+
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    dataset_id TEXT NOT NULL DEFAULT '',
+    created_at REAL,
+    alerts_count INTEGER,
+    metadata TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_runs_dataset ON runs (dataset_id, created_at);
+
+CREATE TABLE IF NOT EXISTS alerts (
+    id INTEGER PRIMARY KEY,
+    run_id TEXT NOT NULL,
+    dataset_id TEXT NOT NULL DEFAULT '',
+    alert_id TEXT,
+    account_id TEXT,
+    alert_type TEXT,
+    risk_score REAL,
+    date INTEGER,
+    detected_at INTEGER,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_alerts_account ON alerts (account_id, date);
+CREATE INDEX IF NOT EXISTS idx_alerts_type_risk ON alerts (alert_type, risk_score);
+CREATE INDEX IF NOT EXISTS idx_alerts_risk ON alerts (risk_score);
+CREATE INDEX IF NOT EXISTS idx_alerts_date ON alerts (date);
+CREATE INDEX IF NOT EXISTS idx_alerts_run ON alerts (run_id);
+CREATE INDEX IF NOT EXISTS idx_alerts_dataset ON alerts (dataset_id);
+"""
+
+
+class TransactionStore:
+    def __init__(self, path=DEFAULT_PATH, batch_size=DEFAULT_BATCH_SIZE):
+        """
+        :param path: SQLite database file (":memory:" for a private in-memory store)
+        :param batch_size: Rows per executemany() call
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self._local = threading.local()
+        self._shared = None
+        if path == ":memory:":
+            # One connection shared by all threads: a new one would be a new, empty database
+            self._shared = sqlite3.connect(path, check_same_thread=False)
+            self._shared_lock = threading.RLock()
+        elif os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._cursor() as cursor:
+            _migrate_accounts(cursor)
+            cursor.executescript(SCHEMA_SQL)
+            if cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'accounts_v1'").fetchone():
+                cursor.execute(f"INSERT OR REPLACE INTO accounts (dataset_id, {', '.join(ACCOUNT_COLUMNS)}) "
+                               f"SELECT '', {', '.join(ACCOUNT_COLUMNS)} FROM accounts_v1")
+                cursor.execute("DROP TABLE accounts_v1")
+
+    @classmethod
+    def from_url(cls, url, **options):
+        """sqlite:///relative/path.db, sqlite:////absolute/path.db or a plain file path"""
+        if url.startswith("sqlite:///"):
+            url = url[len("sqlite:///"):]
+        elif "://" in url:
+            raise ValueError(f"Only sqlite:/// database URLs are supported, got {url!r}")
+        return cls(url or DEFAULT_PATH, **options)
+
+    def close(self):
+        connection = self._shared or getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+        self._local.connection = None
+
+    # ---------------------- Ingestion ---------------------- #
+
+    def insert_transactions(self, transactions, dataset_id=""):
+        """
+        Append a DataFrame (or an iterable of DataFrame chunks) of transactions.
+
+        :return: Rows inserted
+        """
+        frames = [transactions] if isinstance(transactions, pd.DataFrame) else transactions
+        columns = ["dataset_id"] + TRANSACTION_COLUMNS
+        sql = f"INSERT INTO transactions ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+        rows = 0
+        with self._cursor() as cursor:
+            for frame in frames:
+                for batch in _batches(frame, self.batch_size):
+                    if "account_id" in batch.columns and "timestamp" in batch.columns:
+                        # Rows in index order touch far fewer index pages per batch
+                        batch = batch.sort_values(["account_id", "timestamp"], kind="stable")
+                    values = _transaction_rows(batch, dataset_id)
+                    cursor.executemany(sql, values)
+                    rows += len(batch)
+        return rows
+
+    def save_dataset(self, dataset_id, transactions, accounts, name=None):
+        """Store a whole dataset (see load_dataset()); returns transaction rows written"""
+        with self._cursor() as cursor:
+            cursor.execute("INSERT OR REPLACE INTO datasets (dataset_id, name, created_at) VALUES (?, ?, ?)",
+                           (dataset_id, name, time.time()))
+        if accounts is not None and len(accounts):
+            self.upsert_accounts(accounts, dataset_id)
+        return self.insert_transactions(transactions, dataset_id) if transactions is not None else 0
+
+    def delete_dataset(self, dataset_id):
+        """Drop a dataset's transactions, accounts, runs and alerts; False when it was not stored"""
+        with self._cursor() as cursor:
+            found = cursor.execute("DELETE FROM datasets WHERE dataset_id = ?", (dataset_id,)).rowcount > 0
+            for table in ("transactions", "accounts", "runs", "alerts"):
+                cursor.execute(f"DELETE FROM {table} WHERE dataset_id = ?", (dataset_id,))
+        return found
+
+    def upsert_accounts(self, accounts, dataset_id=""):
+        """Insert or replace a dataset's account master data; returns rows written"""
+        sql = (f"INSERT OR REPLACE INTO accounts (dataset_id, {', '.join(ACCOUNT_COLUMNS)}) "
+               f"VALUES (?, {', '.join('?' * len(ACCOUNT_COLUMNS))})")
+        rows = 0
+        with self._cursor() as cursor:
+            for batch in _batches(accounts, self.batch_size):
+                cursor.executemany(sql, [(dataset_id,) + row for row in _column_values(batch, ACCOUNT_COLUMNS)])
+                rows += len(batch)
+        return rows
+
+    def insert_alerts(self, alerts, run_id=None, dataset_id="", metadata=None):
+        """
+        Store one detection run's alerts (any detector's dicts; the full
+        alert is kept as JSON, common fields are indexed columns).
+
+        :param metadata: JSON-serialisable run details (thresholds, ...)
+        :return: run_id
+        """
+        run_id = run_id or uuid.uuid4().hex
+        sql = ("INSERT INTO alerts (run_id, dataset_id, alert_id, account_id, alert_type, risk_score, date, "
+               "detected_at, payload) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)")
+        with self._cursor() as cursor:
+            cursor.execute("INSERT INTO runs (run_id, dataset_id, created_at, alerts_count, metadata) "
+                           "VALUES (?, ?, ?, ?, ?)",
+                           (run_id, dataset_id, time.time(), len(alerts), json.dumps(metadata or {},
+                                                                                    default=_json_default)))
+            for start in range(0, len(alerts), self.batch_size):
+                cursor.executemany(sql, [
+                    (run_id, dataset_id, _text(alert.get("alert_id")), _text(alert.get("account_id")),
+                     _text(alert.get("alert_type", alert.get("reason"))), _number(alert.get("risk_score")),
+                     _nanoseconds(next((alert[f] for f in ALERT_DATE_FIELDS if alert.get(f) is not None), None)),
+                     _nanoseconds(alert.get("detected_at")), json.dumps(alert, default=_json_default))
+                    for alert in alerts[start:start + self.batch_size]
+                ])
+        return run_id
+
+    # ---------------------- Queries ---------------------- #
+
+    def transactions(self, account_ids=None, start=None, end=None, dataset_id=None, columns=None, limit=None):
+        """
+        Transactions in the compact layout, optionally limited to some
+        accounts and to start <= timestamp < end. Uses the
+        (account_id, timestamp) index; nothing else is read.
+        """
+        selected = [name for name in (columns or TRANSACTION_COLUMNS) if name in TRANSACTION_COLUMNS]
+        rows = []
+        with self._cursor() as cursor:
+            # One query per slice of account ids; the slices are sorted, so the rows stay in order
+            for where, params in _transaction_filters(account_ids, start, end, dataset_id):
+                sql = f"SELECT {', '.join(selected)} FROM transactions{where} ORDER BY account_id, timestamp, id"
+                if limit is not None:
+                    sql += " LIMIT ?"
+                    params.append(int(limit) - len(rows))
+                rows += cursor.execute(sql, params).fetchall()
+                if limit is not None and len(rows) >= limit:
+                    break
+        return _transaction_frame(rows, selected)
+
+    def iter_transactions(self, chunksize=DEFAULT_BATCH_SIZE, account_ids=None, start=None, end=None,
+                          dataset_id=None, columns=None):
+        """transactions() as an iterator of DataFrames of up to `chunksize` rows"""
+        selected = [name for name in (columns or TRANSACTION_COLUMNS) if name in TRANSACTION_COLUMNS]
+        with self._cursor() as cursor:
+            for where, params in _transaction_filters(account_ids, start, end, dataset_id):
+                sql = f"SELECT {', '.join(selected)} FROM transactions{where} ORDER BY account_id, timestamp, id"
+                result = cursor.execute(sql, params)
+                while True:
+                    rows = result.fetchmany(chunksize)
+                    if not rows:
+                        break
+                    yield _transaction_frame(rows, selected)
+
+    def account_history(self, account_id, start=None, end=None, dataset_id=None):
+        """One account's transactions in time order"""
+        return self.transactions([account_id], start, end, dataset_id)
+
+    def accounts(self, account_ids=None, dataset_id=None):
+        """
+        Account master data, all or the given ids, of one dataset (or of
+        every dataset, where an account can appear once per dataset)
+        """
+        sql = f"SELECT {', '.join(ACCOUNT_COLUMNS)} FROM accounts"
+        scope, scope_params = (" AND dataset_id = ?", [dataset_id]) if dataset_id is not None else ("", [])
+        with self._cursor() as cursor:
+            if account_ids is None:
+                rows = cursor.execute(f"{sql} WHERE 1{scope} ORDER BY account_id, dataset_id",
+                                      scope_params).fetchall()
+            else:
+                # Looked up in slices: SQLite caps the number of bound parameters
+                account_ids, rows = sorted({str(a) for a in account_ids}), []
+                for start in range(0, len(account_ids), MAX_PARAMETERS):
+                    ids = account_ids[start:start + MAX_PARAMETERS]
+                    rows += cursor.execute(f"{sql} WHERE account_id IN ({', '.join('?' * len(ids))}){scope} "
+                                           "ORDER BY account_id, dataset_id", ids + scope_params).fetchall()
+        return compact(pd.DataFrame.from_records(rows, columns=ACCOUNT_COLUMNS), ACCOUNT_SCHEMA)
+
+    def alerts(self, account_id=None, alert_type=None, min_risk=None, max_risk=None, start=None, end=None,
+               run_id=None, dataset_id=None, limit=None, offset=0):
+        """
+        Stored alerts (as the original dicts) matching every given filter,
+        newest run first. start/end bound the alert date (end exclusive).
+        """
+        where, params = _alert_filter(account_id, alert_type, min_risk, max_risk, start, end, run_id, dataset_id)
+        page = " LIMIT ? OFFSET ?" if limit is not None else ""
+        params += [int(limit), int(offset)] if limit is not None else []
+        with self._cursor() as cursor:
+            rows = cursor.execute(f"SELECT payload FROM alerts{where} ORDER BY id DESC{page}", params).fetchall()
+        return [json.loads(payload) for (payload,) in rows]
+
+    def iter_alerts(self, chunksize=DEFAULT_BATCH_SIZE, **filters):
+        """
+        Alerts matching alerts()' filters (except limit/offset) one at a time,
+        oldest first, fetched `chunksize` rows at a time; for report writers
+        (see src/compliance.py) that must not hold every alert in memory.
+        """
+        where, params = _alert_filter(**filters)
+        with self._cursor() as cursor:
+            result = cursor.execute(f"SELECT payload FROM alerts{where} ORDER BY id", params)
+            while True:
+                rows = result.fetchmany(chunksize)
+                if not rows:
+                    return
+                for (payload,) in rows:
+                    yield json.loads(payload)
+
+    def runs(self, dataset_id=None):
+        """Detection runs, newest first, with their metadata"""
+        where, params = (" WHERE dataset_id = ?", [dataset_id]) if dataset_id is not None else ("", [])
+        with self._cursor() as cursor:
+            rows = cursor.execute("SELECT run_id, dataset_id, created_at, alerts_count, metadata FROM runs"
+                                  f"{where} ORDER BY created_at DESC, rowid DESC", params).fetchall()
+        return [{"run_id": run_id, "dataset_id": dataset, "created_at": created_at, "alerts_count": count,
+                 "metadata": json.loads(metadata or "{}")}
+                for run_id, dataset, created_at, count, metadata in rows]
+
+    def load_dataset(self, dataset_id):
+        """
+        A dataset stored with save_dataset(): (name, transactions, accounts),
+        or None when unknown.
+        """
+        with self._cursor() as cursor:
+            row = cursor.execute("SELECT name FROM datasets WHERE dataset_id = ?", (dataset_id,)).fetchone()
+        if row is None:
+            return None
+        return row[0], self.transactions(dataset_id=dataset_id), self.accounts(dataset_id=dataset_id)
+
+    def counts(self):
+        """Rows per table"""
+        with self._cursor() as cursor:
+            return {table: cursor.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                    for table in ("datasets", "transactions", "accounts", "runs", "alerts")}
+
+    def explain(self, sql, params=()):
+        """SQLite's query plan, to check which index a lookup uses"""
+        with self._cursor() as cursor:
+            return [row[-1] for row in cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()]
+
+    # ---------------------- Connections ---------------------- #
+
+    @contextmanager
+    def _cursor(self):
+        """Cursor on this thread's connection, committed on success"""
+        if self._shared is not None:
+            with self._shared_lock:
+                with self._shared:
+                    yield self._shared.cursor()
+            return
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(f"PRAGMA cache_size=-{CACHE_KIB}")
+            self._local.connection = connection
+        with connection:
+            yield connection.cursor()
+
+
+def _migrate_accounts(cursor):
+    """Set aside an accounts table from before accounts were kept per dataset (copied back as dataset '')"""
+    columns = [row[1] for row in cursor.execute("PRAGMA table_info(accounts)").fetchall()]
+    if columns and "dataset_id" not in columns:
+        cursor.execute("ALTER TABLE accounts RENAME TO accounts_v1")
+
+
+def _transaction_filters(account_ids, start, end, dataset_id):
+    """
+    [(WHERE clause, parameters)], one per MAX_PARAMETERS slice of the sorted
+    account ids (a single filter without account ids; none for no ids)
+    """
+    if account_ids is None:
+        return [_transaction_filter(None, start, end, dataset_id)]
+    account_ids = sorted({str(a) for a in account_ids})
+    return [_transaction_filter(account_ids[i:i + MAX_PARAMETERS], start, end, dataset_id)
+            for i in range(0, len(account_ids), MAX_PARAMETERS)]
+
+
+def _transaction_filter(account_ids, start, end, dataset_id):
+    clauses, params = [], []
+    if account_ids is not None:
+        clauses.append(f"account_id IN ({', '.join('?' * len(account_ids))})")
+        params += account_ids
+    if start is not None:
+        clauses.append("timestamp >= ?")
+        params.append(_nanoseconds(start))
+    if end is not None:
+        clauses.append("timestamp < ?")
+        params.append(_nanoseconds(end))
+    if dataset_id is not None:
+        clauses.append("dataset_id = ?")
+        params.append(dataset_id)
+    return (f" WHERE {' AND '.join(clauses)}" if clauses else ""), params
+
+
+def _alert_filter(account_id=None, alert_type=None, min_risk=None, max_risk=None, start=None, end=None,
+                  run_id=None, dataset_id=None):
+    """WHERE clause and parameters for alerts()/iter_alerts()"""
+    clauses, params = [], []
+    for column, value in (("account_id", account_id), ("alert_type", alert_type), ("run_id", run_id),
+                          ("dataset_id", dataset_id)):
+        if value is not None:
+            clauses.append(f"{column} = ?")
+            params.append(str(value))
+    if min_risk is not None:
+        clauses.append("risk_score >= ?")
+        params.append(float(min_risk))
+    if max_risk is not None:
+        clauses.append("risk_score <= ?")
+        params.append(float(max_risk))
+    if start is not None:
+        clauses.append("date >= ?")
+        params.append(_nanoseconds(start))
+    if end is not None:
+        clauses.append("date < ?")
+        params.append(_nanoseconds(end))
+    return (f" WHERE {' AND '.join(clauses)}" if clauses else ""), params
+
+
+def _batches(frame, size):
+    for start in range(0, len(frame), size):
+        yield frame.iloc[start:start + size]
+
+
+def _transaction_rows(batch, dataset_id):
+    columns = []
+    for name in TRANSACTION_COLUMNS:
+        if name not in batch.columns:
+            columns.append([None] * len(batch))
+        elif name == "timestamp":
+            stamps = pd.to_datetime(batch[name]).astype("datetime64[ns]")
+            values = stamps.to_numpy().view(np.int64).astype(object)
+            values[stamps.isna().to_numpy()] = None
+            columns.append(values.tolist())
+        elif TRANSACTION_SCHEMA.get(name) == "flag":
+            columns.append([None if v is None else int(bool(v)) for v in _plain(batch[name])])
+        elif name == "amount":
+            columns.append(batch[name].astype(np.float64).tolist())
+        else:
+            columns.append([None if v is None else str(v) for v in _plain(batch[name])])
+    return list(zip([dataset_id] * len(batch), *columns))
+
+
+def _column_values(batch, names):
+    columns = [[None if v is None else str(v) for v in _plain(batch[name])] if name in batch.columns
+               else [None] * len(batch) for name in names]
+    return list(zip(*columns))
+
+
+def _plain(column):
+    """Python values with missing values as None"""
+    values = column.astype(object)
+    return values.where(column.notna(), None).tolist()
+
+
+def _transaction_frame(rows, columns):
+    frame = pd.DataFrame.from_records(rows, columns=columns)
+    if "timestamp" in frame.columns:
+        # Built from the raw int64 nanoseconds: a column with NULLs would be inferred as float64 and lose precision
+        position = columns.index("timestamp")
+        stamps = np.array([NAT_NANOSECONDS if row[position] is None else row[position] for row in rows],
+                          dtype=np.int64).view("datetime64[ns]")
+        frame["timestamp"] = stamps
+    # Columns never stored for this data come back all-NULL: drop them
+    frame = frame[[name for name in frame.columns if name in ("account_id", "amount", "timestamp")
+                   or frame[name].notna().any() or frame.empty]]
+    return compact(frame, TRANSACTION_SCHEMA)
+
+
+def _nanoseconds(value):
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    return int(pd.Timestamp(value).as_unit("ns").value)
+
+
+def _text(value):
+    return None if value is None else str(value)
+
+
+def _number(value):
+    try:
+        return None if value is None else float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
@@ -0,0 +1,131 @@
+# src/sweep.py
+"""
+What-if threshold sweeps for the detector's rules.
+
+The data is scanned once to build sorted arrays:
+    amounts of every transaction              (large_txn_threshold)
+    total amount of every account-day         (structuring_threshold)
+    transaction count of every account-day    (custom pattern day count)
+plus, for each rule, every account's largest value. A candidate threshold
+is then answered by binary search: alerts = values above the threshold,
+flagged accounts = accounts whose largest value is above it. A sweep point
+costs O(log n) (plus the size of the account list when requested), so
+hundreds of thresholds take milliseconds.
+
+Counts match MoneyLaunderingDetector.detect(): a rule fires when the value
+is strictly greater than the threshold.
+"""
+import numpy as np
+import pandas as pd
+
+from src.detector import MoneyLaunderingDetector
+
+# Sweepable rules and the threshold each one is swept over
+SWEEP_RULES = {
+    "large_transactions": "large_txn_threshold",
+    "structuring": "structuring_threshold",
+    "custom_pattern": "daily_txn_count",   # fixed at 5 in the detector
+}
+MAX_POINTS = 10000
+
+
+class ThresholdSweep:
+    def __init__(self, transactions, daily=None):
+        """
+        :param transactions: Frame with account_id, amount, timestamp
+        :param daily: MoneyLaunderingDetector.daily_aggregates() if already built
+        """
+        if daily is None:
+            daily = MoneyLaunderingDetector(transactions).daily_aggregates()
+        self.transactions_count = len(transactions)
+        self.account_days = len(daily)
+        self._rules = {
+            "large_transactions": _SortedRule(transactions["account_id"], transactions["amount"]),
+            "structuring": _SortedRule(daily["account_id"], daily["total_amount"]),
+            "custom_pattern": _SortedRule(daily["account_id"], daily["txn_count"]),
+        }
+
+    def counts(self, rule, thresholds):
+        """Alert count for each threshold (numpy array, same order)"""
+        return self._rule(rule).alerts(thresholds)
+
+    def accounts_counts(self, rule, thresholds):
+        """Number of distinct accounts flagged for each threshold"""
+        return self._rule(rule).accounts_count(thresholds)
+
+    def accounts(self, rule, threshold):
+        """Accounts flagged at one threshold, highest value first"""
+        return self._rule(rule).accounts(threshold)
+
+    def sweep(self, thresholds, include_accounts=False):
+        """
+        :param thresholds: {rule or threshold name: [candidate values]}
+        :param include_accounts: Also list the flagged accounts of every point
+        :return: {rule: [{"threshold", "alerts", "accounts_count"[, "accounts"]}, ...]}
+        """
+        result = {}
+        for key, values in thresholds.items():
+            rule = rule_for(key)
+            values = np.asarray(values, dtype=np.float64)
+            if len(values) > MAX_POINTS:
+                raise ValueError(f"At most {MAX_POINTS} thresholds per rule")
+            points = [
+                {"threshold": float(value), "alerts": int(alerts), "accounts_count": int(accounts)}
+                for value, alerts, accounts in zip(values, self.counts(rule, values),
+                                                   self.accounts_counts(rule, values))
+            ]
+            if include_accounts:
+                for point in points:
+                    point["accounts"] = self.accounts(rule, point["threshold"])
+            result[rule] = points
+        return result
+
+    def _rule(self, rule):
+        return self._rules[rule_for(rule)]
+
+
+def rule_for(name):
+    """Rule name for a rule or threshold name (e.g. structuring_threshold -> structuring)"""
+    if name in SWEEP_RULES:
+        return name
+    for rule, threshold in SWEEP_RULES.items():
+        if threshold == name:
+            return rule
+    raise ValueError(f"Unknown rule or threshold: {name}")
+
+
+def threshold_range(low, high, steps):
+    """`steps` evenly spaced thresholds from low to high (inclusive)"""
+    steps = int(steps)
+    if not 1 <= steps <= MAX_POINTS:
+        raise ValueError(f"steps must be between 1 and {MAX_POINTS}")
+    return np.linspace(float(low), float(high), steps)
+
+
+def sweep_thresholds(transactions, thresholds, include_accounts=False):
+    """One-off sweep: build a ThresholdSweep and run it"""
+    return ThresholdSweep(transactions).sweep(thresholds, include_accounts)
+
+
+class _SortedRule:
+    """Values sorted ascending, and every account's maximum sorted ascending"""
+
+    def __init__(self, account_ids, values):
+        values = pd.to_numeric(values).to_numpy(dtype=np.float64)
+        self.values = np.sort(values)
+        accounts = pd.Categorical(account_ids)
+        maxima = pd.Series(values).groupby(accounts.codes).max()
+        maxima = maxima[maxima.index >= 0]  # code -1: missing account_id
+        order = np.argsort(maxima.to_numpy(), kind="stable")
+        self.account_maxima = maxima.to_numpy()[order]
+        self.account_ids = np.asarray(accounts.categories[maxima.index.to_numpy()[order]], dtype=object)
+
+    def alerts(self, thresholds):
+        return len(self.values) - np.searchsorted(self.values, thresholds, side="right")
+
+    def accounts_count(self, thresholds):
+        return len(self.account_maxima) - np.searchsorted(self.account_maxima, thresholds, side="right")
+
+    def accounts(self, threshold):
+        start = np.searchsorted(self.account_maxima, threshold, side="right")
+        return [str(account) for account in self.account_ids[start:][::-1]]
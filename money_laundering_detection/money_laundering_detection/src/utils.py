@@ -1,69 +1,97 @@
 import os
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
-import random
+from datetime import datetime
+from src.aggregates import TransactionAggregator
+from src.detector import MoneyLaunderingDetector
+from src.generator import TYPOLOGIES, generate_accounts, generate_transactions
+from src.schema import compact, read_accounts, read_transactions, ACCOUNT_SCHEMA
 
 
 def load_data(txn_filepath: str = "data/sample_transactions.csv",
               accounts_filepath: str = "data/sample_accounts.csv",
-              num_records: int = 5000):
+              num_records: int = 5000,
+              chunksize: int = None,
+              large_txn_threshold: float = None,
+              columns: list = None,
+              start=None,
+              end=None):
     """
     Load transactions and accounts if files exist, otherwise generate them.
-    Returns: (transactions_df, accounts_df)
+    Returns: (transactions_df, accounts_df) in the compact layout of
+    src/schema.py (categorical ids, datetime64 timestamps, narrow numerics).
+
+    With `chunksize`, transactions are streamed in chunks and folded into a
+    TransactionAggregator, which is returned in place of transactions_df.
+    It keeps the transactions above `large_txn_threshold` (default: the
+    detector's default large_txn_threshold), so
+    MoneyLaunderingDetector(aggregates=...).detect() works with thresholds
+    at or above it.
+
+    `txn_filepath` may be a CSV, a Parquet or Arrow/Feather file, or a
+    directory of Parquet/Arrow files partitioned by date. `columns` (see
+    schema.columns_for) and the [start, end) timestamp range are pushed down
+    to columnar files.
     """
+    if chunksize and large_txn_threshold is None:
+        large_txn_threshold = MoneyLaunderingDetector().thresholds["large_txn_threshold"]
+
     if os.path.exists(txn_filepath) and os.path.exists(accounts_filepath):
-        transactions = pd.read_csv(txn_filepath)
-        accounts = pd.read_csv(accounts_filepath)
+        if chunksize:
+            transactions = TransactionAggregator.from_csv(
+                txn_filepath, chunksize=chunksize, large_txn_threshold=large_txn_threshold,
+                columns=columns, start=start, end=end
+            )
+        else:
+            transactions = read_transactions(txn_filepath, columns=columns, start=start, end=end)
+        accounts = read_accounts(accounts_filepath)
     else:
         transactions, accounts = generate_sample_data(num_records)
+        transactions, accounts = compact(transactions), compact(accounts, ACCOUNT_SCHEMA)
+        if chunksize:
+            aggregator = TransactionAggregator(large_txn_threshold=large_txn_threshold)
+            aggregator.update(transactions)
+            transactions = aggregator
 
     return transactions, accounts
 
 
-def generate_sample_data(num_records: int = 5000):
+def sorted_searchsorted(keys, queries, side="left"):
     """
-    Generate synthetic transaction + account dataset.
+    np.searchsorted for large unsorted query arrays: the queries are sorted
+    first, which keeps the binary searches cache-friendly.
     """
-    np.random.seed(42)
-
-    # Generate accounts
-    accounts = []
-    for i in range(1, 101):
-        acc = {
-            "account_id": f"ACC{str(i).zfill(3)}",
-            "customer_name": f"Customer_{i}",
-            "country": random.choice(["India", "USA", "UK", "UAE", "Singapore"]),
-            "risk_level": random.choice(["Low", "Medium", "High"])
-        }
-        accounts.append(acc)
-    accounts_df = pd.DataFrame(accounts)
-
-    # Generate transactions
-    account_ids = accounts_df["account_id"].tolist()
-    transaction_types = ["Transfer", "Cash Deposit", "Wire Transfer", "Purchase"]
+    order = np.argsort(queries)
+    result = np.empty(len(queries), dtype=np.int64)
+    result[order] = np.searchsorted(keys, queries[order], side=side)
+    return result
 
-    transactions = []
-    start_date = datetime.now() - timedelta(days=180)
 
-    for i in range(num_records):
-        account_id = random.choice(account_ids)
-        txn_type = random.choice(transaction_types)
-        amount = round(np.random.exponential(scale=20000), 2)
+def expansion_batches(sizes, budget):
+    """
+    Split indices 0..len(sizes)-1 into consecutive runs whose summed sizes
+    stay under `budget` (a single oversized index gets a run of its own).
+    Used to bound memory when np.repeat-expanding variable-length ranges.
+    """
+    ends = np.cumsum(sizes)
+    cuts = np.searchsorted(ends, np.arange(budget, ends[-1] if len(ends) else 0, budget), side="right")
+    return np.split(np.arange(len(sizes)), cuts)
 
-        txn = {
-            "transaction_id": f"TXN{str(i).zfill(7)}",
-            "account_id": account_id,
-            "amount": amount,
-            "transaction_type": txn_type,
-            "timestamp": start_date + timedelta(minutes=random.randint(0, 60*24*180)),
-            "cash_transaction": txn_type == "Cash Deposit",
-            "is_international": random.choice([True, False]),
-            "is_suspicious": False
-        }
-        transactions.append(txn)
 
-    transactions_df = pd.DataFrame(transactions)
+def generate_sample_data(num_records: int = 5000, seed: int = 42):
+    """
+    Generate a reproducible synthetic transaction + account dataset
+    (src/generator.py): 100 accounts, 180 days ending today, and two planted
+    scenarios of every laundering typology (see the typology column).
+    """
+    days = 180
+    start = pd.Timestamp(datetime.now()).normalize() - pd.Timedelta(days=days - 1)
+    accounts_df = generate_accounts(100, seed=seed)
+    chunks, _ = generate_transactions(
+        num_records, accounts=100, days=days, start=start, seed=seed,
+        scenarios={typology: 2 for typology in TYPOLOGIES}
+    )
+    transactions_df = pd.concat(list(chunks), ignore_index=True)
 
     # ensure data folder exists
     os.makedirs("data", exist_ok=True)
@@ -0,0 +1,75 @@
+# src/velocity.py
+import numpy as np
+import pandas as pd
+
+from src.features import FeatureFrame
+from src.utils import sorted_searchsorted
+
+# Rolling windows profiled by PatternDetector.detect_velocity_anomalies
+VELOCITY_WINDOWS = {
+    "5min": pd.Timedelta(minutes=5),
+    "1h": pd.Timedelta(hours=1),
+    "24h": pd.Timedelta(hours=24),
+}
+
+
+def sliding_window_velocity(transactions, windows=VELOCITY_WINDOWS):
+    """
+    Per account, the largest transaction count and amount seen in any
+    rolling window (t - w, t] ending at one of its transactions.
+
+    Transactions are sorted once by (account, timestamp). For every window
+    size, each transaction's window start is found with one searchsorted over
+    (account, timestamp-rank) keys, so window counts are index differences and
+    window amounts are prefix-sum differences. O(n log n) for all windows.
+
+    :param transactions: DataFrame with account_id, timestamp, amount, or a
+        FeatureFrame (already sorted, so no extra sort is needed)
+    :param windows: {name: Timedelta}
+    :return: DataFrame indexed by account_id with max_count_<name> and
+        max_amount_<name> columns, sorted by account
+    """
+    columns = [f"max_{kind}_{name}" for name in windows for kind in ("count", "amount")]
+    features = transactions if isinstance(transactions, FeatureFrame) else FeatureFrame(transactions)
+    timed = features.timed
+    if not timed.any():
+        return pd.DataFrame(columns=columns, index=pd.Index([], name="account_id"))
+
+    codes, ts, amount = features.codes[timed], features.timestamp[timed], features.amount[timed]
+    accounts = features.accounts
+
+    segments = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    position = np.arange(len(ts))
+    prefix = np.concatenate([[0.0], np.cumsum(amount)])
+    starts = rolling_window_starts(codes, ts, windows.values())
+
+    result = {}
+    for name, start in zip(windows, starts):
+        result[f"max_count_{name}"] = np.maximum.reduceat(position - start + 1, segments)
+        result[f"max_amount_{name}"] = np.maximum.reduceat(prefix[position + 1] - prefix[start], segments)
+
+    index = pd.Index(accounts[codes[segments]], name="account_id")
+    return pd.DataFrame(result, index=index)[columns]
+
+
+def rolling_window_starts(codes, ts, windows):
+    """
+    For rows sorted by (account code, timestamp): index of the first row of
+    the same account inside (t - w, t], for every window w.
+
+    :param codes: int64 account codes, sorted
+    :param ts: int64 nanosecond timestamps, sorted within each account
+    :param windows: iterable of Timedelta
+    :return: list of int64 arrays, one per window
+    """
+    # (account, timestamp rank) keys: "first transaction of this account after t" is one searchsorted
+    times = np.sort(ts)
+    times = times[np.r_[True, times[1:] != times[:-1]]]
+    stride = len(times) + 1
+    keys = codes * stride + sorted_searchsorted(times, ts)
+
+    starts = []
+    for window in windows:
+        after = sorted_searchsorted(times, ts - pd.Timedelta(window).value, side="right")
+        starts.append(sorted_searchsorted(keys, codes * stride + after))
+    return starts
@@ -0,0 +1,104 @@
+import unittest
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import gzip
+import json
+from datetime import date, timedelta
+import numpy as np
+import pandas as pd
+from src.alert_index import AlertIndex, InvalidCursor
+
+
+def sample_alerts(count=500, seed=3):
+    rng = np.random.default_rng(seed)
+    alerts = []
+    for i in range(count):
+        alert = {"account_id": f"ACC{rng.integers(0, 20):03d}", "alert_type": ["Structuring", "Layering"][i % 2],
+                 "risk_score": float(rng.integers(0, 100)), "date": date(2025, 1, 1) + timedelta(days=int(i % 60))}
+        if i % 7 == 0:
+            # Detector-style alert: reason, no score or date
+            alert = {"account_id": alert["account_id"], "alert_id": f"A{i}", "reason": "Unusually Large Transaction"}
+        alerts.append(alert)
+    return alerts
+
+
+class TestAlertIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.alerts = sample_alerts()
+        self.index = AlertIndex(self.alerts, version="v1")
+
+    def walk(self, limit, **query):
+        pages, cursor = [], None
+        while True:
+            page, cursor, total = self.index.page(cursor=cursor, limit=limit, **query)
+            pages.extend(page)
+            if cursor is None:
+                return pages, total
+
+    def test_filters_match_brute_force(self):
+        query = dict(account_id="ACC003", alert_type="Layering", min_risk=20, max_risk=80,
+                     start="2025-01-10", end="2025-02-10")
+        expected = [
+            a for a in self.alerts
+            if a["account_id"] == "ACC003" and a.get("alert_type") == "Layering"
+            and 20 <= a["risk_score"] <= 80 and date(2025, 1, 10) <= a["date"] < date(2025, 2, 10)
+        ]
+        found, total = self.walk(limit=2, **query)
+        self.assertEqual(found, expected)
+        self.assertEqual(total, len(expected))
+
+        reasons, _ = self.walk(limit=50, alert_type="Unusually Large Transaction")
+        self.assertEqual(len(reasons), len(range(0, 500, 7)))
+
+    def test_sorted_pages_cover_every_alert_once(self):
+        found, total = self.walk(limit=37, sort="risk_score", descending=True)
+        self.assertEqual(total, len(self.alerts))
+        self.assertEqual(sorted(map(id, found)), sorted(map(id, self.alerts)))
+        scores = [a.get("risk_score", -1) for a in found]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+
+    def test_cursor_validation(self):
+        _, cursor, _ = self.index.page(limit=10, sort="date")
+        with self.assertRaises(InvalidCursor):
+            self.index.page(cursor=cursor, sort="risk_score")
+        with self.assertRaises(InvalidCursor):
+            AlertIndex(self.alerts, version="v2").page(cursor=cursor, sort="date")
+        with self.assertRaises(InvalidCursor):
+            self.index.page(cursor="not-a-cursor")
+
+
+class TestGetAlertsApi(unittest.TestCase):
+
+    def setUp(self):
+        import app as web
+        self.client = web.app.test_client()
+        transactions = pd.DataFrame({"account_id": ["ACC001"], "amount": [1.0], "timestamp": ["2025-01-01"]})
+        self.dataset_id = web.datasets.create(transactions, pd.DataFrame({"account_id": ["ACC001"]}))
+        self.addCleanup(web.datasets.delete, self.dataset_id)
+        with web.datasets.write(self.dataset_id) as dataset:
+            dataset.results = {"version": "v1", "alerts": sample_alerts(), "transactions_count": 1,
+                               "accounts_count": 1, "alerts_count": 500}
+
+    def test_pagination_etag_and_gzip(self):
+        url = f"/api/get-alerts?dataset_id={self.dataset_id}&sort=risk_score&order=desc&limit=200"
+        response = self.client.get(url, headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        body = json.loads(gzip.decompress(response.get_data()))
+        self.assertEqual((len(body["alerts"]), body["total_matches"]), (200, 500))
+        self.assertEqual(body["alerts"][0]["date"][:4], "2025")
+
+        etag = response.headers["ETag"]
+        self.assertEqual(self.client.get(url, headers={"If-None-Match": etag}).status_code, 304)
+        second = self.client.get(url + f"&cursor={body['next_cursor']}").get_json()
+        self.assertEqual(len(second["alerts"]), 200)
+        self.assertNotEqual(second["alerts"][0], body["alerts"][0])
+
+        self.assertEqual(self.client.get(url + "&cursor=bogus").status_code, 400)
+        self.assertEqual(self.client.get("/api/get-alerts").status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
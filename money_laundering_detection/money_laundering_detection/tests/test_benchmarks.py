@@ -0,0 +1,57 @@
+import unittest
+import sys
+import tempfile
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.suite import ANALYTICS_CHECKS, LEGACY_RULES, append_history, compare, parse_sizes, run_record, \
+    run_suite
+from src.patterns import ALL_RULES
+
+
+class TestBenchmarkSuite(unittest.TestCase):
+
+    def test_every_rule_is_timed(self):
+        results = run_suite([2000], repeat=1, log=lambda message: None)
+        cases = {(r["component"], r["case"]) for r in results}
+
+        for rule in LEGACY_RULES + ["detect_vectorized"]:
+            self.assertIn(("detector", rule), cases)
+        for rule in ALL_RULES:
+            self.assertIn(("patterns", rule), cases)
+        for check in ANALYTICS_CHECKS:
+            self.assertIn(("analytics", check), cases)
+        for result in results:
+            self.assertGreater(result["rows_per_sec"], 0)
+            self.assertGreater(result["peak_rss_mb"], 0)
+
+        legacy = run_suite([2000], repeat=1, components=("detector",), legacy_max_rows=1000, log=lambda m: None)
+        self.assertEqual([r["case"] for r in legacy], ["daily_aggregates", "detect_vectorized"])
+
+    def test_regression_against_baseline(self):
+        baseline = {"results": [
+            {"size": 1000, "component": "patterns", "case": "slow", "seconds": 1.0},
+            {"size": 1000, "component": "patterns", "case": "steady", "seconds": 1.0},
+            {"size": 1000, "component": "patterns", "case": "noise", "seconds": 0.001},
+        ]}
+        current = [
+            {"size": 1000, "component": "patterns", "case": "slow", "seconds": 1.5},
+            {"size": 1000, "component": "patterns", "case": "steady", "seconds": 1.1},
+            {"size": 1000, "component": "patterns", "case": "noise", "seconds": 0.004},
+            {"size": 1000, "component": "patterns", "case": "new", "seconds": 9.0},
+        ]
+        regressions = compare(current, baseline, max_regression=25)
+        self.assertEqual([(r["case"], r["change_pct"]) for r in regressions], [("slow", 50.0)])
+        self.assertEqual(compare(current, baseline, max_regression=60), [])
+
+    def test_history_and_sizes(self):
+        self.assertEqual(parse_sizes("10k, 1m,2500"), [10000, 1000000, 2500])
+        with tempfile.TemporaryDirectory() as workdir:
+            path = Path(workdir) / "history.json"
+            append_history(run_record([], repeat=1), path)
+            history = append_history(run_record([], repeat=1), path)
+        self.assertEqual(len(history), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+import sys
+import contextlib
+import io
+import tempfile
+import time
+from unittest import mock
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pandas as pd
+from src import cache as cache_module
+from src.cache import MISSING, ResultCache, fingerprint
+from src.jobs import COMPLETED, FINISHED
+
+
+class TestResultCache(unittest.TestCase):
+
+    def setUp(self):
+        self.frame = pd.DataFrame({"account_id": ["ACC001", "ACC002"], "amount": [10.0, 20.0]})
+
+    def test_fingerprint_follows_content(self):
+        same = self.frame.copy()
+        same.index = [5, 6]
+        changed = self.frame.assign(amount=[10.0, 21.0])
+        self.assertEqual(fingerprint(self.frame), fingerprint(same))
+        self.assertNotEqual(fingerprint(self.frame), fingerprint(changed))
+        self.assertNotEqual(fingerprint(self.frame), fingerprint(self.frame.astype({"account_id": "category"})))
+
+    def test_lru_disk_tier_and_invalidation(self):
+        workdir = tempfile.TemporaryDirectory()
+        self.addCleanup(workdir.cleanup)
+        cache = ResultCache(max_entries=2, directory=workdir.name)
+        calls = []
+        compute = lambda value: lambda: calls.append(value) or value
+
+        self.assertEqual(cache.get_or_compute("fp", "structuring", {"t": 1}, compute("a")), ("a", False))
+        self.assertEqual(cache.get_or_compute("fp", "structuring", {"t": 1}, compute("b")), ("a", True))
+        self.assertEqual(cache.get_or_compute("fp", "structuring", {"t": 2}, compute("c")), ("c", False))
+        cache.put("fp", "large_transactions", {"t": 1}, "d")
+        self.assertEqual(cache.stats()["entries"], 2)
+
+        # Evicted from memory, still on disk; a new process sees it too
+        self.assertEqual(ResultCache(directory=workdir.name).get("fp", "structuring", {"t": 1}), "a")
+        self.assertEqual(cache.get("fp", "structuring", {"t": 1}), "a")
+
+        cache.invalidate(rule="structuring")
+        self.assertIs(cache.get("fp", "structuring", {"t": 2}), MISSING)
+        self.assertEqual(cache.get("fp", "large_transactions", {"t": 1}), "d")
+        self.assertEqual(calls, ["a", "c"])
+
+        # Entries written by an older release are not served after CACHE_VERSION changes
+        with mock.patch.object(cache_module, "CACHE_VERSION", cache_module.CACHE_VERSION + 1):
+            self.assertIs(ResultCache(directory=workdir.name).get("fp", "large_transactions", {"t": 1}), MISSING)
+
+
+class TestDetectionCache(unittest.TestCase):
+
+    def setUp(self):
+        import app as web
+        self.web = web
+        self.client = web.app.test_client()
+        transactions = pd.read_csv(Path(__file__).resolve().parent.parent / "data" / "transactions.csv")
+        accounts = pd.DataFrame({"account_id": transactions["account_id"].unique()})
+        self.dataset_id = web.datasets.create(transactions, accounts)
+        self.addCleanup(web.datasets.delete, self.dataset_id)
+        web.results_cache.invalidate()
+
+    def run_detection(self, thresholds):
+        with contextlib.redirect_stdout(io.StringIO()):
+            response = self.client.post('/api/run-detection', json={
+                'dataset_id': self.dataset_id, 'thresholds': thresholds
+            })
+            job = self.web.jobs.get(response.get_json()['job_id'])
+            deadline = time.time() + 30
+            while job.status not in FINISHED and time.time() < deadline:
+                time.sleep(0.01)
+        self.assertEqual(job.status, COMPLETED)
+        return job.result
+
+    def test_changed_threshold_recomputes_only_its_rule(self):
+        first = self.run_detection({'structuring_threshold': 1000000})
+        self.assertEqual(first['cached_rules'], [])
+
+        second = self.run_detection({'structuring_threshold': 500000})
+        self.assertEqual(set(self.web.DETECTION_RULES) - set(second['cached_rules']), {'structuring'})
+
+        third = self.run_detection({'structuring_threshold': 1000000})
+        self.assertEqual(third['cached_rules'], self.web.DETECTION_RULES)
+        self.assertEqual(third['alerts_count'], first['alerts_count'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+import sys
+import tempfile
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pandas as pd
+from src.detector import MoneyLaunderingDetector
+from src.schema import columns_for, read_transactions
+
+try:
+    import pyarrow  # noqa: F401
+    from src.columnar import convert_csv
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+
+@unittest.skipUnless(HAS_PYARROW, "pyarrow is not installed")
+class TestColumnarInput(unittest.TestCase):
+
+    def setUp(self):
+        root = Path(__file__).resolve().parent.parent
+        self.csv = root / "data" / "transactions.csv"
+        self.accounts = root / "data" / "accounts.csv"
+        self.workdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.workdir.cleanup)
+        self.expected = read_transactions(self.csv)
+
+    def path(self, name):
+        return str(Path(self.workdir.name) / name)
+
+    def test_parquet_and_feather_round_trip(self):
+        self.assertEqual(convert_csv(self.csv, self.path("t.parquet"), chunksize=7, row_group_size=5), 30)
+        pd.testing.assert_frame_equal(read_transactions(self.path("t.parquet")), self.expected)
+
+        self.expected.to_feather(self.path("t.feather"))
+        pd.testing.assert_frame_equal(read_transactions(self.path("t.feather")), self.expected)
+
+    def test_column_empty_in_first_chunk(self):
+        """Types come from the schema, so strings after an all-null first chunk still convert"""
+        rows = pd.read_csv(self.csv)
+        rows["counter_party"] = [None] * 7 + [f"ACC{i:03d}" for i in range(len(rows) - 7)]
+        rows["note"] = [None] * 7 + ["checked"] * (len(rows) - 7)
+        rows.to_csv(self.path("sparse.csv"), index=False)
+
+        for output, options in (("sparse.parquet", {}), ("sparse-parts", {"partition_by_date": True})):
+            self.assertEqual(convert_csv(self.path("sparse.csv"), self.path(output), chunksize=7, **options), 30)
+        loaded = read_transactions(self.path("sparse.parquet"))
+        self.assertEqual(loaded["counter_party"].isna().sum(), 7)
+        self.assertEqual(loaded["note"].tolist()[6:8], [None, "checked"])
+
+    def test_partitioned_date_range_and_projection(self):
+        convert_csv(self.csv, self.path("parts"), chunksize=7, partition_by_date=True)
+        start, end = "2025-08-05 12:00", "2025-08-09"
+        loaded = read_transactions(self.path("parts"), columns=columns_for("detector"), start=start, end=end)
+
+        expected = self.expected[(self.expected["timestamp"] >= start) & (self.expected["timestamp"] < end)]
+        self.assertEqual(list(loaded.columns), ["account_id", "amount", "timestamp"])
+        self.assertEqual(sorted(loaded["timestamp"]), sorted(expected["timestamp"]))
+        self.assertGreater(len(loaded), 0)
+
+    def test_detector_alerts_match_csv(self):
+        convert_csv(self.csv, self.path("t.parquet"))
+        signature = lambda detector: [(a["account_id"], a["reason"]) for a in detector.detect()]
+
+        from_csv, from_parquet, streamed = MoneyLaunderingDetector(), MoneyLaunderingDetector(), MoneyLaunderingDetector()
+        for detector in (from_csv, from_parquet, streamed):
+            detector.thresholds.update(large_txn_threshold=50000, structuring_threshold=200000)
+        from_csv.load_data(self.csv, self.accounts)
+        from_parquet.load_data(self.path("t.parquet"), self.accounts)
+        streamed.load_data(self.path("t.parquet"), self.accounts, chunksize=8)
+
+        self.assertEqual(signature(from_parquet), signature(from_csv))
+        self.assertEqual(signature(streamed), signature(from_csv))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+import unittest
+import sys
+import contextlib
+import csv
+import gzip
+import io
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import openpyxl
+import pandas as pd
+from src.compliance import RegulatoryCompliance, regulatory_thresholds, write_ctr_report, write_report
+from src.detector import MoneyLaunderingDetector
+from src.generator import generate_transactions
+from src.jobs import COMPLETED, FINISHED
+from src.store import TransactionStore
+
+# Low enough that the generated data has cash transactions to report
+CTR_THRESHOLD = 8000
+
+
+class TestComplianceReports(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        chunks, _ = generate_transactions(5000, accounts=200, days=180, start="2025-01-01", seed=11)
+        cls.transactions = pd.concat(list(chunks), ignore_index=True)
+        detector = MoneyLaunderingDetector(cls.transactions)
+        detector.thresholds.update(large_txn_threshold=20000, structuring_threshold=50000)
+        cls.alerts = detector.detect(vectorized=True)
+        cls.cash = cls.transactions[cls.transactions["cash_transaction"]
+                                    & (cls.transactions["amount"] >= CTR_THRESHOLD)]
+
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.workdir.cleanup)
+
+    def test_str_report_applies_risk_threshold(self):
+        thresholds = regulatory_thresholds()
+        self.assertEqual((thresholds["str_risk_threshold"], thresholds["ctr_threshold"]), (80, 1000000))
+        suspicious = [alert for alert in self.alerts if alert["risk_score"] >= 80]
+        self.assertTrue(0 < len(suspicious) < len(self.alerts))
+
+        path = os.path.join(self.workdir.name, "str.csv.gz")
+        result = RegulatoryCompliance(self.alerts).write_report(path, report_type="str", chunk_size=7)
+        self.assertEqual((result["format"], result["compression"]), ("csv", "gzip"))
+        self.assertEqual((result["written"], result["skipped"]), (len(suspicious), len(self.alerts) - len(suspicious)))
+        with gzip.open(path, "rt", newline="") as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual([row["alert_id"] for row in rows], [alert["alert_id"] for alert in suspicious])
+        self.assertTrue(all(int(row["risk_score"]) >= 80 and row["reason"] for row in rows))
+        self.assertTrue(all(row["amount"] or row["date"] for row in rows))
+
+        path = os.path.join(self.workdir.name, "all.jsonl")
+        self.assertEqual(write_report(iter(self.alerts), path)["written"], len(self.alerts))
+        self.assertEqual(len(open(path).readlines()), len(self.alerts))
+        for bad in ({"report_type": "sar"}, {"report_type": "ctr"}, {"fmt": "pdf"}, {"fmt": "xlsx", "compression": "gzip"}):
+            with self.assertRaises(ValueError):
+                write_report(self.alerts, os.path.join(self.workdir.name, "bad"), **bad)
+
+    def test_ctr_report_streams_cash_transactions(self):
+        self.assertGreater(len(self.cash), 0)
+        store = TransactionStore(":memory:")
+        self.addCleanup(store.close)
+        store.insert_transactions(self.transactions, dataset_id="ds1")
+
+        path = os.path.join(self.workdir.name, "ctr.jsonl")
+        result = write_ctr_report(store.iter_transactions(chunksize=500, dataset_id="ds1"), path,
+                                  thresholds={"ctr_threshold": CTR_THRESHOLD}, chunk_size=50)
+        self.assertEqual((result["report_type"], result["written"]), ("ctr", len(self.cash)))
+        self.assertEqual(result["written"] + result["skipped"], len(self.transactions))
+        rows = [json.loads(line) for line in open(path)]
+        self.assertEqual(sorted(row["transaction_id"] for row in rows), sorted(self.cash["transaction_id"].astype(str)))
+
+        compliance = RegulatoryCompliance(self.alerts, self.transactions)
+        self.assertEqual(compliance.write_report(path, report_type="ctr")["written"],
+                         int(((self.transactions["amount"] >= 1000000) & self.transactions["cash_transaction"]).sum()))
+
+    def test_xlsx_from_stored_alerts(self):
+        store = TransactionStore(":memory:")
+        self.addCleanup(store.close)
+        store.insert_alerts(self.alerts, run_id="run1", dataset_id="ds1")
+
+        path = os.path.join(self.workdir.name, "str.xlsx")
+        result = write_report(store.iter_alerts(chunksize=50, run_id="run1"), path, report_type="str")
+        sheet = openpyxl.load_workbook(path, read_only=True)["Alerts"]
+        rows = list(sheet.values)
+        self.assertEqual(rows[0][:3], ("alert_id", "account_id", "alert_type"))
+        self.assertEqual(len(rows) - 1, result["written"])
+        self.assertEqual(sorted(row[0] for row in rows[1:]),
+                         sorted(alert["alert_id"] for alert in self.alerts if alert["risk_score"] >= 80))
+
+    def test_api_download(self):
+        import app as web
+        client = web.app.test_client()
+        dataset_id = web.datasets.create(self.transactions, pd.DataFrame({"account_id": ["ACC001"]}))
+        self.addCleanup(web.datasets.delete, dataset_id)
+        with contextlib.redirect_stdout(io.StringIO()):
+            job = web.jobs.get(client.post('/api/run-detection', json={
+                'dataset_id': dataset_id, 'thresholds': {'large_txn_threshold': 20000, 'structuring_threshold': 50000}
+            }).get_json()['job_id'])
+            deadline = time.time() + 30
+            while job.status not in FINISHED and time.time() < deadline:
+                time.sleep(0.01)
+        self.assertEqual(job.status, COMPLETED)
+
+        response = client.get(f'/api/compliance-report?dataset_id={dataset_id}&type=str&format=jsonl&compression=gzip')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(f"str-{dataset_id}.jsonl.gz", response.headers['Content-Disposition'])
+        lines = gzip.decompress(response.get_data()).decode().splitlines()
+        response.close()
+        self.assertEqual(len(lines), int(response.headers['X-Report-Rows']))
+        self.assertEqual(len(lines), sum(1 for alert in self.alerts if alert["risk_score"] >= 80))
+
+        response = client.get(f'/api/compliance-report?dataset_id={dataset_id}&type=ctr&format=xlsx')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['X-Report-Rows'],
+                         str(int(((self.transactions["amount"] >= 1000000) & self.transactions["cash_transaction"]).sum())))
+        response.close()
+        self.assertEqual(client.get(f'/api/compliance-report?dataset_id={dataset_id}&format=pdf').status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
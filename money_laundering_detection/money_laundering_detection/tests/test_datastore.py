@@ -0,0 +1,96 @@
+import unittest
+import sys
+import tempfile
+import threading
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pandas as pd
+from src.datastore import DatasetNotFound, DatasetRegistry, RWLock
+from src.schema import read_transactions
+
+
+class TestDatasetRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.workdir.cleanup)
+        self.transactions = read_transactions(Path(__file__).resolve().parent.parent / "data" / "transactions.csv")
+        self.accounts = pd.DataFrame({"account_id": self.transactions["account_id"].cat.categories})
+
+    def registry(self, **options):
+        return DatasetRegistry(spill_dir=self.workdir.name, **options)
+
+    def test_datasets_are_isolated(self):
+        registry = self.registry()
+        first = registry.create(self.transactions, self.accounts)
+        second = registry.create(self.transactions.head(5), self.accounts)
+        with registry.write(second) as dataset:
+            dataset.results = {"alerts": []}
+
+        with registry.read(first) as dataset:
+            self.assertEqual(len(dataset.transactions), len(self.transactions))
+            self.assertIsNone(dataset.results)
+        with self.assertRaises(DatasetNotFound):
+            registry.get("missing")
+
+    def test_lru_spill_and_reload(self):
+        size = self.transactions.memory_usage(deep=True).sum() + self.accounts.memory_usage(deep=True).sum()
+        registry = self.registry(memory_budget=int(size * 1.5))
+        first = registry.create(self.transactions, self.accounts)
+        with registry.write(first) as dataset:
+            dataset.results = {"alerts": [{"account_id": "ACC001"}]}
+        second = registry.create(self.transactions, self.accounts)
+
+        self.assertFalse(registry.in_memory(first))
+        self.assertLessEqual(registry.memory_used(), size * 1.5)
+        with registry.read(first) as dataset:
+            pd.testing.assert_frame_equal(dataset.transactions, self.transactions)
+            self.assertEqual(dataset.results["alerts"], [{"account_id": "ACC001"}])
+        # Loading the first one back evicted the least recently used one
+        self.assertFalse(registry.in_memory(second))
+        self.assertEqual({d["dataset_id"] for d in registry.datasets()}, {first, second})
+
+        self.assertTrue(registry.delete(second))
+        with self.assertRaises(DatasetNotFound):
+            registry.get(second)
+
+    def test_write_through_is_shared(self):
+        worker_a, worker_b = self.registry(write_through=True), self.registry(write_through=True)
+        dataset_id = worker_a.create(self.transactions, self.accounts)
+        with worker_b.read(dataset_id) as dataset:
+            self.assertIsNone(dataset.results)
+
+        with worker_a.write(dataset_id) as dataset:
+            dataset.results = {"alerts_count": 3}
+        with worker_b.read(dataset_id) as dataset:
+            self.assertEqual(dataset.results, {"alerts_count": 3})
+
+    def test_busy_datasets_are_not_evicted(self):
+        registry = self.registry(memory_budget=1)
+        first = registry.create(self.transactions, self.accounts)
+        with registry.read(first):
+            registry.create(self.transactions, self.accounts)
+            self.assertTrue(registry.in_memory(first))
+
+
+class TestRWLock(unittest.TestCase):
+
+    def test_writer_waits_for_readers(self):
+        lock, events = RWLock(), []
+
+        def write():
+            with lock.write():
+                events.append("write")
+
+        with lock.read(), lock.read():
+            writer = threading.Thread(target=write)
+            writer.start()
+            writer.join(0.1)
+            events.append("read done")
+        writer.join(5)
+        self.assertEqual(events, ["read done", "write"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,56 +1,75 @@
 import unittest
 import sys
-import os
-sys.path.append('../src')
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from detector import MoneyLaunderingDetector
+import io
+import contextlib
 import pandas as pd
+from src.detector import MoneyLaunderingDetector
+from src.generator import generate_accounts, generate_transactions
+from src.patterns import PatternDetector
+
 
 class TestMoneyLaunderingDetector(unittest.TestCase):
-    
+
     def setUp(self):
         """Set up test fixtures"""
-        self.detector = MoneyLaunderingDetector()
-        self.detector.generate_sample_data(num_transactions=100)
-    
+        chunks, _ = generate_transactions(2000, accounts=200, days=180, start="2025-01-01", seed=1)
+        self.detector = MoneyLaunderingDetector(
+            pd.concat(list(chunks), ignore_index=True), generate_accounts(200, seed=1)
+        )
+        self.detector.thresholds.update(large_txn_threshold=50000, structuring_threshold=200000)
+
     def test_data_generation(self):
         """Test data generation"""
-        self.assertIsNotNone(self.detector.transactions_df)
-        self.assertIsNotNone(self.detector.accounts_df)
-        self.assertGreater(len(self.detector.transactions_df), 0)
-    
+        self.assertIsNotNone(self.detector.transactions)
+        self.assertIsNotNone(self.detector.accounts)
+        self.assertGreater(len(self.detector.transactions), 0)
+
     def test_structuring_detection(self):
         """Test structuring pattern detection"""
-        from patterns import PatternDetector
-        
         pattern_detector = PatternDetector(
-            self.detector.transactions_df, 
-            self.detector.accounts_df
+            self.detector.transactions,
+            self.detector.accounts,
+            reference_time="2025-06-30"
         )
-        
-        alerts = pattern_detector.detect_structuring()
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            alerts = pattern_detector.detect_structuring()
         self.assertIsInstance(alerts, list)
-    
+        self.assertGreater(len(alerts), 0)
+
+        # Check alert structure
+        required_fields = ['alert_type', 'account_id', 'risk_score', 'description']
+        for field in required_fields:
+            self.assertIn(field, alerts[0])
+
     def test_alert_generation(self):
         """Test alert generation"""
-        alerts = self.detector.run_detection()
+        with contextlib.redirect_stdout(io.StringIO()):
+            alerts = self.detector.detect()
         self.assertIsInstance(alerts, list)
-        
+        self.assertGreater(len(alerts), 0)
+
         # Check alert structure
-        if alerts:
-            alert = alerts[0]
-            required_fields = ['alert_type', 'account_id', 'risk_score', 'description']
-            for field in required_fields:
-                self.assertIn(field, alert)
-    
+        for field in ['account_id', 'alert_id', 'reason']:
+            self.assertIn(field, alerts[0])
+
+        # The vectorized engine raises the same alerts
+        fast = MoneyLaunderingDetector(self.detector.transactions.copy())
+        fast.thresholds = dict(self.detector.thresholds)
+        signature = lambda alerts: [(a["account_id"], a["reason"]) for a in alerts]
+        self.assertEqual(signature(fast.detect(vectorized=True)), signature(alerts))
+
     def test_compliance_thresholds(self):
         """Test compliance threshold validation"""
-        large_amounts = self.detector.transactions_df[
-            self.detector.transactions_df['amount'] > 200000
+        large_amounts = self.detector.transactions[
+            self.detector.transactions['amount'] > 200000
         ]
-        
+
         # Should have some large transactions in sample data
         self.assertGreaterEqual(len(large_amounts), 0)
 
 if __name__ == '__main__':
-    unittest.main()
\ No newline at end of file
+    unittest.main()
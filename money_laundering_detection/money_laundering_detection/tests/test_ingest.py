@@ -0,0 +1,79 @@
+import unittest
+import sys
+import tempfile
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import io
+import pandas as pd
+from src.generator import generate_transactions
+from src.ingest import ingest_file
+from src.schema import SchemaError, concat_compact, read_transactions
+
+
+class TestIngest(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.workdir.cleanup)
+        chunks, _ = generate_transactions(3000, accounts=200, days=180, start="2025-01-01", seed=4)
+        self.path = Path(self.workdir.name) / "transactions.csv"
+        pd.concat(list(chunks), ignore_index=True).to_csv(self.path, index=False)
+
+    def write(self, text):
+        path = Path(self.workdir.name) / "bad.csv"
+        path.write_text(text)
+        return path
+
+    def test_chunks_match_single_read(self):
+        frame, stats = ingest_file(self.path, chunksize=700)
+        expected = read_transactions(self.path)
+
+        pd.testing.assert_frame_equal(frame, expected)
+        self.assertIsInstance(frame["account_id"].dtype, pd.CategoricalDtype)
+        self.assertEqual((stats["rows"], stats["chunks"]), (len(expected), 5))
+        self.assertGreater(stats["rows_per_sec"], 0)
+
+    def test_consuming_concat_releases_chunks(self):
+        chunks = list(read_transactions(self.path, chunksize=700))
+        expected = concat_compact(chunks)
+        merged = concat_compact(chunks, consume=True)
+
+        pd.testing.assert_frame_equal(merged, expected)
+        self.assertTrue(all(len(chunk.columns) == 0 for chunk in chunks))
+
+    def test_schema_errors(self):
+        with self.assertRaisesRegex(SchemaError, "Missing required columns: timestamp"):
+            ingest_file(self.write("account_id,amount\nACC1,10\n"))
+        with self.assertRaisesRegex(SchemaError, r"Line 4: amount 'ten' is not a number"):
+            ingest_file(self.write("account_id,amount,timestamp\n"
+                                   "ACC1,10,2025-01-01\nACC1,11,2025-01-01\nACC1,ten,2025-01-01\n"), chunksize=2)
+        with self.assertRaisesRegex(SchemaError, "empty"):
+            ingest_file(self.write(""))
+
+
+class TestUploadApi(unittest.TestCase):
+
+    def test_upload_reports_ingest_stats(self):
+        import app as web
+        client = web.app.test_client()
+        root = Path(__file__).resolve().parent.parent / "data"
+        response = client.post('/upload', content_type='multipart/form-data', data={
+            'transactions': (open(root / "transactions.csv", "rb"), "transactions.csv"),
+            'accounts': (open(root / "accounts.csv", "rb"), "accounts.csv"),
+        })
+        body = response.get_json()
+        self.addCleanup(web.datasets.delete, body['dataset_id'])
+        self.assertEqual(body['ingest']['transactions']['rows'], 30)
+        self.assertEqual(body['transactions_count'], 30)
+
+        response = client.post('/upload', content_type='multipart/form-data', data={
+            'transactions': (io.BytesIO(b"account_id,amount\nACC1,5\n"), "transactions.csv"),
+            'accounts': (open(root / "accounts.csv", "rb"), "accounts.csv"),
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("timestamp", response.get_json()['message'])
+
+
+if __name__ == '__main__':
+    unittest.main()
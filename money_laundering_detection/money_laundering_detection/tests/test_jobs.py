@@ -0,0 +1,132 @@
+import unittest
+import sys
+import threading
+import time
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import io
+import contextlib
+import pandas as pd
+from src.jobs import CANCELLED, COMPLETED, FAILED, JobManager, JobQueueFull
+
+
+def wait(job, timeout=10):
+    deadline = time.time() + timeout
+    while job.status not in (COMPLETED, FAILED, CANCELLED) and time.time() < deadline:
+        time.sleep(0.01)
+    return job
+
+
+class TestJobManager(unittest.TestCase):
+
+    def setUp(self):
+        self.jobs = JobManager(max_workers=1, max_queued=1)
+        self.release = threading.Event()
+        self.addCleanup(self.jobs.shutdown)
+        self.addCleanup(self.release.set)
+
+    def blocking_job(self):
+        return self.jobs.submit([("block", lambda results: self.release.wait(10))])
+
+    def test_steps_progress_and_result(self):
+        job = self.jobs.submit(
+            [("first", lambda results: [1, 2, 3]), ("second", lambda results: len(results["first"]))],
+            finalize=lambda results: results["second"] * 10
+        )
+        state = wait(job).to_dict()
+        self.assertEqual(state["status"], COMPLETED)
+        self.assertEqual(state["result"], 30)
+        self.assertEqual(state["progress"]["percent"], 100.0)
+        self.assertEqual(state["progress"]["steps"][0]["alerts"], 3)
+
+    def test_backpressure(self):
+        running, queued = self.blocking_job(), self.blocking_job()
+        with self.assertRaises(JobQueueFull):
+            self.blocking_job()
+
+        self.release.set()
+        wait(running), wait(queued)
+        wait(self.jobs.submit([("step", lambda results: None)]))
+
+    def test_cancel_queued_and_running(self):
+        started = threading.Event()
+        running = self.jobs.submit([
+            ("first", lambda results: started.set() or self.release.wait(10)),
+            ("second", lambda results: self.fail("cancelled job kept running")),
+        ])
+        queued = self.jobs.submit([("never", lambda results: self.fail("cancelled job started"))])
+        started.wait(10)
+
+        self.assertTrue(self.jobs.cancel(queued.id))
+        self.assertTrue(self.jobs.cancel(running.id))
+        self.release.set()
+
+        self.assertEqual(wait(running).status, CANCELLED)
+        self.assertEqual(running.progress["first"]["status"], COMPLETED)
+        self.assertEqual(running.progress["second"]["status"], CANCELLED)
+        self.assertEqual(wait(queued).status, CANCELLED)
+        self.assertFalse(self.jobs.cancel(running.id))
+        self.assertIsNone(self.jobs.cancel("unknown"))
+
+    def test_failure_is_reported(self):
+        job = wait(self.jobs.submit([("broken", lambda results: 1 / 0)]))
+        self.assertEqual(job.status, FAILED)
+        self.assertIn("ZeroDivisionError", job.error)
+        self.assertEqual(job.progress["broken"]["status"], FAILED)
+
+
+class TestDetectionJobsApi(unittest.TestCase):
+
+    def setUp(self):
+        import app as web
+        self.web = web
+        self.client = web.app.test_client()
+        transactions = pd.read_csv(Path(__file__).resolve().parent.parent / "data" / "transactions.csv")
+        accounts = pd.DataFrame({"account_id": transactions["account_id"].unique()})
+        self.dataset_id = web.datasets.create(transactions, accounts)
+        self.addCleanup(web.datasets.delete, self.dataset_id)
+
+    def test_run_detection_returns_job(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            response = self.client.post('/api/run-detection', json={
+                'dataset_id': self.dataset_id, 'thresholds': {'large_txn_threshold': 50000}
+            })
+            self.assertEqual(response.status_code, 202)
+            job_id = response.get_json()['job_id']
+            wait(self.web.jobs.get(job_id))
+
+        state = self.client.get(f'/api/jobs/{job_id}').get_json()
+        self.assertEqual(state['status'], COMPLETED)
+        self.assertEqual([step['name'] for step in state['progress']['steps']],
+                         self.web.DETECTION_RULES)
+        self.assertEqual(state['result']['thresholds_used']['large_txn_threshold'], 50000)
+        with self.web.datasets.read(self.dataset_id) as dataset:
+            self.assertEqual(state['result']['alerts_count'], dataset.results['alerts_count'])
+
+        self.assertEqual(self.client.delete(f'/api/jobs/{job_id}').status_code, 409)
+        self.assertEqual(self.client.get('/api/jobs/unknown').status_code, 404)
+
+    def test_appended_transactions_can_be_detected(self):
+        rows = [{"transaction_id": f"S{i}", "account_id": "ACC900", "amount": 300000.0,
+                 "timestamp": f"2025-03-01 0{i}:00:00"} for i in range(7)]
+        first = self.client.post('/api/append-transactions', json={'transactions': rows[:3]}).get_json()
+        dataset_id = first['dataset_id']
+        self.addCleanup(self.web.datasets.delete, dataset_id)
+        self.client.post('/api/append-transactions', json={'dataset_id': dataset_id, 'transactions': rows[3:]})
+
+        info = self.client.get(f'/api/datasets/{dataset_id}').get_json()
+        self.assertEqual(info['transactions_count'], 7)
+        with self.web.datasets.read(dataset_id) as dataset:
+            self.assertGreater(dataset.nbytes, int(dataset.transactions.memory_usage(deep=True).sum()))
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            job_id = self.client.post('/api/run-detection', json={'dataset_id': dataset_id}).get_json()['job_id']
+            state = wait(self.web.jobs.get(job_id)).to_dict()
+        self.assertEqual(state['status'], COMPLETED)
+        self.assertEqual(state['result']['transactions_count'], 7)
+        self.assertEqual(state['result']['alerts_count'], 9)   # 7 large, structuring, 7 txns in a day
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+import unittest
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pandas as pd
+from src.graph import TransactionGraph
+from src.layering import find_layering_chains
+from src.patterns import PatternDetector
+
+
+def transfers(rows):
+    return pd.DataFrame(rows, columns=["account_id", "counter_party", "amount", "timestamp"]).assign(
+        timestamp=lambda df: pd.to_datetime(df["timestamp"]),
+        transaction_type="Wire Transfer",
+        transaction_id=lambda df: [f"TXN{i}" for i in range(len(df))],
+    )
+
+
+class TestLayering(unittest.TestCase):
+
+    def test_time_ordered_chain(self):
+        """Hops that follow each other in time form one chain"""
+        chains = find_layering_chains(transfers([
+            ("A", "B", 100000, "2025-01-01 10:00"),
+            ("B", "C", 95000, "2025-01-02 10:00"),
+            ("C", "D", 90000, "2025-01-03 10:00"),
+        ]))
+        self.assertEqual(chains.loc[chains["nodes"].map(len).idxmax(), "nodes"], ("A", "B", "C", "D"))
+        self.assertEqual(chains["total_amount"].max(), 285000)
+
+    def test_rejects_backwards_and_late_hops(self):
+        """A hop before the previous one, or outside the window, breaks the chain"""
+        chains = find_layering_chains(transfers([
+            ("A", "B", 100000, "2025-01-05 10:00"),
+            ("B", "C", 100000, "2025-01-01 10:00"),
+            ("X", "Y", 100000, "2025-01-01 10:00"),
+            ("Y", "Z", 100000, "2025-03-01 10:00"),
+        ]))
+        self.assertTrue(chains.empty)
+
+    def test_amount_tolerance_and_cycles(self):
+        """Amounts must be retained within tolerance and accounts are not revisited"""
+        rows = [
+            ("A", "B", 100000, "2025-01-01 10:00"),
+            ("B", "C", 10000, "2025-01-01 11:00"),
+            ("B", "A", 100000, "2025-01-01 12:00"),
+        ]
+        self.assertTrue(find_layering_chains(transfers(rows)).empty)
+        chains = find_layering_chains(transfers(rows), amount_tolerance=0.95, min_total_amount=0)
+        self.assertEqual(chains["nodes"].tolist(), [("A", "B", "C")])
+
+    def test_pattern_detector_alerts(self):
+        detector = PatternDetector(transfers([
+            ("A", "B", 100000, "2025-01-01 10:00"),
+            ("B", "C", 99000, "2025-01-01 11:00"),
+        ]), pd.DataFrame())
+        alerts = detector.detect_layering()
+        self.assertEqual(len(alerts), 1)
+        self.assertEqual(alerts[0]["path"], "A → B → C")
+        self.assertEqual(alerts[0]["chain_length"], 3)
+
+
+class TestTransactionGraph(unittest.TestCase):
+
+    def setUp(self):
+        self.transactions = transfers([
+            ("A", "B", 100, "2025-01-02 10:00"),
+            ("A", "B", 200, "2025-01-01 10:00"),
+            ("B", "C", 300, "2025-01-03 10:00"),
+        ])
+
+    def test_keeps_parallel_transfers(self):
+        """Repeat transfers between two parties are separate edges, in time order"""
+        graph = TransactionGraph.from_transactions(self.transactions)
+        self.assertEqual((graph.node_count, graph.edge_count), (3, 3))
+        a = graph.node_ids(["A"])[0]
+        self.assertEqual(graph.amount[graph.out_edges(a)].tolist(), [200, 100])
+        self.assertEqual(graph.out_degree().tolist(), [2, 1, 0])
+        self.assertEqual(graph.in_degree().tolist(), [0, 2, 1])
+
+    def test_filters_transaction_type(self):
+        mixed = self.transactions.assign(transaction_type=["Wire Transfer", "Purchase", "Wire Transfer"])
+        self.assertEqual(TransactionGraph.from_transactions(mixed).edge_count, 2)
+
+    def test_missing_parties_have_no_edges(self):
+        """A NaN account_id or counter_party drops that transfer instead of failing the rule"""
+        rows = self.transactions.copy()
+        rows.loc[0, "account_id"] = None
+        rows.loc[1, "counter_party"] = float("nan")
+        graph = TransactionGraph.from_transactions(rows)
+        self.assertEqual(graph.edge_count, 1)
+        self.assertEqual(graph.out_degree().sum(), 1)
+
+        detector = PatternDetector(transfers([
+            ("A", "B", 100000, "2025-01-01 10:00"),
+            ("B", "C", 99000, "2025-01-01 11:00"),
+            (None, "C", 99000, "2025-01-01 12:00"),
+        ]), pd.DataFrame())
+        self.assertEqual([alert["path"] for alert in detector.detect_layering()], ["A → B → C"])
+
+    def test_networkx_subgraph(self):
+        graph = TransactionGraph.from_transactions(self.transactions)
+        G = graph.to_networkx(["A", "B"])
+        self.assertEqual(G.number_of_edges("A", "B"), 2)
+        self.assertEqual(sorted(G.nodes()), ["A", "B"])
+
+
+if __name__ == '__main__':
+    unittest.main()
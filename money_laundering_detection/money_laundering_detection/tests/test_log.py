@@ -0,0 +1,92 @@
+import unittest
+import sys
+import contextlib
+import io
+import logging
+import os
+import tempfile
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pandas as pd
+from src import log
+from src.analytics import AdvancedAnalytics
+from src.compliance import RegulatoryCompliance
+from src.patterns import PatternDetector
+
+
+class TestLog(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.workdir.cleanup)
+        self.addCleanup(log.shutdown)
+
+    def test_queue_logger_rotates_and_gates_levels(self):
+        path = os.path.join(self.workdir.name, "system.log")
+        log.configure(level="INFO", log_file=path, max_bytes=2000, backups=2, console_level=None)
+        logger = log.get_logger("test")
+        for i in range(100):
+            logger.info("line %d %s", i, "x" * 40)
+            logger.debug("hidden %d", i)
+        log.shutdown()
+
+        self.assertTrue(os.path.exists(path + ".1"))
+        self.assertTrue(os.path.exists(path + ".2"))
+        self.assertFalse(os.path.exists(path + ".3"))
+        text = Path(path).read_text()
+        self.assertIn("INFO    aml.test", text)
+        self.assertIn("line 99", text)
+        self.assertNotIn("hidden", text)
+
+    def test_per_process_file_and_external_rotation(self):
+        log.configure(log_file=os.path.join(self.workdir.name, "system-{pid}.log"), console_level=None)
+        log.get_logger("test").warning("from this worker")
+        log.shutdown()
+        self.assertIn("from this worker", Path(self.workdir.name, f"system-{os.getpid()}.log").read_text())
+
+        # Left to logrotate: max_bytes does not apply
+        path = os.path.join(self.workdir.name, "shared.log")
+        log.configure(log_file=path, console_level=None, rotation="external", max_bytes=100)
+        for i in range(20):
+            log.get_logger("test").warning("line %d %s", i, "x" * 100)
+        log.shutdown()
+        self.assertFalse(os.path.exists(path + ".1"))
+        self.assertIn("line 19", Path(path).read_text())
+        with self.assertRaises(ValueError):
+            log.configure(log_file=path, rotation="daily")
+
+    def test_detectors_return_results_without_printing(self):
+        transactions = pd.DataFrame({
+            "transaction_id": ["T1", "T2", "T3"],
+            "account_id": ["ACC001", "ACC001", "ACC002"],
+            "counter_party": ["ACC002", "ACC003", "ACC001"],
+            "transaction_type": ["Wire Transfer", "Cash Deposit", "Wire Transfer"],
+            "is_international": [True, False, True],
+            "amount": [250000.0, 20.0, 70.0],
+            "type": ["cross_border", "deposit", "cross_border"],
+            "timestamp": pd.to_datetime(["2025-01-01", "2025-01-02", "2025-01-02"]),
+        })
+        path = os.path.join(self.workdir.name, "system.log")
+        log.configure(level="DEBUG", log_file=path, console_level=None)
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            findings = AdvancedAnalytics(transactions, pd.DataFrame()).run()
+            report = RegulatoryCompliance([{"account_id": "ACC001", "alert_id": "A1", "reason": "Large"},
+                                           {"account_id": "ACC001", "alert_type": "Velocity"}]).generate_report()
+            PatternDetector(transactions, pd.DataFrame()).run_all()
+        log.shutdown()
+
+        self.assertEqual(out.getvalue(), "")
+        self.assertEqual(findings["detect_high_risk_accounts"], [{"account_id": "ACC001"}])
+        self.assertEqual(findings["detect_frequent_transactions"], [])
+        self.assertEqual([f["amount"] for f in findings["detect_cross_border_transactions"]], [250000.0, 70.0])
+        self.assertEqual(report, {"alerts_count": 2, "accounts_count": 1, "by_reason": {"Large": 1, "Velocity": 1}})
+        text = Path(path).read_text()
+        self.assertIn("Cross-border transaction: 2 found", text)
+        self.assertIn("Account ACC001 | A1 | Large", text)
+        self.assertIn("Pattern rule timings", text)
+
+
+if __name__ == '__main__':
+    unittest.main()
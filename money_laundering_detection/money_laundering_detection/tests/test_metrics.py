@@ -0,0 +1,93 @@
+import unittest
+import sys
+import json
+import subprocess
+import textwrap
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pandas as pd
+from src.detector import MoneyLaunderingDetector
+from src.metrics import REGISTRY, MetricsRegistry, instrumented
+
+
+class Rules:
+    def __init__(self, rows):
+        self.transactions = list(range(rows))
+
+
+class TestMetrics(unittest.TestCase):
+
+    def test_instrumented_records_rule_metrics(self):
+        registry = MetricsRegistry()
+
+        class Detector(Rules):
+            @instrumented("test", registry=registry)
+            def flag(self):
+                return [{"account_id": "ACC001"}] * 3
+
+            @instrumented("test", rule=lambda self, name: name, registry=registry)
+            def named(self, name):
+                return ([{"account_id": "ACC001"}], {"total": 0.1})
+
+        detector = Detector(rows=10)
+        detector.flag()
+        detector.flag()
+        detector.named("velocity")
+
+        summary = registry.summary()["test"]
+        self.assertEqual((summary["flag"]["calls"], summary["flag"]["rows"], summary["flag"]["alerts"]), (2, 20, 6))
+        self.assertEqual(summary["velocity"]["alerts"], 1)
+        self.assertIsNotNone(summary["flag"]["peak_memory_delta_bytes"])
+        json.loads(registry.summary_json())
+
+        text = registry.render()
+        self.assertIn('# TYPE aml_rule_duration_seconds histogram', text)
+        self.assertIn('aml_rule_duration_seconds_count{component="test",rule="flag"} 2', text)
+        self.assertIn('aml_rule_duration_seconds_bucket{component="test",rule="flag",le="+Inf"} 2', text)
+        self.assertIn('aml_rule_alerts_total{component="test",rule="flag"} 6', text)
+
+    def test_detector_and_metrics_endpoint(self):
+        transactions = pd.DataFrame({"account_id": ["ACC001", "ACC002"], "amount": [200000.0, 10.0],
+                                     "timestamp": pd.to_datetime(["2025-01-01", "2025-01-02"])})
+        MoneyLaunderingDetector(transactions).detect(vectorized=True)
+        self.assertGreaterEqual(REGISTRY.summary()["detector"]["large_transactions"]["alerts"], 1)
+
+        import app as web
+        client = web.app.test_client()
+        client.get('/api/jobs')
+        response = client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith('text/plain'))
+        text = response.get_data(as_text=True)
+        self.assertIn('aml_http_requests_total{endpoint="/api/jobs",method="GET",status="200"}', text)
+        self.assertIn('rule="large_transactions"', text)
+        self.assertIn('# TYPE aml_jobs_pending gauge', text)
+
+    def test_imports_without_resource_module(self):
+        """Windows has no `resource` module (nor /proc): the detectors import and skip memory deltas"""
+        script = textwrap.dedent("""
+            import builtins, sys
+            sys.modules["resource"] = None
+            real_open = builtins.open
+            def no_proc(path, *args, **kwargs):
+                if str(path).startswith("/proc"):
+                    raise OSError("no /proc")
+                return real_open(path, *args, **kwargs)
+            builtins.open = no_proc
+            import src.detector
+            from src import metrics
+            assert metrics._rss_and_hwm() == (None, None)
+            assert metrics._MemoryProbe().delta() is None
+            registry = metrics.MetricsRegistry()
+            registry.sampled("aml_unknown", "Not available here", lambda: None)
+            registry.sampled("aml_known", "Available", lambda: 3)
+            text = registry.render()
+            assert "aml_unknown" not in text and "aml_known 3" in text, text
+        """)
+        root = Path(__file__).resolve().parent.parent
+        result = subprocess.run([sys.executable, "-c", script], cwd=root, capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+if __name__ == '__main__':
+    unittest.main()
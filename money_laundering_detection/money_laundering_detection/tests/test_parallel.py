@@ -0,0 +1,60 @@
+import unittest
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pandas as pd
+from src.detector import MoneyLaunderingDetector
+from src.generator import generate_transactions
+from src.parallel import detect_parallel, shard_ids
+from src.patterns import PER_ACCOUNT_RULES, PatternDetector
+
+
+class TestParallelDetection(unittest.TestCase):
+
+    def setUp(self):
+        root = Path(__file__).resolve().parent.parent
+        self.transactions = pd.read_csv(root / "data" / "transactions.csv")
+        self.thresholds = {"large_txn_threshold": 50000, "structuring_threshold": 150000}
+
+    def test_shards_are_stable(self):
+        """The same account always hashes to the same shard"""
+        ids = self.transactions["account_id"]
+        shards = shard_ids(ids, 4)
+        self.assertTrue(((shards >= 0) & (shards < 4)).all())
+        self.assertEqual(pd.Series(shards).groupby(ids.values).nunique().max(), 1)
+        self.assertEqual(shard_ids(ids, 4).tolist(), shards.tolist())
+
+    def test_matches_single_process(self):
+        """Sharded run merges into the single-process alert order"""
+        detector = MoneyLaunderingDetector(self.transactions.copy())
+        detector.thresholds.update(self.thresholds)
+        expected = [(a["account_id"], a["reason"]) for a in detector.detect(vectorized=True)]
+
+        for workers, shards in [(1, 3), (2, 2), (2, 5)]:
+            alerts, pattern_alerts = detect_parallel(
+                self.transactions, workers=workers, shards=shards, thresholds=self.thresholds,
+                pattern_rules=(), layering=False
+            )
+            self.assertEqual([(a["account_id"], a["reason"]) for a in alerts], expected)
+            self.assertEqual(pattern_alerts, [])
+
+    def test_default_rules_match_single_process_patterns(self):
+        """Every per-account pattern rule and layering, as one PatternDetector finds them"""
+        chunks, _ = generate_transactions(3000, accounts=200, days=180, start="2025-01-01", seed=3)
+        transactions = pd.concat(list(chunks), ignore_index=True)
+        reference_time = "2025-07-01"
+        detector = PatternDetector(transactions, None, reference_time=reference_time)
+        expected = [alert for rule in PER_ACCOUNT_RULES + ["detect_layering"] for alert in getattr(detector, rule)()]
+        self.assertGreater(len({alert["alert_type"] for alert in expected}), 3)
+        # Shards sum amounts in another order: compare money to the paisa
+        strip = lambda found: [{k: round(v, 2) if isinstance(v, float) else v for k, v in a.items()
+                                if k != "detected_at"} for a in found]
+
+        for workers, shards in [(1, 3), (2, 2)]:
+            _, pattern_alerts = detect_parallel(transactions, workers=workers, shards=shards,
+                                                reference_time=reference_time)
+            self.assertEqual(strip(pattern_alerts), strip(expected))
+
+if __name__ == '__main__':
+    unittest.main()
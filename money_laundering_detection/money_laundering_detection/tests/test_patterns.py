@@ -0,0 +1,275 @@
+import unittest
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+import pandas as pd
+from src.patterns import ALL_RULES, PatternDetector
+from src.sketches import HyperLogLog
+from src.smurfing import rolling_smurfing_windows
+from src.velocity import sliding_window_velocity
+
+
+def transactions(rows):
+    """(account_id, timestamp, amount) rows → transactions DataFrame"""
+    df = pd.DataFrame(rows, columns=["account_id", "timestamp", "amount"])
+    df["timestamp"] = pd.to_datetime(df["timestamp"])
+    df["transaction_id"] = [f"TXN{i}" for i in range(len(df))]
+    return df
+
+
+class TestDormantReactivation(unittest.TestCase):
+
+    def setUp(self):
+        self.transactions = transactions([
+            ("ACC001", "2024-01-01 10:00", 1000),
+            ("ACC001", "2024-06-01 10:00", 90000),
+            ("ACC001", "2024-06-05 10:00", 90000),
+            ("ACC001", "2024-06-10 10:00", 90000),
+            ("ACC002", "2024-06-01 10:00", 90000),
+            ("ACC002", "2024-06-02 10:00", 90000),
+            ("ACC002", "2024-06-03 10:00", 90000),
+        ]).sample(frac=1, random_state=0)
+
+    def test_reference_time_backfill(self):
+        """Recent window is anchored on reference_time, not the wall clock"""
+        alerts = PatternDetector(self.transactions, None, reference_time="2024-06-15").detect_dormant_reactivation()
+        self.assertEqual([a["account_id"] for a in alerts], ["ACC001"])
+        self.assertEqual(alerts[0]["dormant_period_days"], 152)
+        self.assertEqual(alerts[0]["recent_transactions"], 3)
+        self.assertEqual(alerts[0]["recent_amount"], 270000)
+
+    def test_later_transactions_do_not_change_backfill(self):
+        """Rows after reference_time count neither as recent activity nor as a dormant gap"""
+        later = pd.concat([self.transactions, transactions([
+            ("ACC001", "2024-06-20 10:00", 500000),
+            ("ACC002", "2024-12-01 10:00", 500000),
+        ])], ignore_index=True)
+        before = PatternDetector(self.transactions, None, reference_time="2024-06-15").detect_dormant_reactivation()
+        after = PatternDetector(later, None, reference_time="2024-06-15").detect_dormant_reactivation()
+
+        strip = lambda found: [{k: v for k, v in a.items() if k != "detected_at"} for a in found]
+        self.assertEqual(strip(after), strip(before))
+        self.assertEqual([a["account_id"] for a in after], ["ACC001"])
+
+    def test_outside_recent_window(self):
+        detector = PatternDetector(self.transactions, None)
+        self.assertEqual(detector.detect_dormant_reactivation(reference_time="2024-09-01"), [])
+
+
+class TestVelocity(unittest.TestCase):
+
+    def test_window_straddling_clock_hour(self):
+        """8 transactions between 10:55 and 11:05 are one burst"""
+        burst = [("ACC001", f"2025-08-09 10:{55 + i}:00", 1000) for i in range(4)]
+        burst += [("ACC001", f"2025-08-09 11:0{i}:00", 1000) for i in range(4)]
+        burst += [("ACC002", f"2025-08-09 1{i}:00:00", 5000) for i in range(8)]
+        detector = PatternDetector(transactions(burst), None)
+
+        alerts = detector.detect_velocity_anomalies()
+        self.assertEqual([a["account_id"] for a in alerts], ["ACC001"])
+        self.assertEqual(alerts[0]["max_hourly_transactions"], 8)
+        self.assertEqual(alerts[0]["max_transactions_5min"], 4)
+        self.assertEqual(alerts[0]["max_amount_24h"], 8000)
+
+    def test_matches_brute_force(self):
+        """Two-pointer maxima equal a direct scan of every window"""
+        rng = np.random.default_rng(7)
+        df = transactions([
+            (f"ACC{rng.integers(3)}", pd.Timestamp("2025-01-01") + pd.Timedelta(minutes=int(m)), float(a))
+            for m, a in zip(rng.integers(0, 600, 200), rng.integers(1, 100, 200))
+        ])
+        windows = {"10min": pd.Timedelta(minutes=10), "1h": pd.Timedelta(hours=1)}
+        velocity = sliding_window_velocity(df, windows)
+
+        for account_id, rows in df.groupby("account_id"):
+            for name, window in windows.items():
+                inside = [rows[(rows.timestamp > t - window) & (rows.timestamp <= t)] for t in rows.timestamp]
+                self.assertEqual(velocity.loc[account_id, f"max_count_{name}"], max(len(w) for w in inside))
+                self.assertAlmostEqual(velocity.loc[account_id, f"max_amount_{name}"], max(w.amount.sum() for w in inside))
+
+
+class TestSmurfing(unittest.TestCase):
+
+    def cash(self, rows):
+        """(account_id, counter_party, timestamp, amount) rows → cash deposits"""
+        df = pd.DataFrame(rows, columns=["account_id", "counter_party", "timestamp", "amount"])
+        df["timestamp"] = pd.to_datetime(df["timestamp"])
+        df["cash_transaction"] = True
+        return df
+
+    def setUp(self):
+        # A year of small deposits from one party, then 12 deposits from 8 parties in 20 days
+        start = pd.Timestamp("2024-01-01")
+        rows = [("ACC001", "CP_REGULAR", start + pd.Timedelta(days=7 * i), 500) for i in range(52)]
+        rows += [("ACC001", f"CP_{i % 8}", start + pd.Timedelta(days=200 + 2 * i), 20000) for i in range(12)]
+        rows += [("ACC002", f"CP_{i}", start + pd.Timedelta(days=30 * i), 20000) for i in range(12)]
+        self.deposits = self.cash(rows)
+
+    def test_burst_inside_long_history(self):
+        """Whole-history span is a year, but one 45-day window qualifies"""
+        alerts = PatternDetector(self.deposits, None).detect_smurfing()
+        self.assertEqual([a["account_id"] for a in alerts], ["ACC001"])
+        self.assertEqual(alerts[0]["unique_depositors"], 9)
+        self.assertLessEqual(alerts[0]["time_period_days"], 45)
+
+    def test_approximate_matches_exact(self):
+        exact = PatternDetector(self.deposits, None).detect_smurfing()
+        approximate = PatternDetector(self.deposits, None).detect_smurfing(approximate=True)
+        self.assertEqual([a["account_id"] for a in approximate], ["ACC001"])
+        self.assertEqual(approximate[0]["unique_depositors"], exact[0]["unique_depositors"])
+
+    def test_exact_counts_match_brute_force(self):
+        rng = np.random.default_rng(3)
+        df = self.cash([
+            (f"ACC{rng.integers(2)}", f"CP{rng.integers(15)}",
+             pd.Timestamp("2024-01-01") + pd.Timedelta(hours=int(h)), 20000.0)
+            for h in rng.choice(24 * 120, 300, replace=False)
+        ])
+        windows = rolling_smurfing_windows(df, window_days=10, min_depositors=1)
+        self.assertGreater(len(windows), 0)
+        for _, window in windows.iterrows():
+            rows = df[(df.account_id == window.account_id) & (df.timestamp <= window.window_end)
+                      & (df.timestamp > window.window_end - pd.Timedelta(days=10))]
+            self.assertEqual(window.txn_count, len(rows))
+            self.assertEqual(window.unique_depositors, rows.counter_party.nunique())
+
+    def test_hyperloglog_merge(self):
+        left = HyperLogLog().add([f"CP{i}" for i in range(6000)])
+        right = HyperLogLog().add([f"CP{i}" for i in range(4000, 10000)])
+        self.assertAlmostEqual(left.count(), 6000, delta=6000 * 0.1)
+        self.assertAlmostEqual(left.merge(right).count(), 10000, delta=10000 * 0.1)
+        with self.assertRaises(ValueError):
+            left.merge(HyperLogLog(precision=8))
+
+
+class TestRunAll(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(11)
+        rows = 2000
+        self.transactions = pd.DataFrame({
+            "transaction_id": [f"TXN{i}" for i in range(rows)],
+            "account_id": [f"ACC{i}" for i in rng.integers(0, 20, rows)],
+            "counter_party": [f"ACC{i}" for i in rng.integers(0, 20, rows)],
+            "amount": np.where(rng.random(rows) < 0.7, rng.integers(1, 30, rows) * 5000.0, rng.random(rows) * 90000),
+            "transaction_type": rng.choice(["Cash Deposit", "Wire Transfer", "Purchase"], rows),
+            "timestamp": pd.Timestamp("2025-01-01") + pd.to_timedelta(rng.integers(0, 20 * 86400, rows), unit="s"),
+            "is_international": rng.random(rows) < 0.2,
+        })
+        self.transactions["cash_transaction"] = self.transactions["transaction_type"] == "Cash Deposit"
+
+    def test_matches_separate_calls(self):
+        original = self.transactions.copy()
+        alerts, timings = PatternDetector(self.transactions, None, reference_time="2025-01-25").run_all()
+
+        separate = []
+        for rule in ALL_RULES:
+            detector = PatternDetector(self.transactions, None, reference_time="2025-01-25")
+            separate.extend(getattr(detector, rule)())
+
+        strip = lambda found: [{k: v for k, v in a.items() if k != "detected_at"} for a in found]
+        self.assertEqual(strip(alerts), strip(separate))
+        self.assertIn("Round Amount Fraud", {a["alert_type"] for a in alerts})
+        self.assertEqual(set(timings), set(ALL_RULES) | {"features", "graph", "total"})
+        # Rules no longer add helper columns (is_round, date_hour) to the input
+        pd.testing.assert_frame_equal(self.transactions, original)
+
+    def test_structuring_days_and_missing_timestamps(self):
+        df = transactions([
+            ("ACC001", "2025-01-01 09:00", 4000),
+            ("ACC001", "2025-01-01 12:00", 4000),
+            ("ACC001", "2025-01-01 23:59", 4000),
+            ("ACC001", "2025-01-02 00:01", 4000),
+            ("ACC001", None, 4000),
+        ])
+        df["cash_transaction"] = True
+        alerts = PatternDetector(df, None).detect_structuring()
+        self.assertEqual([(a["date"], a["transaction_count"]) for a in alerts],
+                         [(pd.Timestamp("2025-01-01").date(), 3)])
+
+
+class TestIncrementalUpdate(unittest.TestCase):
+
+    @staticmethod
+    def state(df, reference_time="2025-01-25"):
+        """Alerts of a full run_all() over df, keyed and compared the way update() tracks them"""
+        alerts, _ = PatternDetector(df, None, reference_time=reference_time).run_all()
+        return {PatternDetector._alert_key(a): {k: v for k, v in a.items() if k != "detected_at"} for a in alerts}
+
+    def test_streamed_batches_match_full_recompute(self):
+        rng = np.random.default_rng(11)
+        rows = 2000
+        df = pd.DataFrame({
+            "transaction_id": [f"TXN{i}" for i in range(rows)],
+            "account_id": [f"ACC{i}" for i in rng.integers(0, 20, rows)],
+            "counter_party": [f"ACC{i}" for i in rng.integers(0, 20, rows)],
+            # Whole amounts: sums do not depend on the order the rows arrive in
+            "amount": rng.integers(1, 30, rows) * 5000.0 + np.where(rng.random(rows) < 0.3, 1234.0, 0),
+            "transaction_type": rng.choice(["Cash Deposit", "Wire Transfer", "Purchase"], rows),
+            "timestamp": pd.Timestamp("2025-01-01") + pd.to_timedelta(rng.integers(0, 20 * 86400, rows), unit="s"),
+            "is_international": rng.random(rows) < 0.2,
+        }).sort_values("timestamp", ignore_index=True)
+        df["cash_transaction"] = df["transaction_type"] == "Cash Deposit"
+        history, later = df.iloc[:1000], df.iloc[1000:]
+        wires = later["transaction_type"] == "Wire Transfer"
+        batches = [later[~wires], later[wires].iloc[:300], later[wires].iloc[300:]]
+
+        detector = PatternDetector(history, None, reference_time="2025-01-25")
+        loaded = [history]
+        for batch in batches:
+            before = dict(detector._alert_state or self.state(history))
+            emitted = detector.update(batch)
+            loaded.append(batch)
+            expected = self.state(pd.concat(loaded, ignore_index=True))
+
+            self.assertEqual(detector._alert_state, expected)
+            changed = {key for key in expected if before.get(key) != expected[key]}
+            self.assertEqual({PatternDetector._alert_key(a) for a in emitted}, changed)
+            layering = {key for key in changed if key[0] == "Layering"}
+            # Layering is re-run only for batches with wire transfers
+            self.assertEqual(bool(layering), batch is not batches[0])
+
+    def test_alert_that_stops_firing_is_emitted_again(self):
+        rows = [("ACC001", f"2025-01-0{i + 1} 10:00", 50000) for i in range(5)]
+        detector = PatternDetector(transactions(rows).assign(counter_party="ACC009"), None,
+                                   reference_time="2025-01-25")
+        key = ("Round Amount Fraud", "ACC001", None)
+        self.assertEqual(detector.update(transactions([("ACC002", "2025-01-06 10:00", 10)])), [])
+        self.assertIn(key, detector._alert_state)
+
+        # Four odd amounts: 5 of 9 transactions are round, under the 60% the rule needs
+        odd = transactions([("ACC001", f"2025-01-1{i} 10:00", 7) for i in range(4)])
+        self.assertEqual(detector.update(odd), [])
+        self.assertNotIn(key, detector._alert_state)
+
+        again = detector.update(transactions([("ACC001", f"2025-01-2{i} 10:00", 50000) for i in range(3)]))
+        self.assertEqual([PatternDetector._alert_key(a) for a in again], [key])
+        self.assertEqual(again[0]["round_transactions"], 8)
+
+    def test_wire_batch_does_not_rebuild_full_history(self):
+        def wires(rows):
+            df = pd.DataFrame(rows, columns=["account_id", "counter_party", "timestamp", "amount"])
+            df["timestamp"] = pd.to_datetime(df["timestamp"])
+            df["transaction_type"] = "Wire Transfer"
+            return df
+
+        history = wires([
+            ("A", "B", "2025-01-01 10:00", 60000), ("B", "C", "2025-01-02 10:00", 58000),
+            ("X", "Y", "2025-01-01 10:00", 80000), ("Y", "Z", "2025-01-03 10:00", 79000),
+        ])
+        detector = PatternDetector(history, None, reference_time="2025-01-25")
+        batch = wires([("C", "D", "2025-01-04 10:00", 57000)])
+        emitted = detector.update(batch)
+
+        # The batch is still pending: no full frame, graph or feature table was built
+        self.assertEqual(len(detector._pending), 1)
+        self.assertIsNone(detector._graph)
+        self.assertIsNone(detector._features)
+        self.assertEqual({a["path"] for a in emitted}, {"A → B → C → D", "B → C → D"})
+        self.assertIn(("Layering", "X", "X → Y → Z"), detector._alert_state)
+        self.assertEqual(detector._alert_state, self.state(pd.concat([history, batch], ignore_index=True)))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+import sys
+import contextlib
+import io
+import os
+import pstats
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pandas as pd
+from src import profiling
+from src.detector import MoneyLaunderingDetector
+from src.jobs import COMPLETED, FINISHED
+from src.profiling import ProfileSession
+
+
+class TestProfiling(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.workdir.cleanup)
+        self.transactions = pd.read_csv(Path(__file__).resolve().parent.parent / "data" / "transactions.csv")
+
+    def test_session_writes_per_rule_reports(self):
+        self.assertIsNone(profiling.current())
+        session = ProfileSession(name="run", directory=self.workdir.name)
+        with session.activate():
+            self.assertIs(profiling.current(), session)
+            MoneyLaunderingDetector(self.transactions).detect(vectorized=True)
+        self.assertIsNone(profiling.current())
+        self.assertFalse(tracemalloc.is_tracing())
+
+        rules = session.rules()
+        for label in ("detector.detect", "detector.large_transactions", "detector.structuring"):
+            self.assertEqual(rules[label]["calls"], 1)
+        files = session.save()
+        self.assertIn(os.path.join(self.workdir.name, "run", "summary.txt"), files)
+
+        stats = pstats.Stats(os.path.join(self.workdir.name, "run", "detector.daily_aggregates.prof"))
+        self.assertTrue(any(name == "daily_aggregates" for _, _, name in stats.stats))
+        report = Path(self.workdir.name, "run", "detector.daily_aggregates.txt").read_text()
+        self.assertIn("Top 30 functions by cumulative time", report)
+        self.assertIn("allocation sites", report)
+
+    def test_api_profile_flag(self):
+        import app as web
+        client = web.app.test_client()
+        dataset_id = web.datasets.create(self.transactions, pd.DataFrame({"account_id": ["ACC001"]}))
+        self.addCleanup(web.datasets.delete, dataset_id)
+        profile_dir, web.PROFILE_DIR = web.PROFILE_DIR, self.workdir.name
+        self.addCleanup(setattr, web, "PROFILE_DIR", profile_dir)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            response = client.post('/api/run-detection?profile=1', json={'dataset_id': dataset_id})
+            job = web.jobs.get(response.get_json()['job_id'])
+            deadline = time.time() + 30
+            while job.status not in FINISHED and time.time() < deadline:
+                time.sleep(0.01)
+        self.assertEqual(job.status, COMPLETED)
+
+        profile = job.result['profile']
+        self.assertTrue(profile['directory'].startswith(self.workdir.name))
+        self.assertIn('detector.structuring', profile['rules'])
+        self.assertIn('analytics.detect_frequent_transactions', profile['rules'])
+        self.assertTrue(all(os.path.exists(path) for path in profile['files']))
+
+
+if __name__ == '__main__':
+    unittest.main()
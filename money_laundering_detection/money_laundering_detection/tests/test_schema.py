@@ -0,0 +1,71 @@
+import unittest
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import io
+import contextlib
+import numpy as np
+import pandas as pd
+from src.detector import MoneyLaunderingDetector
+from src.patterns import PatternDetector
+from src.schema import compact, memory_report, read_transactions
+
+
+class TestCompactSchema(unittest.TestCase):
+
+    def setUp(self):
+        self.file = Path(__file__).resolve().parent.parent / "data" / "transactions.csv"
+
+    def test_dtypes(self):
+        transactions = read_transactions(self.file)
+        self.assertIsInstance(transactions["account_id"].dtype, pd.CategoricalDtype)
+        self.assertEqual(str(transactions["timestamp"].dtype), "datetime64[ns]")
+        # Unique transaction ids are kept as plain values
+        self.assertFalse(isinstance(transactions["transaction_id"].dtype, pd.CategoricalDtype))
+
+        report = memory_report(transactions)
+        self.assertEqual(report.loc["total", "bytes"], report["bytes"].drop("total").sum())
+
+    def test_amounts_downcast_only_when_lossless(self):
+        frame = pd.DataFrame({"amount": [1000.0, 250000.0], "cash_transaction": [True, None]})
+        compacted = compact(frame)
+        self.assertEqual(str(compacted["amount"].dtype), "float32")
+        self.assertEqual(compacted["cash_transaction"].tolist(), [True, False])
+        self.assertEqual(str(compact(frame.assign(amount=[1000.01, 250000.0]))["amount"].dtype), "float64")
+
+    def test_same_alerts_as_plain_frame(self):
+        plain = pd.read_csv(self.file)
+        compacted = read_transactions(self.file)
+
+        signature = lambda alerts: [(a["account_id"], a["reason"]) for a in alerts]
+        detectors = [MoneyLaunderingDetector(frame.copy()) for frame in (plain, compacted)]
+        for detector in detectors:
+            detector.thresholds.update(large_txn_threshold=50000, structuring_threshold=200000)
+        self.assertEqual(*[signature(detector.detect(vectorized=True)) for detector in detectors])
+
+    def test_same_pattern_alerts_as_plain_frame(self):
+        rng = np.random.default_rng(5)
+        rows = 3000
+        feed = pd.DataFrame({
+            "transaction_id": [f"TXN{i}" for i in range(rows)],
+            "account_id": [f"ACC{i}" for i in rng.integers(0, 25, rows)],
+            "counter_party": [f"ACC{i}" for i in rng.integers(0, 25, rows)],
+            "amount": rng.integers(1, 40, rows) * 5000.0,
+            "transaction_type": rng.choice(["Cash Deposit", "Wire Transfer", "Purchase"], rows),
+            "timestamp": pd.Timestamp("2025-01-01") + pd.to_timedelta(rng.integers(0, 60 * 86400, rows), unit="s"),
+        })
+        feed["cash_transaction"] = feed["transaction_type"] == "Cash Deposit"
+        csv = feed.to_csv(index=False)
+
+        strip = lambda alerts: [{k: v for k, v in a.items() if k != "detected_at"} for a in alerts]
+        with contextlib.redirect_stdout(io.StringIO()):
+            plain = pd.read_csv(io.StringIO(csv))
+            expected = strip(PatternDetector(plain, None, reference_time="2025-03-01").run_all()[0])
+            compacted = read_transactions(io.StringIO(csv))
+            actual = strip(PatternDetector(compacted, None, reference_time="2025-03-01").run_all()[0])
+        self.assertGreater(len(expected), 0)
+        self.assertEqual(actual, expected)
+
+if __name__ == '__main__':
+    unittest.main()
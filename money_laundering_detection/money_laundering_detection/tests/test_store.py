@@ -0,0 +1,119 @@
+import unittest
+import sys
+import tempfile
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pandas as pd
+from src.datastore import Dataset, DatasetRegistry
+from src.detector import MoneyLaunderingDetector
+from src.generator import generate_accounts, generate_transactions
+from src.store import TransactionStore
+
+
+class TestTransactionStore(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        chunks, _ = generate_transactions(3000, accounts=200, days=180, start="2025-01-01", seed=3)
+        cls.transactions = pd.concat(list(chunks), ignore_index=True)
+        cls.accounts = generate_accounts(200, seed=3)
+
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.workdir.cleanup)
+        self.store = TransactionStore.from_url(f"sqlite:///{self.workdir.name}/aml.db", batch_size=700)
+        self.addCleanup(self.store.close)
+        self.store.save_dataset("ds1", self.transactions, self.accounts, name="sample")
+
+    def test_account_and_time_range_queries(self):
+        account = self.transactions["account_id"].iloc[0]
+        start, end = pd.Timestamp("2025-02-01"), pd.Timestamp("2025-04-01")
+        history = self.store.account_history(account, start, end)
+
+        expected = self.transactions[(self.transactions["account_id"] == account)
+                                     & (self.transactions["timestamp"] >= start)
+                                     & (self.transactions["timestamp"] < end)]
+        self.assertEqual(len(history), len(expected))
+        self.assertTrue(history["timestamp"].is_monotonic_increasing)
+        self.assertAlmostEqual(history["amount"].sum(), expected["amount"].sum())
+        self.assertEqual(str(history["account_id"].dtype), "category")
+
+        plan = self.store.explain("SELECT * FROM transactions WHERE account_id = ? AND timestamp >= ?",
+                                  (str(account), 0))
+        self.assertIn("idx_transactions_account_time", " ".join(plan))
+        self.assertEqual(self.store.counts()["transactions"], len(self.transactions))
+
+    def test_detector_loads_only_the_requested_range(self):
+        start, end = "2025-03-01", "2025-05-01"
+        detector = MoneyLaunderingDetector()
+        detector.load_store(self.store, start=start, end=end)
+
+        in_memory = MoneyLaunderingDetector(
+            self.transactions[(self.transactions["timestamp"] >= start) & (self.transactions["timestamp"] < end)],
+            self.accounts
+        )
+        self.assertLess(len(detector.transactions), len(self.transactions))
+        key = lambda alerts: sorted((str(a["account_id"]), a["reason"]) for a in alerts)
+        self.assertEqual(key(detector.detect(vectorized=True)), key(in_memory.detect(vectorized=True)))
+
+    def test_alerts_and_dataset_restore(self):
+        alerts = [{"account_id": "ACC001", "alert_type": "Structuring", "risk_score": 90, "date": "2025-01-02"},
+                  {"account_id": "ACC002", "alert_type": "Smurfing", "risk_score": 40, "date": "2025-03-02"},
+                  {"account_id": "ACC001", "reason": "Large transaction", "date": "2025-05-02"}]
+        run_id = self.store.insert_alerts(alerts, dataset_id="ds1", metadata={"thresholds_used": {"x": 1}})
+
+        self.assertEqual(len(self.store.alerts(account_id="ACC001")), 2)
+        self.assertEqual([a["alert_type"] for a in self.store.alerts(min_risk=50)], ["Structuring"])
+        self.assertEqual(len(self.store.alerts(start="2025-02-01", end="2025-04-01")), 1)
+        self.assertEqual(len(self.store.alerts(alert_type="Large transaction", run_id=run_id)), 1)
+        self.assertEqual(self.store.runs("ds1")[0]["metadata"], {"thresholds_used": {"x": 1}})
+
+        # A fresh registry (a restart) finds the dataset through its loader
+        def loader(dataset_id):
+            stored = self.store.load_dataset(dataset_id)
+            return stored and Dataset(dataset_id, stored[1], stored[2], stored[0])
+
+        registry = DatasetRegistry(spill_dir=self.workdir.name + "/spill", loader=loader)
+        with registry.read("ds1") as dataset:
+            self.assertEqual((dataset.name, len(dataset.transactions)), ("sample", len(self.transactions)))
+            self.assertLessEqual(len(dataset.accounts), len(self.accounts))
+
+    def test_accounts_are_kept_per_dataset(self):
+        account = str(self.accounts["account_id"].iloc[0])
+        other = self.accounts.iloc[:1].assign(customer_name="Other")
+        self.store.save_dataset("ds2", self.transactions.iloc[:0], other, name="other")
+
+        self.assertNotEqual(self.store.load_dataset("ds1")[2].set_index("account_id").loc[account, "customer_name"],
+                            "Other")
+        self.assertEqual(self.store.accounts([account], dataset_id="ds2")["customer_name"].tolist(), ["Other"])
+        self.assertEqual(len(self.store.accounts([account])), 2)
+
+        self.store.delete_dataset("ds2")
+        self.assertEqual(len(self.store.accounts([account])), 1)
+
+    def test_nanosecond_timestamps_with_nulls(self):
+        stamps = [pd.Timestamp("2025-06-01 12:00:00.123456789"), pd.NaT, pd.Timestamp("2025-06-02 00:00:00.000000001")]
+        frame = pd.DataFrame({"transaction_id": ["N1", "N2", "N3"], "account_id": "ACCNS",
+                              "amount": 10.0, "timestamp": stamps})
+        self.store.save_dataset("ns", frame, None)
+
+        stored = self.store.transactions(dataset_id="ns").set_index("transaction_id")["timestamp"]
+        self.assertEqual(stored["N1"], stamps[0])
+        self.assertTrue(pd.isna(stored["N2"]))
+        self.assertEqual(stored["N3"], stamps[2])
+
+    def test_account_filter_beyond_parameter_limit(self):
+        account_ids = [f"MISSING{i}" for i in range(2000)] + self.transactions["account_id"].unique().tolist()
+        expected = len(self.transactions)
+
+        self.assertEqual(len(self.store.transactions(account_ids)), expected)
+        self.assertEqual(len(self.store.transactions(account_ids, limit=2500)), 2500)
+        chunks = list(self.store.iter_transactions(1000, account_ids))
+        loaded = pd.concat(chunks, ignore_index=True)
+        self.assertEqual(len(loaded), expected)
+        self.assertTrue(loaded["account_id"].astype(str).is_monotonic_increasing)
+
+
+if __name__ == '__main__':
+    unittest.main()
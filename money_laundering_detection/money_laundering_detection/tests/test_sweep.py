@@ -0,0 +1,67 @@
+import unittest
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pandas as pd
+from src.detector import MoneyLaunderingDetector
+from src.generator import generate_transactions
+from src.sweep import ThresholdSweep, threshold_range
+
+
+class TestThresholdSweep(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        chunks, _ = generate_transactions(5000, accounts=200, days=180, start="2025-01-01", seed=5)
+        cls.transactions = pd.concat(list(chunks), ignore_index=True)
+        cls.sweep = ThresholdSweep(cls.transactions)
+
+    def test_counts_match_detector(self):
+        reasons = {"large_transactions": "Unusually Large Transaction", "structuring": "Structuring/Smurfing Detected"}
+        for large, structuring in ((100000, 1000000), (20000, 150000)):
+            detector = MoneyLaunderingDetector(self.transactions)
+            detector.thresholds.update(large_txn_threshold=large, structuring_threshold=structuring)
+            alerts = detector.detect(vectorized=True)
+            result = self.sweep.sweep({"large_txn_threshold": [large], "structuring_threshold": [structuring]},
+                                      include_accounts=True)
+
+            for rule, reason in reasons.items():
+                flagged = [alert for alert in alerts if alert["reason"] == reason]
+                point = result[rule][0]
+                self.assertEqual(point["alerts"], len(flagged))
+                self.assertEqual(sorted(point["accounts"]), sorted({str(a["account_id"]) for a in flagged}))
+                self.assertEqual(point["accounts_count"], len(point["accounts"]))
+
+    def test_curve_is_monotonic(self):
+        points = self.sweep.sweep({"structuring": threshold_range(0, 500000, 200)})["structuring"]
+        counts = [point["alerts"] for point in points]
+        self.assertEqual(len(counts), 200)
+        self.assertEqual(counts, sorted(counts, reverse=True))
+        self.assertEqual(self.sweep.counts("custom_pattern", [5])[0],
+                         sum(1 for a in MoneyLaunderingDetector(self.transactions).detect(vectorized=True)
+                             if a["reason"].startswith("Unusual activity")))
+        with self.assertRaises(ValueError):
+            self.sweep.sweep({"unknown_threshold": [1]})
+
+    def test_api(self):
+        import app as web
+        client = web.app.test_client()
+        dataset_id = web.datasets.create(self.transactions, pd.DataFrame({"account_id": ["ACC001"]}))
+        self.addCleanup(web.datasets.delete, dataset_id)
+
+        body = {"dataset_id": dataset_id,
+                "thresholds": {"large_txn_threshold": [50000, 100000],
+                               "structuring_threshold": {"min": 0, "max": 1000000, "steps": 11}}}
+        first = client.post("/api/threshold-sweep", json=body).get_json()
+        self.assertEqual([p["threshold"] for p in first["sweep"]["large_transactions"]], [50000, 100000])
+        self.assertEqual(len(first["sweep"]["structuring"]), 11)
+        self.assertTrue(client.post("/api/threshold-sweep", json=body).get_json()["precomputed"])
+
+        bad = client.post("/api/threshold-sweep", json={"dataset_id": dataset_id, "thresholds": {"x": [1]}})
+        self.assertEqual(bad.status_code, 400)
+        self.assertEqual(client.post("/api/threshold-sweep", json={"dataset_id": "missing"}).status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
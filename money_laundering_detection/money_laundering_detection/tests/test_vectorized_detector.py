@@ -0,0 +1,138 @@
+import unittest
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pandas as pd
+from src.aggregates import TransactionAggregator
+from src.detector import MoneyLaunderingDetector
+from src.schema import columns_for, read_transactions
+from src.utils import load_data
+
+
+class TestVectorizedDetector(unittest.TestCase):
+
+    def setUp(self):
+        """Load the bundled CSV feed"""
+        root = Path(__file__).resolve().parent.parent
+        self.transactions = pd.read_csv(root / "data" / "transactions.csv")
+
+    def _signature(self, alerts):
+        return [(a["account_id"], a["reason"]) for a in alerts]
+
+    def test_matches_legacy_rules(self):
+        """Vectorized engine returns the same alerts, in the same order"""
+        for large, structuring in [(100000, 1000000), (50000, 200000), (10000, 20000)]:
+            legacy = MoneyLaunderingDetector(self.transactions.copy())
+            fast = MoneyLaunderingDetector(self.transactions.copy())
+            for detector in (legacy, fast):
+                detector.thresholds["large_txn_threshold"] = large
+                detector.thresholds["structuring_threshold"] = structuring
+
+            without_ids = lambda alerts: [{k: v for k, v in a.items() if k != "alert_id"} for a in alerts]
+            self.assertEqual(without_ids(legacy.detect()), without_ids(fast.detect(vectorized=True)))
+
+    def test_custom_pattern_reason(self):
+        """Daily-count rule reports the count and the day"""
+        txns = pd.DataFrame({
+            "account_id": ["ACC001"] * 6 + ["ACC002"],
+            "amount": [10] * 7,
+            "timestamp": ["2025-08-09 0%d:00:00" % h for h in range(6)] + ["2025-08-09 01:00:00"],
+        })
+        alerts = MoneyLaunderingDetector(txns).detect(vectorized=True)
+        self.assertEqual(self._signature(alerts), [("ACC001", "Unusual activity: 6 transactions on 2025-08-09")])
+        self.assertEqual((alerts[0]["transaction_count"], alerts[0]["risk_score"], str(alerts[0]["date"])),
+                         (6, 60, "2025-08-09"))
+
+    def test_streaming_matches_in_memory(self):
+        """Chunked load + aggregate detection equals the in-memory path"""
+        root = Path(__file__).resolve().parent.parent
+        txn_file = root / "data" / "transactions.csv"
+        acc_file = root / "data" / "accounts.csv"
+
+        in_memory = MoneyLaunderingDetector()
+        streamed = MoneyLaunderingDetector()
+        for detector in (in_memory, streamed):
+            detector.thresholds["large_txn_threshold"] = 50000
+            detector.thresholds["structuring_threshold"] = 200000
+        in_memory.load_data(txn_file, acc_file)
+        streamed.load_data(txn_file, acc_file, chunksize=7)
+
+        self.assertEqual(streamed.aggregates.rows, len(in_memory.transactions))
+        self.assertEqual(streamed.aggregates.chunks, 5)
+        self.assertEqual(self._signature(in_memory.detect()), self._signature(streamed.detect()))
+
+    def test_streamed_load_data_uses_detector_default_threshold(self):
+        """utils.load_data(chunksize=...) keeps enough large transactions for detect()"""
+        root = Path(__file__).resolve().parent.parent
+        aggregator, accounts = load_data(root / "data" / "transactions.csv", root / "data" / "accounts.csv",
+                                         chunksize=7, columns=columns_for("detector"))
+        expected = MoneyLaunderingDetector(read_transactions(root / "data" / "transactions.csv"), accounts).detect()
+
+        streamed = MoneyLaunderingDetector(aggregates=aggregator, accounts=accounts)
+        self.assertEqual(aggregator.large_txn_threshold, streamed.thresholds["large_txn_threshold"])
+        self.assertEqual(self._signature(streamed.detect()), self._signature(expected))
+
+    def test_aggregator_account_totals(self):
+        """Per-account running aggregates fold across chunks"""
+        aggregator = TransactionAggregator()
+        aggregator.update(self.transactions.iloc[:10])
+        aggregator.update(self.transactions.iloc[10:])
+        accounts = aggregator.account_frame().set_index("account_id")
+
+        expected = self.transactions.groupby("account_id")["amount"].agg(["sum", "count"])
+        self.assertEqual(accounts["total_amount"].tolist(), expected["sum"].tolist())
+        self.assertEqual(accounts["txn_count"].tolist(), expected["count"].tolist())
+        self.assertEqual(accounts["cash_count"].sum(), 0)
+        self.assertEqual(str(accounts["last_txn"].max()), self.transactions["timestamp"].max())
+
+    def test_streaming_threshold_floor(self):
+        """Lowering the large-transaction threshold below what was retained is refused"""
+        aggregator = TransactionAggregator(large_txn_threshold=100000)
+        aggregator.update(self.transactions)
+        detector = MoneyLaunderingDetector(aggregates=aggregator)
+        detector.thresholds["large_txn_threshold"] = 50000
+        with self.assertRaises(ValueError):
+            detector.detect()
+
+    def test_append_emits_only_new_or_changed(self):
+        """Micro-batches re-evaluate touched account-days only"""
+        txns = pd.DataFrame({
+            "account_id": ["ACC001"] * 8,
+            "amount": [10] * 7 + [1500000],
+            "timestamp": ["2025-08-09 %02d:00:00" % h for h in range(8)],
+        })
+        detector = MoneyLaunderingDetector(txns.iloc[:6])
+        self.assertEqual(self._signature(detector.append(txns.iloc[6:7])),
+                         [("ACC001", "Unusual activity: 7 transactions on 2025-08-09")])
+        self.assertEqual(self._signature(detector.append(txns.iloc[7:8])), [
+            ("ACC001", "Unusually Large Transaction"),
+            ("ACC001", "Structuring/Smurfing Detected"),
+            ("ACC001", "Unusual activity: 8 transactions on 2025-08-09"),
+        ])
+        self.assertEqual(detector.append(txns.iloc[:0]), [])
+
+    def test_append_matches_full_detection(self):
+        """Replaying the feed in batches ends in the same alert state as one full run"""
+        full = MoneyLaunderingDetector(self.transactions.copy())
+        full.thresholds["structuring_threshold"] = 150000
+        incremental = MoneyLaunderingDetector(self.transactions.iloc[:5].copy())
+        incremental.thresholds["structuring_threshold"] = 150000
+
+        emitted = []
+        for start in range(5, len(self.transactions), 4):
+            emitted.extend(incremental.append(self.transactions.iloc[start:start + 4]))
+
+        expected = self._signature(full.detect(vectorized=True))
+        self.assertEqual(self._signature(incremental.detect()), expected)
+        daily = [sig for sig in self._signature(emitted) if sig[1] != "Unusually Large Transaction"]
+        self.assertEqual(len(set(daily)), len(daily))
+
+    def test_missing_timestamp(self):
+        detector = MoneyLaunderingDetector(pd.DataFrame({"account_id": ["ACC001"], "amount": [1]}))
+        with self.assertRaises(KeyError):
+            detector.detect(vectorized=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
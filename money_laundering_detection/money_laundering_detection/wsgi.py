@@ -12,6 +12,11 @@ sys.path.insert(0, str(project_root))
 # Set environment
 os.environ.setdefault('FLASK_ENV', 'production')
 
+# Detector and job logging: queued, written by a background thread. gunicorn runs
+# several worker processes, so each writes (and rotates) its own reports/system-<pid>.log
+from src import log
+log.configure(log_file=os.environ.get('LOG_FILE', log.PER_PROCESS_LOG_FILE))
+
 # Import the Flask app
 from app import app
 